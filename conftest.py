@@ -0,0 +1,17 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def inline_thumbnails(settings):
+    """Миниатюры в тестах генерируются синхронно.
+
+    Иначе фоновый поток может писать во временный MEDIA_ROOT, пока
+    фикстура mock_media его удаляет.
+    """
+    settings.THUMBNAIL_WORKERS = 0
+
+
+@pytest.fixture(autouse=True)
+def strict_query_budgets(settings):
+    """Превышение QUERY_BUDGETS роняет тест, как в QueryBudgetTestRunner."""
+    settings.QUERY_BUDGET_STRICT = True
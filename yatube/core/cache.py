@@ -0,0 +1,231 @@
+"""Общий для всех воркеров кэш в файле SQLite.
+
+В отличие от LocMemCache данные видят все процессы на машине, поэтому
+фрагмент ленты строится один раз, а clearcache действительно очищает
+кэш. Каждая запись — одна транзакция SQLite; incr и add выполняются в
+BEGIN IMMEDIATE и атомарны между процессами. Когда число записей или
+суммарный размер значений превышает MAX_ENTRIES / MAX_SIZE, удаляются
+просроченные и давно не читанные (LRU) записи.
+
+    CACHES = {'default': {
+        'BACKEND': 'core.cache.SQLiteCache',
+        'LOCATION': '/var/tmp/yatube-cache.sqlite3',
+        'OPTIONS': {'MAX_ENTRIES': 100000, 'MAX_SIZE': 256 * 1024 ** 2},
+    }}
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache ('
+    ' key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL,'
+    ' expires REAL, accessed REAL NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)',
+    'CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)',
+)
+# Время последнего чтения обновляется не чаще, чем раз в столько секунд:
+# для LRU этого достаточно, а чтения почти всегда обходятся без записи.
+ACCESS_RESOLUTION = 60
+# Размер кэша проверяется на каждой CULL_EVERY-й записи процесса.
+CULL_EVERY = 50
+
+
+class SQLiteCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.path = location
+        options = params.get('OPTIONS', {})
+        self.max_size = int(options.get('MAX_SIZE', 64 * 1024 ** 2))
+        self._local = threading.local()
+        self._writes = 0
+
+    @property
+    def db(self):
+        # Соединение на поток и на процесс: после fork воркера старое
+        # соединение родителя не используется.
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10,
+                                   isolation_level=None)
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute('PRAGMA synchronous = NORMAL')
+            for statement in SCHEMA:
+                conn.execute(statement)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        db = self.db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            yield db
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _row(self, key, value, timeout, now):
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        return (key, data, len(data), self.get_backend_timeout(timeout), now)
+
+    def _write(self, db, rows):
+        db.executemany(
+            'INSERT OR REPLACE INTO cache'
+            ' (key, value, size, expires, accessed) VALUES (?, ?, ?, ?, ?)',
+            rows,
+        )
+
+    def _after_write(self):
+        self._writes += 1
+        if self._writes % CULL_EVERY == 0:
+            self.cull()
+
+    def _live(self, db, keys, now):
+        marks = ', '.join('?' * len(keys))
+        return db.execute(
+            f'SELECT key, value, accessed FROM cache WHERE key IN ({marks})'
+            f' AND (expires IS NULL OR expires > ?)',
+            [*keys, now],
+        ).fetchall()
+
+    def _touch_read(self, db, rows, now):
+        stale = [key for key, _, accessed in rows
+                 if accessed < now - ACCESS_RESOLUTION]
+        if stale:
+            db.executemany(
+                'UPDATE cache SET accessed = ? WHERE key = ?',
+                [(now, key) for key in stale],
+            )
+
+    def get(self, key, default=None, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        rows = self._live(self.db, [key], now)
+        if not rows:
+            return default
+        self._touch_read(self.db, rows, now)
+        return pickle.loads(rows[0][1])
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        if not keys:
+            return {}
+        made = {self._key(key, version): key for key in keys}
+        now = time.time()
+        rows = self._live(self.db, list(made), now)
+        self._touch_read(self.db, rows, now)
+        return {made[key]: pickle.loads(value) for key, value, _ in rows}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        with self._transaction() as db:
+            self._write(db, [self._row(key, value, timeout, time.time())])
+        self._after_write()
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        now = time.time()
+        rows = [
+            self._row(self._key(key, version), value, timeout, now)
+            for key, value in data.items()
+        ]
+        with self._transaction() as db:
+            self._write(db, rows)
+        self._after_write()
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        with self._transaction() as db:
+            if self._live(db, [key], now):
+                return False
+            self._write(db, [self._row(key, value, timeout, now)])
+        self._after_write()
+        return True
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        with self._transaction() as db:
+            rows = self._live(db, [key], now)
+            if not rows:
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(rows[0][1]) + delta
+            data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            db.execute(
+                'UPDATE cache SET value = ?, size = ?, accessed = ?'
+                ' WHERE key = ?',
+                (data, len(data), now, key),
+            )
+        return value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        with self._transaction() as db:
+            updated = db.execute(
+                'UPDATE cache SET expires = ?, accessed = ? WHERE key = ?'
+                ' AND (expires IS NULL OR expires > ?)',
+                (self.get_backend_timeout(timeout), now, key, now),
+            ).rowcount
+        return bool(updated)
+
+    def has_key(self, key, version=None):
+        key = self._key(key, version)
+        return bool(self._live(self.db, [key], time.time()))
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version)
+
+    def delete_many(self, keys, version=None):
+        keys = [(self._key(key, version),) for key in keys]
+        if keys:
+            with self._transaction() as db:
+                db.executemany('DELETE FROM cache WHERE key = ?', keys)
+
+    def clear(self):
+        with self._transaction() as db:
+            db.execute('DELETE FROM cache')
+
+    def cull(self):
+        """Удаляет просроченные записи, затем LRU до MAX_ENTRIES/MAX_SIZE."""
+        with self._transaction() as db:
+            db.execute(
+                'DELETE FROM cache WHERE expires IS NOT NULL AND expires <= ?',
+                (time.time(),),
+            )
+            count, size = db.execute(
+                'SELECT COUNT(*), TOTAL(size) FROM cache').fetchone()
+            if count <= self._max_entries and size <= self.max_size:
+                return
+            if self._cull_frequency == 0:
+                db.execute('DELETE FROM cache')
+                return
+            # Как LocMemCache: удаляем 1/CULL_FREQUENCY записей за раз,
+            # но не меньше, чем нужно, чтобы уложиться в лимит записей.
+            victims = max(
+                count // self._cull_frequency, count - self._max_entries, 1
+            )
+            db.execute(
+                'DELETE FROM cache WHERE key IN ('
+                ' SELECT key FROM cache ORDER BY accessed LIMIT ?)',
+                (victims,),
+            )
+
+    def close(self, **kwargs):
+        # Соединения живут весь поток: открытие файла и PRAGMA дороже
+        # самих запросов. Django вызывает close() после каждого запроса.
+        pass
@@ -0,0 +1,129 @@
+"""Критический CSS: правила Bootstrap, которые реально используют шаблоны.
+
+build_critical_css собирает из шаблонов классы и теги, оставляет в
+bootstrap.min.css только правила, все классы и теги селектора которых
+встречаются в разметке, и сохраняет результат в CRITICAL_CSS_PATH.
+base.html встраивает его в <style>, а полный Bootstrap грузит без
+блокировки рендеринга.
+"""
+import os
+import re
+from functools import lru_cache
+
+from django.conf import settings
+
+CLASS_ATTR = re.compile(r'class="([^"]*)"')
+ADDCLASS = re.compile(r'''addclass:['"]([^'"]+)['"]''')
+TAG = re.compile(r'<([a-zA-Z][a-zA-Z0-9]*)')
+TEMPLATE_SYNTAX = re.compile(r'{%.*?%}|{{.*?}}')
+# Теги, которые выводят виджеты форм и Django, а не сами шаблоны.
+RENDERED_TAGS = {
+    'html', 'body', 'input', 'textarea', 'select', 'option', 'label',
+    'button', 'ul', 'li', 'span', 'p',
+}
+
+COMMENT = re.compile(r'/\*.*?\*/', re.DOTALL)
+PSEUDO = re.compile(r'::?[\w-]+(\([^)]*\))?')
+ATTRIBUTE = re.compile(r'\[[^\]]*\]')
+SELECTOR_CLASS = re.compile(r'\.([\w-]+)')
+SELECTOR_ID = re.compile(r'#[\w-]+')
+SELECTOR_TAG = re.compile(r'(?<![\w-])([a-z][a-z0-9]*)')
+# Эти @-правила не нужны для первой отрисовки.
+DROPPED_AT_RULES = ('@keyframes', '@-webkit-keyframes', '@font-face')
+
+
+def template_usage(directories):
+    """Классы и теги, встречающиеся в шаблонах каталогов directories."""
+    classes, tags = set(), set(RENDERED_TAGS)
+    for directory in directories:
+        for root, _, files in os.walk(directory):
+            for name in files:
+                if not name.endswith('.html'):
+                    continue
+                with open(os.path.join(root, name), encoding='utf-8') as f:
+                    source = f.read()
+                for value in CLASS_ATTR.findall(source):
+                    classes.update(TEMPLATE_SYNTAX.sub(' ', value).split())
+                for value in ADDCLASS.findall(source):
+                    classes.update(value.split())
+                tags.update(tag.lower() for tag in TAG.findall(source))
+    return classes, tags
+
+
+def _block_end(css, start):
+    """Позиция '}', закрывающей блок, который открывается в start."""
+    depth, quote = 0, None
+    for end in range(start, len(css)):
+        char = css[end]
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return end
+    return len(css)
+
+
+def blocks(css):
+    """Разбивает CSS на пары (прелюдия, тело) верхнего уровня."""
+    css = COMMENT.sub('', css)
+    position = 0
+    while position < len(css):
+        start = css.find('{', position)
+        if start == -1:
+            return
+        end = _block_end(css, start)
+        prelude = css[position:start].strip()
+        if prelude.startswith('@charset'):
+            prelude = prelude.split(';', 1)[1].strip()
+        yield prelude, css[start + 1:end]
+        position = end + 1
+
+
+def selector_used(selector, classes, tags):
+    bare = SELECTOR_ID.sub(' ', ATTRIBUTE.sub(' ', PSEUDO.sub(' ', selector)))
+    if not set(SELECTOR_CLASS.findall(bare)) <= classes:
+        return False
+    bare = SELECTOR_CLASS.sub(' ', bare)
+    return set(SELECTOR_TAG.findall(bare)) <= tags
+
+
+def subset(css, classes, tags):
+    """CSS только с правилами, селекторы которых есть в разметке."""
+    rules = []
+    for prelude, body in blocks(css):
+        if prelude.startswith(DROPPED_AT_RULES):
+            continue
+        if prelude.startswith('@'):
+            inner = subset(body, classes, tags)
+            if inner:
+                rules.append(f'{prelude}{{{inner}}}')
+            continue
+        selectors = [
+            selector for selector in prelude.split(',')
+            if selector_used(selector, classes, tags)
+        ]
+        if selectors:
+            rules.append(f'{",".join(selectors)}{{{body}}}')
+    return ''.join(rules)
+
+
+@lru_cache(maxsize=None)
+def _read(path, mtime):
+    with open(path, encoding='utf-8') as source:
+        return source.read()
+
+
+def inline():
+    """Содержимое CRITICAL_CSS_PATH или '', если его ещё не собрали."""
+    path = settings.CRITICAL_CSS_PATH
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return ''
+    return _read(path, mtime)
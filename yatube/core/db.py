@@ -0,0 +1,59 @@
+"""Настройка соединений SQLite и последовательная запись.
+
+При каждом новом соединении выполняются PRAGMA из SQLITE_PRAGMAS: WAL
+позволяет читателям не ждать писателя, busy_timeout заставляет писателя
+ждать блокировку, а не сразу падать с «database is locked».
+
+serialized_writes пропускает пишущие запросы процесса по одному, каждый
+в своей транзакции: потоки одного процесса не соревнуются за блокировку
+записи, а транзакция, начатая чтением, не получает SQLITE_BUSY при
+переходе к записи из-за соседнего потока.
+"""
+import threading
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
+from django.conf import settings
+from django.db import transaction
+
+_write_lock = threading.Lock()
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    # Через DB-API напрямую: служебные PRAGMA не попадают в учёт
+    # запросов QueryInstrumentationMiddleware.
+    for name, value in settings.SQLITE_PRAGMAS.items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
+
+
+def write_lock():
+    """Блокировка записи процесса при SQLITE_WRITE_QUEUE."""
+    return _write_lock if settings.SQLITE_WRITE_QUEUE else nullcontext()
+
+
+def serialized_writes(view):
+    """Выполняет небезопасные (POST) запросы к view по одному на процесс."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (not settings.SQLITE_WRITE_QUEUE
+                or request.method in ('GET', 'HEAD', 'OPTIONS')):
+            return view(request, *args, **kwargs)
+        with _write_lock, transaction.atomic():
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+@contextmanager
+def without_auto_now(model, *field_names):
+    """Позволяет bulk_create записать собственные значения дат."""
+    fields = [model._meta.get_field(name) for name in field_names]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
@@ -0,0 +1,46 @@
+import gzip
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand, CommandError
+
+from core import critical_css
+
+
+class Command(BaseCommand):
+    help = (
+        'Собирает из bootstrap.min.css правила, которые используют '
+        'шаблоны, в CRITICAL_CSS_PATH для встраивания в base.html.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source', default='css/bootstrap.min.css',
+            help='Путь к полному CSS или его имя среди статики.',
+        )
+
+    def handle(self, *args, **options):
+        source = options['source']
+        path = source if os.path.isfile(source) else finders.find(source)
+        if not path:
+            raise CommandError(f'Файл {source} не найден.')
+        with open(path, encoding='utf-8') as css:
+            full = css.read()
+        directories = [
+            directory
+            for engine in settings.TEMPLATES
+            for directory in engine['DIRS']
+        ]
+        classes, tags = critical_css.template_usage(directories)
+        subset = critical_css.subset(full, classes, tags)
+        target = settings.CRITICAL_CSS_PATH
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'w', encoding='utf-8') as output:
+            output.write(subset)
+        self.stdout.write(
+            f'{target}: {len(subset)} bytes '
+            f'({len(gzip.compress(subset.encode()))} gzipped), '
+            f'full CSS {len(full)} bytes '
+            f'({len(gzip.compress(full.encode()))} gzipped)'
+        )
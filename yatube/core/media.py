@@ -0,0 +1,163 @@
+"""Раздача медиафайлов для установок без отдельного файлового сервера.
+
+Файл целиком отдаёт FileResponse: сервер приложений с
+wsgi.file_wrapper (gunicorn, uWSGI) передаёт его через sendfile, не
+копируя в Python. Диапазон (Range: bytes=...) читается из mmap
+блоками, поэтому картинка не попадает в память процесса целиком.
+ETag и Last-Modified строятся по stat(), повторный запрос с
+If-None-Match или If-Modified-Since получает 304.
+
+Если перед Django стоит nginx или Apache, MEDIA_SENDFILE включает
+X-Accel-Redirect или X-Sendfile: Django проверяет путь и заголовки,
+а файл и диапазоны отдаёт сам прокси.
+"""
+import mimetypes
+import mmap
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+BLOCK_SIZE = 64 * 1024
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def byte_range(header, size):
+    """(начало, конец) включительно или None — отдать файл целиком.
+
+    Несколько диапазонов и некорректный заголовок игнорируются, как
+    разрешает RFC 7233; диапазон за концом файла —
+    RangeNotSatisfiable.
+    """
+    match = RANGE.match(header.strip())
+    if not match or match.group(1) == match.group(2) == '':
+        return None
+    first, last = match.groups()
+    if first == '':
+        length = int(last)
+        if not length or not size:
+            raise RangeNotSatisfiable
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if last and end < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable
+    return start, min(end, size - 1)
+
+
+class MappedRange:
+    """Файлоподобное окно [start, end] файла, прочитанное через mmap."""
+
+    def __init__(self, path, start, end):
+        with open(path, 'rb') as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.map.seek(start)
+        self.remaining = end - start + 1
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        self.remaining -= size
+        return self.map.read(size)
+
+    def close(self):
+        self.map.close()
+
+
+class MediaFileResponse(FileResponse):
+    block_size = BLOCK_SIZE
+
+
+def _etag(stat):
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def _validators(response, stat):
+    response['ETag'] = _etag(stat)
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    return response
+
+
+def _range_allowed(request, stat):
+    """If-Range: диапазон отдаётся, только если файл не изменился."""
+    condition = request.META.get('HTTP_IF_RANGE')
+    return condition is None or condition in (
+        _etag(stat), http_date(stat.st_mtime),
+    )
+
+
+def _sendfile(path, fullpath, content_type):
+    response = HttpResponse(content_type=content_type)
+    if settings.MEDIA_SENDFILE == 'X-Accel-Redirect':
+        response['X-Accel-Redirect'] = (
+            settings.MEDIA_ACCEL_PREFIX + quote(path)
+        )
+    else:
+        response[settings.MEDIA_SENDFILE] = fullpath
+    return response
+
+
+def _ranged(request, fullpath, stat, content_type):
+    header = request.META.get('HTTP_RANGE')
+    if header is None or not _range_allowed(request, stat):
+        return None
+    try:
+        bounds = byte_range(header, stat.st_size)
+    except RangeNotSatisfiable:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+        return response
+    if bounds is None:
+        return None
+    start, end = bounds
+    response = MediaFileResponse(
+        MappedRange(fullpath, start, end), status=206,
+        content_type=content_type,
+    )
+    response['Content-Length'] = end - start + 1
+    response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+    return response
+
+
+@require_safe
+def serve(request, path):
+    path = posixpath.normpath(path).lstrip('/')
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+        stat = os.stat(fullpath)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404('Файл не найден.')
+    if not os.path.isfile(fullpath):
+        raise Http404('Файл не найден.')
+    response = get_conditional_response(
+        request, etag=_etag(stat), last_modified=int(stat.st_mtime),
+    )
+    if response is not None:
+        return _validators(response, stat)
+    content_type = (
+        mimetypes.guess_type(fullpath)[0] or 'application/octet-stream'
+    )
+    if settings.MEDIA_SENDFILE:
+        response = _sendfile(path, fullpath, content_type)
+    else:
+        response = _ranged(request, fullpath, stat, content_type)
+    if response is None:
+        response = MediaFileResponse(
+            open(fullpath, 'rb'), content_type=content_type,
+        )
+    response['Accept-Ranges'] = 'bytes'
+    return _validators(response, stat)
@@ -0,0 +1,157 @@
+import json
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import profiling, routers
+
+logger = logging.getLogger('yatube.queries')
+template_logger = logging.getLogger('yatube.templates')
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryStats:
+    """Считает запросы к БД, их время и повторы в рамках одного запроса."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.fingerprints[' '.join(sql.split())] += 1
+
+    @property
+    def duplicates(self):
+        return {
+            sql: count for sql, count in self.fingerprints.items()
+            if count > 1
+        }
+
+    def server_timing(self):
+        return (
+            f'db;desc="{self.count} queries";dur={self.duration * 1000:.2f}, '
+            f'dup;desc="{sum(self.duplicates.values())} duplicate queries"'
+        )
+
+
+def query_budget(view_name):
+    return settings.QUERY_BUDGETS.get(view_name)
+
+
+class QueryInstrumentationMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = QueryStats()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats))
+            response = self.get_response(request)
+        response.query_stats = stats
+        response['Server-Timing'] = ', '.join(filter(None, (
+            stats.server_timing(), response.get('Server-Timing'),
+        )))
+        match = request.resolver_match
+        view_name = match.view_name if match else None
+        budget = query_budget(view_name)
+        logger.info(json.dumps({
+            'view': view_name,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': stats.count,
+            'db_ms': round(stats.duration * 1000, 2),
+            'duplicates': len(stats.duplicates),
+            'budget': budget,
+        }, ensure_ascii=False))
+        if budget is not None and stats.count > budget:
+            message = (
+                f'{view_name}: {stats.count} queries, budget is {budget}'
+            )
+            if settings.QUERY_BUDGET_STRICT:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+
+class ReadReplicaMiddleware:
+    """Разрешает чтение с реплик в GET/HEAD и закрепляет автора за primary.
+
+    После успешного POST или записи в primary (подписка делается
+    GET-запросом) ставится кука на READ_YOUR_WRITES_SECONDS: пока она
+    жива, запросы этого клиента читают из primary и видят собственные
+    посты, комментарии и подписки, даже если реплика отстаёт.
+    """
+    cookie_name = 'primary_until'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def pinned(self, request):
+        try:
+            return float(request.COOKIES.get(self.cookie_name, 0)) > (
+                time.time())
+        except ValueError:
+            return False
+
+    def __call__(self, request):
+        safe = request.method in ('GET', 'HEAD', 'OPTIONS')
+        routers.allow_replica(safe and not self.pinned(request))
+        try:
+            response = self.get_response(request)
+            wrote = routers.wrote()
+        finally:
+            routers.allow_replica(False)
+        if ((not safe or wrote) and response.status_code < 400
+                and settings.DATABASE_REPLICAS):
+            window = settings.READ_YOUR_WRITES_SECONDS
+            response.set_cookie(
+                self.cookie_name, str(time.time() + window),
+                max_age=window, httponly=True, samesite='Lax',
+            )
+        return response
+
+
+class TemplateProfilingMiddleware:
+    """Время рендеринга шаблонов, include и тегов при TEMPLATE_PROFILING.
+
+    Самые медленные узлы попадают в Server-Timing, полный профиль — в
+    лог yatube.templates.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.TEMPLATE_PROFILING:
+            return self.get_response(request)
+        with profiling.profile() as profile:
+            response = self.get_response(request)
+        if not profile.timings:
+            return response
+        response['Server-Timing'] = ', '.join(filter(None, (
+            response.get('Server-Timing'), profile.server_timing(),
+        )))
+        template_logger.info(json.dumps({
+            'path': request.path,
+            'nodes': [
+                {'label': label, 'calls': count,
+                 'total_ms': round(total, 2), 'max_ms': round(worst, 2)}
+                for label, count, total, worst in profile.totals()
+            ],
+        }, ensure_ascii=False))
+        return response
@@ -0,0 +1,105 @@
+"""Профилирование рендеринга шаблонов.
+
+install() оборачивает Template.render, {% include %}, simple_tag и
+inclusion_tag (в том числе {% critical_css %} и {% post_picture %}).
+Пока в потоке нет активного профиля (with profile(): ...), обёртки
+только проверяют thread-local и вызывают исходный render. Время
+включающее: время шаблона содержит его include и теги.
+
+Профиль на каждый запрос включает TemplateProfilingMiddleware при
+TEMPLATE_PROFILING = True, на страницы целиком — bench_views --templates.
+"""
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+
+from django.template.base import Template
+from django.template.library import InclusionNode, SimpleNode
+from django.template.loader_tags import IncludeNode
+
+QUOTES = '\'"'
+
+_local = threading.local()
+
+
+class RenderProfile:
+    def __init__(self):
+        self.timings = defaultdict(list)
+
+    def add(self, label, seconds):
+        self.timings[label].append(seconds * 1000)
+
+    def totals(self):
+        """[(метка, вызовов, всего мс, максимум мс)] по убыванию времени."""
+        return sorted(
+            (
+                (label, len(values), sum(values), max(values))
+                for label, values in self.timings.items()
+            ),
+            key=lambda row: row[2],
+            reverse=True,
+        )
+
+    def server_timing(self, limit=5):
+        return ', '.join(
+            f'tpl{number};desc="{label} x{count}";dur={total:.2f}'
+            for number, (label, count, total, _) in enumerate(
+                self.totals()[:limit])
+        )
+
+
+@contextmanager
+def profile():
+    previous = getattr(_local, 'profile', None)
+    _local.profile = RenderProfile()
+    try:
+        yield _local.profile
+    finally:
+        _local.profile = previous
+
+
+def _location(node):
+    origin = getattr(node, 'origin', None)
+    token = getattr(node, 'token', None)
+    name = getattr(origin, 'template_name', None) or '?'
+    return f'{name}:{token.lineno}' if token is not None else name
+
+
+def _template_label(template, context):
+    return template.name or '<string>'
+
+
+def _include_label(node, context):
+    return f'include {node.template.token.strip(QUOTES)}'
+
+
+def _tag_label(node, context):
+    return f'{node.func.__name__} {_location(node)}'
+
+
+def _timed(render, label):
+    @wraps(render)
+    def wrapper(self, context, *args, **kwargs):
+        current = getattr(_local, 'profile', None)
+        if current is None:
+            return render(self, context, *args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return render(self, context, *args, **kwargs)
+        finally:
+            current.add(label(self, context), time.perf_counter() - started)
+    wrapper.profiled = True
+    return wrapper
+
+
+def install():
+    for cls, label in (
+        (Template, _template_label),
+        (IncludeNode, _include_label),
+        (SimpleNode, _tag_label),
+        (InclusionNode, _tag_label),
+    ):
+        if not getattr(cls.render, 'profiled', False):
+            cls.render = _timed(cls.render, label)
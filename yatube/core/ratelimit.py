@@ -0,0 +1,53 @@
+"""Ограничение частоты запросов: корзина токенов в кэше.
+
+Корзина ёмкостью burst пополняется со скоростью rate токенов в секунду.
+В кэше хранится начало эпохи корзины и число токенов, взятых с её
+начала; взятие — атомарный cache.incr, поэтому параллельные запросы
+одного пользователя не получают лишних токенов. Когда корзина снова
+полна, начинается новая эпоха со своим счётчиком. Каждое взятие
+продлевает ключи до момента, когда корзина наполнится, с запасом на
+ещё одно наполнение: при постоянной нагрузке ключи не истекают раньше
+времени, а в простое просто истекают.
+
+С кэшем в памяти процесса (locmem) лимит считается в каждом процессе
+отдельно; общий лимит даёт YATUBE_CACHE=sqlite.
+"""
+import math
+import time
+
+from django.core.cache import cache
+
+START_KEY = 'ratelimit:{name}'
+TAKEN_KEY = 'ratelimit:{name}:{start}'
+
+
+def take(name, rate, burst):
+    """Берёт токен из корзины name.
+
+    Возвращает 0, если токен получен, иначе число секунд до появления
+    следующего токена.
+    """
+    now = time.time()
+    timeout = math.ceil(burst / rate) + 1
+    start_key = START_KEY.format(name=name)
+    start = cache.get(start_key)
+    if start is None or (now - start) * rate >= cache.get(
+            TAKEN_KEY.format(name=name, start=start), 0):
+        # Корзина полна: с этого момента считаем заново.
+        start = now
+        cache.set(start_key, start, timeout)
+    taken_key = TAKEN_KEY.format(name=name, start=start)
+    cache.add(taken_key, 0, timeout)
+    try:
+        taken = cache.incr(taken_key)
+    except ValueError:
+        cache.set(taken_key, 1, timeout)
+        taken = 1
+    available = burst + (now - start) * rate
+    if taken <= available:
+        refill = math.ceil((taken - (now - start) * rate + burst) / rate)
+        cache.touch(start_key, refill)
+        cache.touch(taken_key, refill)
+        return 0
+    cache.decr(taken_key)
+    return (taken - available) / rate
@@ -0,0 +1,52 @@
+"""Чтение с реплик, запись в primary.
+
+Реплики разрешены только внутри безопасного (GET/HEAD) запроса, который
+ReadReplicaMiddleware не закрепил за primary. Вне запросов (команды,
+миграции, сигналы в POST) всё идёт в primary. После первой записи в
+рамках запроса чтения до конца запроса тоже идут в primary, чтобы не
+потерять только что записанное из-за отставания реплики.
+"""
+import random
+import threading
+
+from django.conf import settings
+
+PRIMARY = 'default'
+
+_state = threading.local()
+
+
+def allow_replica(allowed):
+    _state.replica = allowed
+    _state.wrote = False
+
+
+def wrote():
+    """Была ли в текущем запросе запись в primary."""
+    return getattr(_state, 'wrote', False)
+
+
+def replica_allowed():
+    return (
+        bool(settings.DATABASE_REPLICAS)
+        and getattr(_state, 'replica', False)
+        and not wrote()
+    )
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not replica_allowed():
+            return PRIMARY
+        instance = hints.get('instance')
+        if (instance is not None
+                and instance._state.db in settings.DATABASE_REPLICAS):
+            return instance._state.db
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        _state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
@@ -0,0 +1,12 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from .. import critical_css as builder
+
+register = template.Library()
+
+
+@register.simple_tag
+def critical_css():
+    """Встраиваемый критический CSS или '', если он не собран."""
+    return mark_safe(builder.inline())
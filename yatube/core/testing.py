@@ -0,0 +1,31 @@
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+from .middleware import query_budget
+
+
+class QueryBudgetTestRunner(DiscoverRunner):
+    """Прогон тестов, в котором превышение бюджета запросов — ошибка."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._strict_budgets = override_settings(QUERY_BUDGET_STRICT=True)
+        self._strict_budgets.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._strict_budgets.disable()
+        super().teardown_test_environment(**kwargs)
+
+
+class QueryBudgetMixin:
+    def assertWithinQueryBudget(self, response):
+        view_name = response.resolver_match.view_name
+        budget = query_budget(view_name)
+        self.assertIsNotNone(
+            budget, f'Для {view_name} не задан бюджет в QUERY_BUDGETS')
+        stats = response.query_stats
+        self.assertLessEqual(
+            stats.count, budget,
+            f'{view_name}: {stats.count} запросов при бюджете {budget}; '
+            f'повторы: {stats.duplicates}',
+        )
@@ -1,6 +1,30 @@
-from django.test import TestCase
+import gzip
+import os
+import tempfile
+import threading
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.template import engines
+from django.template.loaders.cached import Loader as CachedLoader
+from django.test import (RequestFactory, SimpleTestCase, TestCase,
+                         override_settings)
+from django.urls import reverse
 from http import HTTPStatus
 
+from posts.models import Post, User
+
+from . import critical_css, db, media, profiling, ratelimit, routers
+from .cache import SQLiteCache
+from .db import serialized_writes
+from .middleware import ReadReplicaMiddleware
+
 
 class ViewTestClass(TestCase):
     def test_error_page(self):
@@ -11,3 +35,417 @@ class ViewTestClass(TestCase):
         template = 'core/404.html'
         response = self.client.get('/nonexist-page/')
         self.assertTemplateUsed(response, template)
+
+
+class SqliteTuningTests(TestCase):
+    def test_pragmas_are_applied_to_connections(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(
+                cursor.fetchone()[0],
+                settings.SQLITE_PRAGMAS['busy_timeout'],
+            )
+
+    def test_serialized_writes_lock_only_unsafe_requests(self):
+        seen = []
+
+        @serialized_writes
+        def view(request):
+            seen.append(db._write_lock.locked())
+            return HttpResponse()
+
+        factory = RequestFactory()
+        with override_settings(SQLITE_WRITE_QUEUE=True):
+            view(factory.get('/'))
+            view(factory.post('/'))
+        with override_settings(SQLITE_WRITE_QUEUE=False):
+            view(factory.post('/'))
+        self.assertEqual(seen, [False, True, False])
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(TestCase):
+    """Primary и реплика — две разные тестовые БД SQLite без репликации,
+    поэтому по содержимому видно, откуда прочитана страница."""
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='post_author')
+        self.client.force_login(self.user)
+
+    def index_texts(self):
+        response = self.client.get(reverse('posts:index'))
+        return [post.text for post in response.context['page_obj']]
+
+    def test_safe_requests_read_from_replica(self):
+        Post.objects.create(author=self.user, text='Пост в primary')
+        self.assertEqual(self.index_texts(), [])
+        self.assertEqual(Post.objects.count(), 1)
+
+    def test_author_reads_own_writes_from_primary(self):
+        """После публикации автор читает из primary"""
+        response = self.client.post(
+            reverse('posts:post_create'), {'text': 'Новый пост'})
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.assertIn(ReadReplicaMiddleware.cookie_name, response.cookies)
+        self.assertEqual(self.index_texts(), ['Новый пост'])
+        self.client.cookies.pop(ReadReplicaMiddleware.cookie_name)
+        self.assertEqual(self.index_texts(), [])
+
+    def test_follow_by_get_pins_reader_to_primary(self):
+        """Подписка пишет в GET-запросе и тоже закрепляет за primary"""
+        author = User.objects.create(username='author')
+        Post.objects.create(author=author, text='Пост автора')
+        # Реплика ещё не отстаёт: пользователи и сессия уже на ней.
+        for user in (self.user, author):
+            User.objects.using('replica').create(
+                pk=user.pk, username=user.username)
+        session = Session.objects.get()
+        session.save(using='replica')
+        response = self.client.get(
+            reverse('posts:profile_follow', args=[author.username]))
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.assertIn(ReadReplicaMiddleware.cookie_name, response.cookies)
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            [post.text for post in response.context['page_obj']],
+            ['Пост автора'],
+        )
+
+    def test_reads_after_write_stay_on_primary(self):
+        routers.allow_replica(True)
+        try:
+            router = routers.PrimaryReplicaRouter()
+            self.assertEqual(router.db_for_read(Post), 'replica')
+            router.db_for_write(Post)
+            self.assertEqual(router.db_for_read(Post), 'default')
+        finally:
+            routers.allow_replica(False)
+        self.assertEqual(router.db_for_read(Post), 'default')
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'cache.sqlite3')
+        self.cache = self.make_cache()
+
+    def make_cache(self, **options):
+        return SQLiteCache(self.path, {'OPTIONS': options})
+
+    def test_basic_operations(self):
+        self.cache.set('fragment', {'html': '<p>Пост</p>'})
+        self.assertEqual(self.cache.get('fragment'), {'html': '<p>Пост</p>'})
+        self.assertFalse(self.cache.add('fragment', 'другое'))
+        self.assertTrue(self.cache.add('counter', 1, None))
+        self.assertEqual(self.cache.incr('counter', 2), 3)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+        self.assertEqual(
+            self.cache.get_many(['fragment', 'counter', 'missing']),
+            {'fragment': {'html': '<p>Пост</p>'}, 'counter': 3},
+        )
+        self.cache.delete('fragment')
+        self.assertIsNone(self.cache.get('fragment'))
+        self.cache.set('expired', 'значение', -1)
+        self.assertFalse(self.cache.has_key('expired'))
+
+    def test_store_is_shared_between_instances(self):
+        """Второй экземпляр (другой воркер) видит записи и очистку"""
+        worker = self.make_cache()
+        self.cache.set('index', 'страница', None)
+        self.assertEqual(worker.get('index'), 'страница')
+        worker.clear()
+        self.assertIsNone(self.cache.get('index'))
+
+    def test_incr_is_atomic_across_threads(self):
+        self.cache.set('counter', 0, None)
+
+        def work():
+            for _ in range(50):
+                self.cache.incr('counter')
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.cache.get('counter'), 200)
+
+    def test_cull_evicts_least_recently_used(self):
+        cache = self.make_cache(MAX_ENTRIES=3, CULL_FREQUENCY=3)
+        for number in range(4):
+            cache.set(f'key{number}', number, None)
+        with cache._transaction() as db:
+            db.execute("UPDATE cache SET accessed = 0 WHERE key = ':1:key1'")
+        cache.cull()
+        self.assertIsNone(cache.get('key1'))
+        self.assertEqual(cache.get_many(['key0', 'key2', 'key3']),
+                         {'key0': 0, 'key2': 2, 'key3': 3})
+
+    def test_cull_respects_size_limit(self):
+        cache = self.make_cache(MAX_SIZE=1000)
+        cache.set('big', 'x' * 2000, None)
+        cache.cull()
+        self.assertFalse(cache.has_key('big'))
+
+
+class TemplateRenderingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Post.objects.create(
+            author=User.objects.create(username='author'), text='Пост')
+
+    def test_templates_use_cached_loader(self):
+        engine = engines['django'].engine
+        self.assertIsInstance(engine.template_loaders[0], CachedLoader)
+        self.assertIs(
+            engine.get_template('posts/index.html'),
+            engine.get_template('posts/index.html'),
+        )
+
+    def test_profile_records_templates_and_nodes(self):
+        with profiling.profile() as profile:
+            self.client.get(reverse('posts:index'))
+        labels = {label for label, *_ in profile.totals()}
+        self.assertIn('posts/index.html', labels)
+        self.assertIn('include posts/includes/paginator.html', labels)
+        self.assertIn('includes/header.html', labels)
+        self.assertIn('post_picture posts/index.html:21', labels)
+
+    def test_profiling_is_inactive_outside_profile(self):
+        self.client.get(reverse('posts:index'))
+        self.assertIsNone(getattr(profiling._local, 'profile', None))
+
+    @override_settings(TEMPLATE_PROFILING=True, PAGE_CACHE_TIMEOUT=0)
+    def test_middleware_reports_server_timing(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertIn('db;desc=', response['Server-Timing'])
+        self.assertIn('desc="posts/index.html x1"', response['Server-Timing'])
+
+
+class CriticalCssTests(SimpleTestCase):
+    css = (
+        '/*! Bootstrap */@charset "UTF-8";:root{--bs-blue:#0d6efd}'
+        'body{margin:0}table{border:0}.btn,.unused{padding:1px}'
+        '.nav-link:hover{color:red}.card .unused{margin:0}'
+        '@media (min-width:768px){.col-md-3{flex:0 0 auto}.row-cols-6{}}'
+        '@keyframes spin{to{transform:rotate(360deg)}}'
+    )
+
+    def test_subset_keeps_only_used_rules(self):
+        subset = critical_css.subset(
+            self.css, {'btn', 'nav-link', 'card', 'col-md-3'}, {'body'})
+        self.assertEqual(
+            subset,
+            ':root{--bs-blue:#0d6efd}body{margin:0}.btn{padding:1px}'
+            '.nav-link:hover{color:red}'
+            '@media (min-width:768px){.col-md-3{flex:0 0 auto}}',
+        )
+
+    def test_template_usage_reads_classes_inside_template_tags(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, 'page.html'), 'w') as page:
+                page.write(
+                    '<ul class="nav {% if a %}active{% endif %}">'
+                    '{{ form.text|addclass:"form-control" }}</ul>'
+                )
+            classes, tags = critical_css.template_usage([directory])
+        self.assertEqual(classes, {'nav', 'active', 'form-control'})
+        self.assertIn('ul', tags)
+
+    def test_base_template_inlines_built_css(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'critical.css')
+            with override_settings(CRITICAL_CSS_PATH=path):
+                response = self.client.get(reverse('about:author'))
+                self.assertContains(response, 'rel="stylesheet"')
+                self.assertNotContains(response, '<style>')
+                with open(path, 'w') as output:
+                    output.write('body{margin:0}')
+                response = self.client.get(reverse('about:author'))
+        self.assertContains(response, '<style>body{margin:0}</style>')
+        self.assertContains(response, 'rel="preload"')
+
+
+class CompressedStaticStorageTests(SimpleTestCase):
+    def test_collectstatic_hashes_and_compresses(self):
+        with tempfile.TemporaryDirectory() as source, \
+                tempfile.TemporaryDirectory() as root:
+            with open(os.path.join(source, 'app.css'), 'w') as css:
+                css.write('.btn{padding:1px}' * 200)
+            with open(os.path.join(source, 'tiny.css'), 'w') as css:
+                css.write('.a{}')
+            with override_settings(
+                STATICFILES_DIRS=[source], STATIC_ROOT=root,
+                INSTALLED_APPS=['django.contrib.staticfiles'],
+            ):
+                call_command('collectstatic', interactive=False, verbosity=0)
+                url = staticfiles_storage.url('app.css')
+                hashed = staticfiles_storage.stored_name('app.css')
+                self.assertRegex(url, r'^/static/app\.[0-9a-f]{12}\.css$')
+                with open(os.path.join(root, hashed), 'rb') as original, \
+                        gzip.open(os.path.join(root, hashed + '.gz')) as gz:
+                    self.assertEqual(gz.read(), original.read())
+                tiny = staticfiles_storage.stored_name('tiny.css')
+                self.assertFalse(
+                    os.path.exists(os.path.join(root, tiny + '.gz')))
+
+    def test_missing_manifest_falls_back_to_plain_names(self):
+        with tempfile.TemporaryDirectory() as root:
+            with override_settings(STATIC_ROOT=root):
+                self.assertEqual(
+                    staticfiles_storage.url('css/bootstrap.min.css'),
+                    '/static/css/bootstrap.min.css',
+                )
+
+
+class MediaServeTests(TestCase):
+    data = bytes(range(256)) * 4
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        os.makedirs(os.path.join(root.name, 'posts'))
+        with open(os.path.join(root.name, 'posts', 'a.jpg'), 'wb') as file:
+            file.write(self.data)
+        settings_override = override_settings(MEDIA_ROOT=root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.root = root.name
+        self.url = settings.MEDIA_URL + 'posts/a.jpg'
+
+    def get(self, **headers):
+        response = self.client.get(self.url, **headers)
+        self.addCleanup(response.close)
+        return response
+
+    def body(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_byte_range(self):
+        for header, expected in (
+            ('bytes=0-9', (0, 9)),
+            ('bytes=10-', (10, 1023)),
+            ('bytes=-100', (924, 1023)),
+            ('bytes=-5000', (0, 1023)),
+            ('bytes=1000-5000', (1000, 1023)),
+            ('bytes=9-0', None),
+            ('bytes=0-1,5-6', None),
+            ('items=0-1', None),
+        ):
+            with self.subTest(header=header):
+                self.assertEqual(media.byte_range(header, 1024), expected)
+        for header in ('bytes=1024-', 'bytes=-0'):
+            with self.subTest(header=header):
+                with self.assertRaises(media.RangeNotSatisfiable):
+                    media.byte_range(header, 1024)
+
+    def test_file_is_streamed_with_validators(self):
+        response = self.get()
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(self.body(response), self.data)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response['Content-Length'], str(len(self.data)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+
+    def test_conditional_requests_get_not_modified(self):
+        first = self.get()
+        for headers in (
+            {'HTTP_IF_NONE_MATCH': first['ETag']},
+            {'HTTP_IF_MODIFIED_SINCE': first['Last-Modified']},
+        ):
+            with self.subTest(headers=headers):
+                response = self.get(**headers)
+                self.assertEqual(
+                    response.status_code, HTTPStatus.NOT_MODIFIED)
+                self.assertEqual(response['ETag'], first['ETag'])
+
+    def test_range_is_served_partially(self):
+        response = self.get(HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, HTTPStatus.PARTIAL_CONTENT)
+        self.assertEqual(self.body(response), self.data[100:200])
+        self.assertEqual(response['Content-Length'], '100')
+        self.assertEqual(response['Content-Range'], 'bytes 100-199/1024')
+        response = self.get(HTTP_RANGE='bytes=-24')
+        self.assertEqual(self.body(response), self.data[-24:])
+
+    def test_range_outside_file_is_not_satisfiable(self):
+        response = self.get(HTTP_RANGE='bytes=2000-')
+        self.assertEqual(
+            response.status_code, HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+        self.assertEqual(response['Content-Range'], 'bytes */1024')
+
+    def test_stale_if_range_returns_whole_file(self):
+        response = self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"old"')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(self.body(response), self.data)
+        etag = response['ETag']
+        response = self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, HTTPStatus.PARTIAL_CONTENT)
+
+    def test_paths_outside_media_root_are_not_found(self):
+        for path in ('../settings.py', 'posts', 'posts/missing.jpg'):
+            with self.subTest(path=path):
+                response = self.client.get(settings.MEDIA_URL + path)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_proxy_headers_replace_body(self):
+        with override_settings(MEDIA_SENDFILE='X-Accel-Redirect'):
+            response = self.get(HTTP_RANGE='bytes=0-9')
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+            self.assertEqual(
+                response['X-Accel-Redirect'], '/protected-media/posts/a.jpg')
+            self.assertEqual(response.content, b'')
+        with override_settings(MEDIA_SENDFILE='X-Sendfile'):
+            response = self.get()
+            self.assertEqual(
+                response['X-Sendfile'],
+                os.path.join(self.root, 'posts', 'a.jpg'))
+
+
+class RateLimitTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def take(self, now, name='user:1'):
+        with mock.patch('time.time', return_value=now):
+            return ratelimit.take(name, rate=2, burst=3)
+
+    def test_bucket_allows_burst_then_refills(self):
+        self.assertEqual([self.take(100) for _ in range(3)], [0, 0, 0])
+        self.assertEqual(self.take(100), 0.5)
+        self.assertEqual(self.take(100.5), 0)
+        self.assertEqual(self.take(100.5), 0.5)
+        self.assertEqual(self.take(100, name='user:2'), 0)
+
+    def test_idle_bucket_does_not_exceed_burst(self):
+        self.take(100)
+        self.assertEqual([self.take(200) for _ in range(4)], [0, 0, 0, 0.5])
+
+    def test_sustained_load_does_not_refill_bucket_on_expiry(self):
+        """Под постоянной нагрузкой ключи корзины не истекают"""
+        granted = [self.take(100 + step / 4) for step in range(80)]
+        # 3 токена сразу и по 2 в секунду за 19.75 с.
+        self.assertEqual(granted.count(0), 3 + 39)
+
+    def test_concurrent_takes_do_not_exceed_burst(self):
+        granted = []
+
+        def take():
+            granted.append(ratelimit.take('shared', rate=0.001, burst=5))
+
+        take()
+        threads = [threading.Thread(target=take) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(granted.count(0), 5)
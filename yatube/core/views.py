@@ -1,3 +1,5 @@
+import math
+
 from django.shortcuts import render
 
 
@@ -15,3 +17,9 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+def too_many_requests(request, retry_after):
+    response = render(request, 'core/429.html', status=429)
+    response['Retry-After'] = math.ceil(retry_after)
+    return response
@@ -0,0 +1,153 @@
+"""JSON-версии лент для клиентов, которые опрашивают сайт.
+
+Ответ снабжается ETag и Last-Modified, собранными из даты свежего поста
+и версий областей feed_cache. Если лента не менялась, condition()
+отвечает 304 до того, как выполнится основной запрос.
+"""
+import hashlib
+from datetime import datetime
+from functools import wraps
+
+from django.db.models import Max
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from . import feed_cache, follow_graph, timeline
+from .models import Group, Post
+from .pagination import CursorPaginator
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 100
+POST_FIELDS = (
+    'id', 'text', 'pub_date', 'image', 'comments_count',
+    'author', 'group', 'author__username', 'group__slug',
+)
+
+
+def newest_pub_date(posts):
+    return posts.order_by().aggregate(newest=Max('pub_date'))['newest']
+
+
+def page_limit(request):
+    try:
+        limit = int(request.GET.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        return DEFAULT_LIMIT
+    return min(max(limit, 1), MAX_LIMIT)
+
+
+def serialize(post):
+    return {
+        'id': post.pk,
+        'author': post.author.username,
+        'group': post.group.slug if post.group_id else None,
+        'text': post.text,
+        'pub_date': post.pub_date.isoformat(),
+        'image': post.image.url if post.image else None,
+        'comments': post.comments_count,
+    }
+
+
+class FeedState:
+    """Метаданные ленты, общие для проверки условий и самого ответа."""
+
+    def __init__(self, request, posts, scopes, newest):
+        self.request = request
+        self.posts = posts
+        self.cursor = request.GET.get('cursor') or None
+        self.limit = page_limit(request)
+        # Число комментариев меняется без смены областей самих лент.
+        versions, modified = feed_cache.snapshot(
+            feed_cache.with_comments(scopes))
+        self.last_modified = newest
+        if modified is not None:
+            changed = datetime.fromtimestamp(modified, timezone.utc)
+            if newest is None or changed > newest:
+                self.last_modified = changed
+        raw = '|'.join([
+            newest.isoformat() if newest else '',
+            *(f'{scope}={versions[scope]}' for scope in sorted(versions)),
+            self.cursor or '',
+            str(self.limit),
+        ])
+        self.etag = hashlib.md5(raw.encode()).hexdigest()
+
+    def response(self):
+        posts = self.posts.select_related('author', 'group').only(
+            *POST_FIELDS)
+        page = CursorPaginator(posts, self.limit).get_page(self.cursor)
+        response = JsonResponse(
+            {
+                'results': [serialize(post) for post in page],
+                'next': page.next_cursor,
+                'previous': page.previous_cursor,
+            },
+            json_dumps_params={'separators': (',', ':')},
+        )
+        patch_cache_control(response, no_cache=True)
+        return response
+
+
+def feed_view(get_feed):
+    """Превращает get_feed(request, **kwargs) в JSON-ленту с 304.
+
+    get_feed возвращает queryset постов, области feed_cache, от которых
+    зависит лента, и дату свежего поста.
+    """
+    def state(request, kwargs):
+        if not hasattr(request, 'feed_state'):
+            request.feed_state = FeedState(request, *get_feed(
+                request, **kwargs))
+        return request.feed_state
+
+    @wraps(get_feed)
+    @condition(
+        etag_func=lambda request, **kwargs: state(request, kwargs).etag,
+        last_modified_func=lambda request, **kwargs: (
+            state(request, kwargs).last_modified
+        ),
+    )
+    def view(request, **kwargs):
+        return state(request, kwargs).response()
+    return view
+
+
+def api_login_required(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse(
+                {'detail': 'Authentication required.'}, status=401
+            )
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+@feed_view
+def index(request):
+    posts = Post.objects.all()
+    return posts, ['index'], newest_pub_date(posts)
+
+
+@feed_view
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    posts = Post.objects.filter(group=group)
+    return posts, [f'group:{group.pk}'], newest_pub_date(posts)
+
+
+@api_login_required
+@feed_view
+def follow_index(request):
+    authors = sorted(follow_graph.following(request.user.pk))
+    return (
+        timeline.feed(request.user),
+        [
+            f'following:{request.user.pk}',
+            *(f'profile:{author_id}' for author_id in authors),
+        ],
+        newest_pub_date(Post.objects.filter(author_id__in=authors)),
+    )
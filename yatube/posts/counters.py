@@ -0,0 +1,132 @@
+"""Денормализованные счётчики постов, комментариев и подписок.
+
+Счётчики меняются атомарно через F-выражения в обработчиках сигналов,
+а reconcile_counters пересчитывает их пачками, если они разошлись.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+BATCH_SIZE = 1000
+
+
+def count_subquery(model, field):
+    counted = (
+        model.objects.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(
+        Subquery(counted, output_field=IntegerField()), Value(0)
+    )
+
+
+def _adjust(model, pk, field, delta):
+    lookup = {'pk': pk}
+    if delta < 0:
+        lookup[f'{field}__gte'] = -delta
+    return model.objects.filter(**lookup).update(
+        **{field: F(field) + delta}
+    )
+
+
+def compute_user_stats(user_id):
+    return {
+        'posts_count': Post.objects.filter(author_id=user_id).count(),
+        'followers_count': Follow.objects.filter(author_id=user_id).count(),
+        'following_count': Follow.objects.filter(user_id=user_id).count(),
+    }
+
+
+def user_stats(user):
+    try:
+        return user.stats
+    except UserStats.DoesNotExist:
+        pass
+    try:
+        with transaction.atomic():
+            stats = UserStats.objects.create(
+                user=user, **compute_user_stats(user.pk)
+            )
+    except IntegrityError:
+        stats = UserStats.objects.get(user=user)
+    user.stats = stats
+    return stats
+
+
+def adjust_user(user_id, field, delta):
+    if _adjust(UserStats, user_id, field, delta) or delta < 0:
+        return
+    # Строки ещё нет: создаём её пересчётом, который уже учитывает
+    # только что сохранённый объект.
+    try:
+        with transaction.atomic():
+            UserStats.objects.create(
+                user_id=user_id, **compute_user_stats(user_id)
+            )
+    except IntegrityError:
+        _adjust(UserStats, user_id, field, delta)
+
+
+def adjust_group(group_id, delta):
+    if group_id is not None:
+        _adjust(Group, group_id, 'posts_count', delta)
+
+
+def adjust_post(post_id, delta):
+    _adjust(Post, post_id, 'comments_count', delta)
+
+
+def _reconcile(queryset, fields, batch_size):
+    """Пересчитывает поля пачками по pk, записывая только расхождения."""
+    queryset = queryset.annotate(**{
+        f'actual_{field}': expression
+        for field, expression in fields.items()
+    }).order_by('pk')
+    fixed = []
+    last_pk = None
+    while True:
+        batch = queryset
+        if last_pk is not None:
+            batch = batch.filter(pk__gt=last_pk)
+        batch = list(batch[:batch_size])
+        if not batch:
+            return fixed
+        last_pk = batch[-1].pk
+        drifted = [
+            obj for obj in batch
+            if any(
+                getattr(obj, field) != getattr(obj, f'actual_{field}')
+                for field in fields
+            )
+        ]
+        for obj in drifted:
+            for field in fields:
+                setattr(obj, field, getattr(obj, f'actual_{field}'))
+        queryset.model.objects.bulk_update(drifted, list(fields))
+        fixed.extend(drifted)
+
+
+def reconcile(batch_size=BATCH_SIZE):
+    missing = User.objects.filter(stats__isnull=True).values_list(
+        'pk', flat=True)
+    UserStats.objects.bulk_create(
+        UserStats(user_id=pk) for pk in missing.iterator()
+    )
+    return {
+        'users': len(_reconcile(UserStats.objects.all(), {
+            'posts_count': count_subquery(Post, 'author'),
+            'followers_count': count_subquery(Follow, 'author'),
+            'following_count': count_subquery(Follow, 'user'),
+        }, batch_size)),
+        'groups': len(_reconcile(Group.objects.all(), {
+            'posts_count': count_subquery(Post, 'group'),
+        }, batch_size)),
+        'posts': len(_reconcile(Post.objects.all(), {
+            'comments_count': count_subquery(Comment, 'post'),
+        }, batch_size)),
+    }
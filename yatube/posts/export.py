@@ -0,0 +1,116 @@
+"""Потоковая выгрузка групп, постов, комментариев и подписок.
+
+Строки читаются через values_list(...).iterator(), сериализуются по одной
+и отдаются генератором, поэтому расход памяти не зависит от размера
+таблиц. Авторы и группы выгружаются по username и slug, чтобы файл можно
+было загрузить обратно командой import.
+"""
+import csv
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Comment, Follow, Group, Post
+
+CHUNK_SIZE = 2000
+BUFFER_SIZE = 64 * 1024
+FORMATS = ('ndjson', 'csv')
+EXPORTS = {
+    'groups': (Group, (
+        ('id', 'id'),
+        ('title', 'title'),
+        ('slug', 'slug'),
+        ('description', 'description'),
+    )),
+    'posts': (Post, (
+        ('id', 'id'),
+        ('author', 'author__username'),
+        ('group', 'group__slug'),
+        ('pub_date', 'pub_date'),
+        ('text', 'text'),
+        ('image', 'image'),
+    )),
+    'comments': (Comment, (
+        ('id', 'id'),
+        ('post', 'post_id'),
+        ('author', 'author__username'),
+        ('created', 'created'),
+        ('text', 'text'),
+    )),
+    'follows': (Follow, (
+        ('user', 'user__username'),
+        ('author', 'author__username'),
+    )),
+}
+
+
+def columns(name):
+    return [column for column, _ in EXPORTS[name][1]]
+
+
+def rows(name, chunk_size=CHUNK_SIZE):
+    model, fields = EXPORTS[name]
+    return (
+        model.objects.order_by('pk')
+        .values_list(*(lookup for _, lookup in fields))
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def ndjson_lines(name, chunk_size=CHUNK_SIZE):
+    encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    keys = columns(name)
+    for row in rows(name, chunk_size):
+        yield encoder.encode(dict(zip(keys, row))) + '\n'
+
+
+class Echo:
+    """Файлоподобный объект для csv.writer: возвращает строку, а не пишет."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(name, chunk_size=CHUNK_SIZE):
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns(name))
+    for row in rows(name, chunk_size):
+        yield writer.writerow([
+            value.isoformat() if hasattr(value, 'isoformat') else value
+            for value in row
+        ])
+
+
+def gzipped(chunks):
+    # wbits=31 — формат gzip, а не «голый» zlib.
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def buffered(chunks, size=BUFFER_SIZE):
+    buffer = []
+    length = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield b''.join(buffer)
+            buffer = []
+            length = 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def stream(name, fmt='ndjson', compress=False, chunk_size=CHUNK_SIZE):
+    """Байтовые куски выгрузки в формате fmt, при желании в gzip."""
+    lines = ndjson_lines if fmt == 'ndjson' else csv_lines
+    chunks = buffered(line.encode() for line in lines(name, chunk_size))
+    return gzipped(chunks) if compress else chunks
+
+
+def filename(name, fmt='ndjson', compress=False):
+    return f'{name}.{fmt}' + ('.gz' if compress else '')
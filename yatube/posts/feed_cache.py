@@ -0,0 +1,128 @@
+"""Версионируемый кэш фрагментов лент.
+
+Ключ фрагмента содержит версию области (лента, группа, профиль) и
+полный путь запроса с ?page=/?cursor=. Сигналы моделей увеличивают
+версию затронутых областей, поэтому фрагменты живут долго и при этом
+не отдают устаревшее содержимое.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+VERSION_KEY = 'feed:version:{scope}'
+MODIFIED_KEY = 'feed:modified:{scope}'
+FRAGMENT_KEY = 'feed:fragment:{scope}:{version}:{path}'
+COMMENTS_SCOPE = 'comments:{scope}'
+HITS_KEY = 'feed:hits'
+MISSES_KEY = 'feed:misses'
+
+
+def _new_version():
+    return int(time.time() * 1000)
+
+
+def version(scope):
+    return cache.get_or_set(
+        VERSION_KEY.format(scope=scope), _new_version, None
+    )
+
+
+def bump(*scopes):
+    scopes = set(scopes)
+    for scope in scopes:
+        key = VERSION_KEY.format(scope=scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _new_version(), None)
+    now = time.time()
+    cache.set_many(
+        {MODIFIED_KEY.format(scope=scope): now for scope in scopes}, None
+    )
+
+
+def snapshot(scopes):
+    """Версии областей и время последнего изменения любой из них."""
+    keys = {
+        scope: (
+            VERSION_KEY.format(scope=scope),
+            MODIFIED_KEY.format(scope=scope),
+        )
+        for scope in scopes
+    }
+    found = cache.get_many([key for pair in keys.values() for key in pair])
+    versions = {}
+    modified = None
+    for scope, (version_key, modified_key) in keys.items():
+        versions[scope] = found.get(version_key) or version(scope)
+        stamp = found.get(modified_key)
+        if stamp is not None and (modified is None or stamp > modified):
+            modified = stamp
+    return versions, modified
+
+
+def post_scopes(post, *group_ids):
+    group_ids = {post.group_id, *group_ids} - {None}
+    return (
+        'index',
+        f'post:{post.pk}',
+        f'profile:{post.author_id}',
+        *(f'group:{group_id}' for group_id in group_ids),
+    )
+
+
+def comment_scopes(post):
+    """Области, которые меняет комментарий к post.
+
+    HTML-ленты комментариев не показывают, поэтому сбрасывается только
+    страница поста. Число комментариев есть в JSON-лентах: они зависят
+    ещё и от областей comments:<лента> (with_comments).
+    """
+    own = f'post:{post.pk}'
+    return (own, *(
+        COMMENTS_SCOPE.format(scope=scope)
+        for scope in post_scopes(post) if scope != own
+    ))
+
+
+def with_comments(scopes):
+    """scopes вместе с областями комментариев к их постам."""
+    return [
+        *scopes, *(COMMENTS_SCOPE.format(scope=scope) for scope in scopes)
+    ]
+
+
+def fragment_key(scope, path):
+    return FRAGMENT_KEY.format(
+        scope=scope,
+        version=version(scope),
+        path=hashlib.md5(path.encode()).hexdigest(),
+    )
+
+
+def _count(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+def get_fragment(key):
+    fragment = cache.get(key)
+    _count(MISSES_KEY if fragment is None else HITS_KEY)
+    return fragment
+
+
+def set_fragment(key, fragment):
+    cache.set(key, fragment, settings.FEED_CACHE_TIMEOUT)
+
+
+def stats():
+    counters = cache.get_many([HITS_KEY, MISSES_KEY])
+    return {
+        'hits': counters.get(HITS_KEY, 0),
+        'misses': counters.get(MISSES_KEY, 0),
+    }
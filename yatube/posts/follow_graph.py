@@ -0,0 +1,86 @@
+"""Кэш графа подписок.
+
+Для каждого пользователя в кэше лежит множество id авторов, на которых
+он подписан, а для автора — число подписчиков. Проверка «подписан ли я»
+и пакетная проверка для целой страницы постов обходятся без запросов к
+БД. Сигналы Follow сбрасывают записи обоих участников подписки.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from .models import Follow
+
+FOLLOWING_KEY = 'follow:following:{user_id}'
+FOLLOWERS_KEY = 'follow:followers:{author_id}'
+
+
+def following(user_id):
+    """Множество id авторов, на которых подписан пользователь."""
+    key = FOLLOWING_KEY.format(user_id=user_id)
+    authors = cache.get(key)
+    if authors is None:
+        authors = frozenset(
+            Follow.objects.filter(user_id=user_id)
+            .values_list('author_id', flat=True)
+        )
+        cache.set(key, authors, settings.FOLLOW_CACHE_TIMEOUT)
+    return authors
+
+
+def is_following(user, author_id):
+    if not user.is_authenticated:
+        return False
+    return author_id in following(user.pk)
+
+
+def following_many(user, author_ids):
+    """Словарь author_id -> подписан ли user, за одно обращение к кэшу."""
+    authors = following(user.pk) if user.is_authenticated else frozenset()
+    return {author_id: author_id in authors for author_id in author_ids}
+
+
+def followers_counts(author_ids):
+    keys = {
+        FOLLOWERS_KEY.format(author_id=author_id): author_id
+        for author_id in set(author_ids)
+    }
+    cached = cache.get_many(keys)
+    counts = {keys[key]: count for key, count in cached.items()}
+    missing = set(keys.values()) - set(counts)
+    if missing:
+        found = dict(
+            Follow.objects.filter(author_id__in=missing)
+            .values('author_id')
+            .annotate(count=Count('pk'))
+            .values_list('author_id', 'count')
+        )
+        fresh = {author_id: found.get(author_id, 0) for author_id in missing}
+        cache.set_many(
+            {
+                FOLLOWERS_KEY.format(author_id=author_id): count
+                for author_id, count in fresh.items()
+            },
+            settings.FOLLOW_CACHE_TIMEOUT,
+        )
+        counts.update(fresh)
+    return counts
+
+
+def followers_count(author_id):
+    return followers_counts([author_id])[author_id]
+
+
+def invalidate(user_id, author_id):
+    invalidate_many([(user_id, author_id)])
+
+
+def invalidate_many(follows):
+    """Сбрасывает кэш для пар (user_id, author_id), например после
+    bulk_create, который не отправляет сигналов."""
+    keys = set()
+    for user_id, author_id in follows:
+        keys.add(FOLLOWING_KEY.format(user_id=user_id))
+        keys.add(FOLLOWERS_KEY.format(author_id=author_id))
+    if keys:
+        cache.delete_many(list(keys))
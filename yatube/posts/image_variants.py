@@ -0,0 +1,152 @@
+"""Варианты картинок постов разной ширины для srcset.
+
+build() вызывается из пула миниатюр (posts.thumbnails) после сохранения
+поста: картинка обрезается до пропорций ленты (POST_IMAGE_VARIANT_RATIO)
+и сохраняется в ширинах POST_IMAGE_VARIANT_WIDTHS в WebP, если Pillow
+собран с его поддержкой, и в JPEG. Размеры записываются в
+PostImageVariant, поэтому шаблонам не нужно открывать файлы, а набор
+вариантов страницы читается одним запросом и кэшируется.
+"""
+import hashlib
+from collections import namedtuple
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, features
+
+from . import feed_cache
+from .models import Post, PostImageVariant
+
+VARIANTS_KEY = 'variants:{name}'
+MISSING_TIMEOUT = 60
+
+Variant = namedtuple('Variant', 'url width height')
+
+
+def formats():
+    if features.check('webp'):
+        return (PostImageVariant.WEBP, PostImageVariant.JPEG)
+    return (PostImageVariant.JPEG,)
+
+
+def _key(name):
+    return VARIANTS_KEY.format(name=hashlib.md5(name.encode()).hexdigest())
+
+
+def target_sizes(source_width, source_height):
+    """[(ширина, высота)] без увеличения исходной картинки."""
+    ratio_width, ratio_height = settings.POST_IMAGE_VARIANT_RATIO
+    largest = min(
+        source_width, source_height * ratio_width // ratio_height
+    )
+    widths = [
+        width for width in settings.POST_IMAGE_VARIANT_WIDTHS
+        if width <= largest
+    ] or [largest]
+    return [
+        (width, max(1, round(width * ratio_height / ratio_width)))
+        for width in widths
+    ]
+
+
+def _encode(image, fmt):
+    output = BytesIO()
+    if fmt == PostImageVariant.WEBP:
+        image.save(output, 'WEBP', quality=settings.POST_IMAGE_QUALITY,
+                   method=4)
+    else:
+        if image.mode == 'RGBA':
+            background = Image.new('RGB', image.size, 'white')
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        image.save(
+            output, 'JPEG', quality=settings.POST_IMAGE_QUALITY,
+            optimize=True, progressive=True,
+        )
+    return output.getvalue()
+
+
+def build(name):
+    """Создаёт недостающие варианты картинки name."""
+    try:
+        if not name or not default_storage.exists(name):
+            return []
+    except SuspiciousFileOperation:
+        # Путь вне MEDIA_ROOT: вариантов для такого файла не строим.
+        return []
+    existing = set(
+        PostImageVariant.objects.filter(source=name)
+        .values_list('format', 'width')
+    )
+    with default_storage.open(name) as source:
+        image = Image.open(source)
+        sizes = target_sizes(image.width, image.height)
+        todo = [
+            (fmt, size) for fmt in formats() for size in sizes
+            if (fmt, size[0]) not in existing
+        ]
+        if not todo:
+            return []
+        largest = max(width for width, _ in sizes)
+        image.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info
+                                  else 'RGB')
+        stem = name.rsplit('/', 1)[-1].rsplit('.', 1)[0]
+        variants = []
+        for fmt, (width, height) in todo:
+            resized = ImageOps.fit(image, (width, height), Image.LANCZOS)
+            file_name = default_storage.save(
+                f'posts/variants/{stem}_{width}.{fmt}',
+                ContentFile(_encode(resized, fmt)),
+            )
+            variants.append(PostImageVariant(
+                source=name, format=fmt, width=width, height=height,
+                file=file_name,
+            ))
+    PostImageVariant.objects.bulk_create(variants, ignore_conflicts=True)
+    cache.delete(_key(name))
+    # Страницы, уже отрисованные с одной миниатюрой, строятся заново.
+    for post in Post.objects.filter(image=name).only(
+            'pk', 'author_id', 'group_id'):
+        feed_cache.bump(*feed_cache.post_scopes(post))
+    return variants
+
+
+def built(name):
+    return PostImageVariant.objects.filter(source=name).exists()
+
+
+def lookup(names):
+    """{имя: {формат: [Variant по возрастанию ширины]}} для names."""
+    names = {name for name in names if name}
+    if not names:
+        return {}
+    keys = {_key(name): name for name in names}
+    found = {
+        keys[key]: value for key, value in cache.get_many(keys).items()
+    }
+    missing = names - set(found)
+    if missing:
+        loaded = {name: {} for name in missing}
+        for variant in PostImageVariant.objects.filter(
+            source__in=missing
+        ).order_by('width'):
+            loaded[variant.source].setdefault(variant.format, []).append(
+                Variant(variant.file.url, variant.width, variant.height)
+            )
+        # Пустой результат живёт недолго: варианты вот-вот появятся.
+        for timeout, cached in (
+            (settings.FEED_CACHE_TIMEOUT, True), (MISSING_TIMEOUT, False)
+        ):
+            cache.set_many({
+                _key(name): value for name, value in loaded.items()
+                if bool(value) is cached
+            }, timeout)
+        found.update(loaded)
+    return found
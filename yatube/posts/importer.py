@@ -0,0 +1,259 @@
+"""Массовая загрузка групп, постов, комментариев и подписок.
+
+Читает файлы в формате posts.export (NDJSON или CSV, при желании gzip).
+Авторы и группы сопоставляются через словари username -> id и
+slug -> id в памяти, строки вставляются bulk_create пачками, каждая в
+своей транзакции. bulk_create не шлёт сигналов, поэтому счётчики,
+ленты, поисковый индекс и версии кэша обновляются один раз в finish().
+"""
+import csv
+import gzip
+import io
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.db import without_auto_now
+
+from . import (counters, feed_cache, follow_graph, search, timeline,
+               uploads)
+from .models import Comment, Follow, Group, Post, User
+
+BATCH_SIZE = 1000
+TABLES = ('groups', 'posts', 'comments', 'follows')
+FORMATS = ('ndjson', 'csv')
+
+
+def detect(path):
+    """Таблица и формат по имени файла вида posts.ndjson.gz."""
+    parts = os.path.basename(path).split('.')
+    name = parts[0]
+    fmt = next((part for part in parts[1:] if part in FORMATS), None)
+    return name, fmt
+
+
+def read_rows(source, fmt):
+    """Словари строк из байтового потока; gzip распознаётся сам."""
+    source = io.BufferedReader(source) if not hasattr(
+        source, 'peek') else source
+    if source.peek(2)[:2] == b'\x1f\x8b':
+        source = gzip.GzipFile(fileobj=source)
+    text = io.TextIOWrapper(source, encoding='utf-8', newline='')
+    if fmt == 'csv':
+        yield from csv.DictReader(text)
+        return
+    for line in text:
+        if line.strip():
+            yield json.loads(line)
+
+
+def batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def parse_date(value):
+    if not value:
+        return timezone.now()
+    return parse_datetime(value) or timezone.now()
+
+
+def bulk_create_ids(model, objects):
+    """bulk_create, возвращающий pk новых строк в порядке вставки.
+
+    SQLite не сообщает pk после bulk_create, поэтому они читаются по
+    возрастанию pk; в пределах транзакции других вставок быть не может.
+    """
+    last_pk = model.objects.order_by('-pk').values_list(
+        'pk', flat=True).first() or 0
+    created = model.objects.bulk_create(objects)
+    if all(obj.pk is not None for obj in created):
+        return [obj.pk for obj in created]
+    return list(
+        model.objects.filter(pk__gt=last_pk)
+        .order_by('pk').values_list('pk', flat=True)
+    )
+
+
+class Importer:
+    def __init__(self, batch_size=BATCH_SIZE, images=None, workers=4):
+        self.batch_size = batch_size
+        self.images = images
+        self.workers = workers
+        self.users = dict(User.objects.values_list('username', 'id'))
+        self.groups = dict(Group.objects.values_list('slug', 'id'))
+        self.post_ids = {}
+        self.indexed_posts = set()
+        self.scopes = set()
+        self.imported = dict.fromkeys(TABLES, 0)
+        self.skipped = dict.fromkeys(TABLES, 0)
+
+    def load(self, name, rows):
+        handler = getattr(self, f'import_{name}')
+        for batch in batches(rows, self.batch_size):
+            with transaction.atomic():
+                self.imported[name] += handler(batch)
+        return self.imported[name]
+
+    def user_ids(self, usernames):
+        missing = {name for name in usernames if name} - set(self.users)
+        if missing:
+            User.objects.bulk_create(
+                User(username=username, password='!')
+                for username in missing
+            )
+            self.users.update(
+                User.objects.filter(username__in=missing)
+                .values_list('username', 'id')
+            )
+        return self.users
+
+    def group_ids(self, slugs):
+        missing = {slug for slug in slugs if slug} - set(self.groups)
+        if missing:
+            Group.objects.bulk_create(
+                Group(title=slug, slug=slug, description='')
+                for slug in missing
+            )
+            self.groups.update(
+                Group.objects.filter(slug__in=missing)
+                .values_list('slug', 'id')
+            )
+        return self.groups
+
+    def import_groups(self, rows):
+        new = {}
+        for row in rows:
+            if row['slug'] not in self.groups:
+                new[row['slug']] = Group(
+                    title=row.get('title') or row['slug'],
+                    slug=row['slug'],
+                    description=row.get('description') or '',
+                )
+        self.skipped['groups'] += len(rows) - len(new)
+        Group.objects.bulk_create(new.values())
+        self.groups.update(
+            Group.objects.filter(slug__in=new).values_list('slug', 'id')
+        )
+        return len(new)
+
+    def ingest_image(self, name):
+        # Имя приходит из выгрузки: пути вида ../../settings.py и
+        # абсолютные пути за пределы каталога картинок не читаются.
+        root = os.path.realpath(self.images)
+        path = os.path.realpath(os.path.join(root, os.path.normpath(name)))
+        if os.path.commonpath((root, path)) != root:
+            return ''
+        if not os.path.isfile(path):
+            return ''
+        with open(path, 'rb') as image:
+            try:
+                return uploads.store(File(image))
+            except ValidationError:
+                return ''
+
+    def image_names(self, rows):
+        names = [row.get('image') or '' for row in rows]
+        if not self.images:
+            return names
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return list(pool.map(
+                lambda name: self.ingest_image(name) if name else '', names
+            ))
+
+    def import_posts(self, rows):
+        known = [row for row in rows if row.get('author')]
+        self.skipped['posts'] += len(rows) - len(known)
+        rows = known
+        users = self.user_ids(row['author'] for row in rows)
+        groups = self.group_ids(row.get('group') for row in rows)
+        posts = [
+            Post(
+                author_id=users[row['author']],
+                group_id=groups.get(row.get('group')),
+                text=row['text'],
+                pub_date=parse_date(row.get('pub_date')),
+                image=image,
+            )
+            for row, image in zip(rows, self.image_names(rows))
+        ]
+        with without_auto_now(Post, 'pub_date'):
+            ids = bulk_create_ids(Post, posts)
+        for row, post, pk in zip(rows, posts, ids):
+            if row.get('id') not in (None, ''):
+                self.post_ids[str(row['id'])] = pk
+            self.indexed_posts.add(pk)
+            post.pk = pk
+            self.scopes.update(feed_cache.post_scopes(post))
+        return len(posts)
+
+    def import_comments(self, rows):
+        known = [
+            row for row in rows
+            if row.get('author') and str(row['post']) in self.post_ids
+        ]
+        self.skipped['comments'] += len(rows) - len(known)
+        rows = known
+        users = self.user_ids(row['author'] for row in rows)
+        comments = [
+            Comment(
+                post_id=self.post_ids[str(row['post'])],
+                author_id=users[row['author']],
+                text=row['text'],
+                created=parse_date(row.get('created')),
+            )
+            for row in rows
+        ]
+        with without_auto_now(Comment, 'created'):
+            Comment.objects.bulk_create(comments)
+        self.indexed_posts.update(comment.post_id for comment in comments)
+        self.scopes.update(f'post:{comment.post_id}' for comment in comments)
+        return len(comments)
+
+    def import_follows(self, rows):
+        users = self.user_ids(
+            name for row in rows
+            for name in (row.get('user'), row.get('author'))
+        )
+        follows = [
+            Follow(user_id=users[row['user']], author_id=users[row['author']])
+            for row in rows
+            if row.get('user') and row.get('author')
+            and row['user'] != row['author']
+        ]
+        self.skipped['follows'] += len(rows) - len(follows)
+        Follow.objects.bulk_create(follows, ignore_conflicts=True)
+        follow_graph.invalidate_many(
+            (follow.user_id, follow.author_id) for follow in follows
+        )
+        for follow in follows:
+            self.scopes.update((
+                f'following:{follow.user_id}',
+                f'profile:{follow.user_id}',
+                f'profile:{follow.author_id}',
+            ))
+        return len(follows)
+
+    def finish(self):
+        """Однократно обновляет всё, что при save() делают сигналы."""
+        with transaction.atomic():
+            counters.reconcile()
+            if self.imported['posts'] or self.imported['follows']:
+                timeline.rebuild()
+            for batch in batches(
+                sorted(self.indexed_posts), search.BATCH_SIZE
+            ):
+                search.index_posts(batch)
+        feed_cache.bump('index', *self.scopes)
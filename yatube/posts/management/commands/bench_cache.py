@@ -0,0 +1,60 @@
+import os
+import random
+import tempfile
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from core.cache import SQLiteCache
+from posts.benchmarks import measure, summary
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает задержки LocMemCache и общего SQLiteCache на '
+        'фрагментах размером с кэшированную страницу ленты.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keys', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=5000)
+        parser.add_argument(
+            '--value-size', type=int, default=20 * 1024,
+            help='Размер значения в байтах.',
+        )
+
+    def handle(self, *args, **options):
+        fragment = '<article>пост</article>' * (
+            options['value_size'] // 40 + 1)
+        params = {'OPTIONS': {'MAX_ENTRIES': options['keys'] * 2}}
+        with tempfile.TemporaryDirectory() as directory:
+            backends = {
+                'locmem': LocMemCache('bench', params),
+                'sqlite': SQLiteCache(
+                    os.path.join(directory, 'cache.sqlite3'), params
+                ),
+            }
+            self.stdout.write(
+                f'{"backend":<10}{"operation":<12}'
+                f'{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}'
+            )
+            for name, backend in backends.items():
+                self.run(name, backend, fragment, options)
+
+    def run(self, name, backend, fragment, options):
+        keys = [f'fragment:{number}' for number in range(options['keys'])]
+        backend.set_many({key: fragment for key in keys}, None)
+        backend.set('counter', 0, None)
+        rng = random.Random(42)
+        operations = {
+            'get hit': lambda: backend.get(rng.choice(keys)),
+            'get miss': lambda: backend.get('missing'),
+            'set': lambda: backend.set(rng.choice(keys), fragment, None),
+            'incr': lambda: backend.incr('counter'),
+        }
+        for operation, func in operations.items():
+            stats = summary(measure(func, options['repeat']))
+            self.stdout.write(
+                f'{name:<10}{operation:<12}{stats["p50"]:>10.3f}'
+                f'{stats["p95"]:>10.3f}{stats["p99"]:>10.3f}'
+            )
@@ -0,0 +1,135 @@
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.db.models import Sum
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from posts.benchmarks import summary
+from posts.models import Comment, Post, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест комментариев: потоки без пауз комментируют '
+        'несколько популярных постов. Сравнивает запись по одному и '
+        'пачками (COMMENT_BATCH_WINDOW). Работает на временной БД.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=16)
+        parser.add_argument('--posts', type=int, default=3)
+        parser.add_argument('--duration', type=float, default=10)
+        parser.add_argument(
+            '--batch-ms', type=float, nargs='+', default=[0, 20],
+            help='Окна пачки в мс; 0 — запись каждого комментария сразу.',
+        )
+        parser.add_argument(
+            '--rate', type=float, default=0,
+            help='COMMENT_RATE на пользователя; 0 — без ограничения.',
+        )
+        parser.add_argument('--burst', type=int, default=10)
+
+    def handle(self, *args, **options):
+        settings_dict = connections.databases['default']
+        old_name = settings_dict['NAME']
+        self.stdout.write(
+            f'{"batch ms":>8}{"comments":>10}{"per s":>9}{"p50 ms":>9}'
+            f'{"p95 ms":>9}{"p99 ms":>9}{"429":>7}{"errors":>8}'
+        )
+        for window in options['batch_ms']:
+            overrides = {
+                'COMMENT_BATCH_WINDOW': window / 1000,
+                'COMMENT_RATE': options['rate'],
+                'COMMENT_BURST': options['burst'],
+            }
+            with tempfile.TemporaryDirectory() as directory, \
+                    override_settings(**overrides):
+                connection.close()
+                settings_dict['NAME'] = os.path.join(
+                    directory, 'comments.sqlite3')
+                try:
+                    call_command('migrate', verbosity=0)
+                    cache.clear()
+                    self.run(options)
+                    self.report(window, options['duration'])
+                finally:
+                    connection.close()
+                    settings_dict['NAME'] = old_name
+
+    def run(self, options):
+        author = User.objects.create(username='bench_author')
+        self.post_ids = [
+            Post.objects.create(author=author, text='Популярный пост').pk
+            for _ in range(options['posts'])
+        ]
+        users = [
+            User.objects.create(username=f'bench_{number}')
+            for number in range(options['writers'])
+        ]
+        self.deadline = time.monotonic() + options['duration']
+        self.timings = []
+        self.outcomes = Counter()
+        self.lock = threading.Lock()
+        threads = [
+            threading.Thread(target=self.writer, args=(user,))
+            for user in users
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def writer(self, user):
+        client = Client()
+        client.force_login(user)
+        number = 0
+        try:
+            while time.monotonic() < self.deadline:
+                post_id = self.post_ids[number % len(self.post_ids)]
+                number += 1
+                started = time.perf_counter()
+                try:
+                    response = client.post(
+                        reverse('posts:add_comment', args=[post_id]),
+                        {'text': f'Комментарий {number}'},
+                    )
+                    outcome = response.status_code
+                except Exception as error:
+                    outcome = type(error).__name__
+                elapsed = (time.perf_counter() - started) * 1000
+                with self.lock:
+                    self.outcomes[outcome] += 1
+                    if outcome == 302:
+                        self.timings.append(elapsed)
+        finally:
+            connection.close()
+
+    def report(self, window, duration):
+        saved = Comment.objects.count()
+        counted = Post.objects.aggregate(
+            total=Sum('comments_count'))['total']
+        stats = summary(self.timings) if self.timings else {
+            'p50': 0, 'p95': 0, 'p99': 0}
+        errors = sum(
+            count for outcome, count in self.outcomes.items()
+            if outcome not in (302, 429)
+        )
+        self.stdout.write(
+            f'{window:>8g}{saved:>10}{saved / duration:>9.1f}'
+            f'{stats["p50"]:>9.1f}{stats["p95"]:>9.1f}{stats["p99"]:>9.1f}'
+            f'{self.outcomes[429]:>7}{errors:>8}'
+        )
+        if saved != self.outcomes[302] or counted != saved:
+            self.stderr.write(
+                f'  mismatch: {self.outcomes[302]} accepted, {saved} saved, '
+                f'{counted} in comments_count'
+            )
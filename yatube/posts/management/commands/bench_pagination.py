@@ -0,0 +1,79 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.db import without_auto_now
+from posts.benchmarks import measure, scratch_database, summary
+from posts.models import Post, User
+from posts.pagination import CursorPaginator, encode_cursor
+from posts.views import NUM_OF_POSTS, paginator
+
+BATCH_SIZE = 10000
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает задержку глубокой страницы ленты при OFFSET- и '
+        'курсорной пагинации на растущей таблице постов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', nargs='+', type=int,
+            default=[10000, 100000, 1000000],
+        )
+        parser.add_argument('--page', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        page = options['page']
+        with scratch_database():
+            author = User.objects.create(username='bench_author')
+            self.stdout.write(
+                f'{"rows":>10} {"offset p50, ms":>16} {"cursor p50, ms":>16}'
+            )
+            total = 0
+            for size in sorted(options['sizes']):
+                total = self.fill(author, total, size)
+                posts = Post.objects.select_related('author', 'group')
+                offset = (page - 1) * NUM_OF_POSTS
+                if offset >= total:
+                    self.stderr.write(f'{total} rows: page {page} is empty')
+                    continue
+                # Первая страница курсорной пагинации — без курсора.
+                cursor = None
+                if offset:
+                    cursor = encode_cursor(
+                        posts.order_by('-pub_date', '-id')[offset - 1]
+                    )
+                offset_timings = measure(
+                    lambda: list(paginator(posts, page)), options['repeat']
+                )
+                cursor_timings = measure(
+                    lambda: list(
+                        CursorPaginator(posts, NUM_OF_POSTS).page(cursor)
+                    ),
+                    options['repeat'],
+                )
+                self.stdout.write(
+                    f'{total:>10} '
+                    f'{summary(offset_timings)["p50"]:>16.2f} '
+                    f'{summary(cursor_timings)["p50"]:>16.2f}'
+                )
+
+    def fill(self, author, total, size):
+        start = timezone.now() - timedelta(days=365)
+        with without_auto_now(Post, 'pub_date'):
+            while total < size:
+                batch = min(BATCH_SIZE, size - total)
+                Post.objects.bulk_create(
+                    Post(
+                        author=author,
+                        text=f'Пост номер {number}',
+                        pub_date=start + timedelta(seconds=number),
+                    )
+                    for number in range(total, total + batch)
+                )
+                total += batch
+        return total
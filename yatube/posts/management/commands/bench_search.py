@@ -0,0 +1,81 @@
+import random
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from posts import search
+from posts.benchmarks import measure, scratch_database, summary
+from posts.models import Post, User
+
+BATCH_SIZE = 10000
+WORDS = (
+    'котик погода город река музыка книга поезд море кофе зима лето '
+    'осень весна программа питон джанго сервер база индекс запрос '
+    'страница лента автор группа подписка комментарий картинка поиск'
+).split()
+
+
+def random_text(rng):
+    return ' '.join(rng.choices(WORDS, k=rng.randint(5, 40))) + (
+        f' уникум{rng.randint(0, 100000)}'
+    )
+
+
+def first_page(results):
+    return results.count(), list(results[:10])
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает полнотекстовый поиск со сканированием icontains '
+        'на синтетической таблице постов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1000000)
+        parser.add_argument('--repeat', type=int, default=10)
+        parser.add_argument(
+            '--backend', choices=['auto', 'fts5', 'inverted'],
+            default='auto',
+        )
+        parser.add_argument(
+            '--queries', nargs='+',
+            default=['уникум4242', 'котик поезд', 'програм*'],
+        )
+
+    def handle(self, *args, **options):
+        with override_settings(SEARCH_BACKEND=options['backend']):
+            self.run(options)
+
+    def run(self, options):
+        rng = random.Random(42)
+        with scratch_database():
+            author = User.objects.create(username='bench_author')
+            created = 0
+            while created < options['posts']:
+                batch = min(BATCH_SIZE, options['posts'] - created)
+                Post.objects.bulk_create(
+                    Post(author=author, text=random_text(rng))
+                    for _ in range(batch)
+                )
+                created += batch
+            search.reindex()
+            self.stdout.write(
+                f'{created} posts, backend {search.get_backend().name}'
+            )
+            for query in options['queries']:
+                needle = query.rstrip('*').split()[0]
+                scan = measure(
+                    lambda: first_page(
+                        Post.objects.filter(text__icontains=needle)),
+                    options['repeat'],
+                )
+                indexed = measure(
+                    lambda: first_page(search.search(query)),
+                    options['repeat'],
+                )
+                self.stdout.write(
+                    f'{query!r:>16}: icontains p50 '
+                    f'{summary(scan)["p50"]:.2f} ms, '
+                    f'search p50 {summary(indexed)["p50"]:.2f} ms'
+                )
@@ -0,0 +1,115 @@
+import argparse
+import subprocess
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from PIL import Image
+
+from posts import uploads
+from posts.benchmarks import summary
+
+INPUTS = {
+    'jpeg 12MP': ('JPEG', (4032, 3024)),
+    'jpeg 48MP': ('JPEG', (8000, 6000)),
+    'png 6MP': ('PNG', (3000, 2000)),
+}
+
+
+def sample(fmt, size):
+    """Фото-подобная картинка: градиент с шумом, чтобы сжатие было
+    похоже на настоящее."""
+    noise = Image.effect_noise(size, 12)
+    gradient = Image.linear_gradient('L').resize(size)
+    image = Image.merge('RGB', (noise, gradient, gradient.rotate(90)))
+    output = BytesIO()
+    image.save(output, fmt, quality=92)
+    return output.getvalue()
+
+
+def naive(upload):
+    """Полное декодирование и уменьшение без draft и reduce."""
+    image = Image.open(upload)
+    fmt = image.format
+    image.load()
+    limit = settings.POST_IMAGE_MAX_SIDE
+    image.thumbnail((limit, limit), Image.LANCZOS, reducing_gap=None)
+    return uploads._encode(image, fmt)
+
+
+def pipeline(upload):
+    return uploads.prepare(upload)[0]
+
+
+METHODS = {'naive': naive, 'pipeline': pipeline}
+
+
+def memory_status(field):
+    """VmRSS/VmHWM процесса в МБ (Linux). ru_maxrss не годится: он
+    наследуется от родителя через fork и exec."""
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith(field + ':'):
+                return int(line.split()[1]) / 1024
+
+
+class Command(BaseCommand):
+    help = (
+        'Время обработки и пик памяти при загрузке больших JPEG/PNG: '
+        'posts.uploads против полного декодирования.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument(
+            '--peak', nargs=2, metavar=('METHOD', 'FILE'),
+            help=argparse.SUPPRESS,
+        )
+
+    def handle(self, *args, **options):
+        if options['peak']:
+            return self.measure_peak(*options['peak'])
+        self.stdout.write(
+            f'{"input":<12}{"method":<10}{"in MB":>8}{"out KB":>9}'
+            f'{"p50 ms":>10}{"peak MB":>10}'
+        )
+        for label, (fmt, size) in INPUTS.items():
+            data = sample(fmt, size)
+            for method, func in METHODS.items():
+                timings = []
+                for _ in range(options['repeat']):
+                    upload = SimpleUploadedFile('image', data)
+                    started = time.perf_counter()
+                    result = func(upload)
+                    timings.append((time.perf_counter() - started) * 1000)
+                self.stdout.write(
+                    f'{label:<12}{method:<10}{len(data) / 2 ** 20:>8.1f}'
+                    f'{len(result) / 1024:>9.0f}'
+                    f'{summary(timings)["p50"]:>10.0f}'
+                    f'{self.peak(method, data):>10.0f}'
+                )
+
+    @staticmethod
+    def peak(method, data):
+        """Прирост пикового RSS в новом процессе, чтобы память,
+        оставшаяся после прошлых замеров, не использовалась повторно."""
+        with tempfile.NamedTemporaryFile() as source:
+            source.write(data)
+            source.flush()
+            output = subprocess.run(
+                [sys.executable, sys.argv[0], 'bench_uploads',
+                 '--peak', method, source.name],
+                check=True, capture_output=True, text=True,
+            ).stdout
+        return float(output)
+
+    def measure_peak(self, method, path):
+        with open(path, 'rb') as source:
+            upload = SimpleUploadedFile('image', source.read())
+        before = memory_status('VmRSS')
+        METHODS[method](upload)
+        self.stdout.write(f'{memory_status("VmHWM") - before:.1f}')
@@ -0,0 +1,170 @@
+import json
+import random
+import statistics
+import time
+from contextlib import nullcontext
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from core import profiling
+from posts.benchmarks import scratch_database, summary
+from posts.models import Group, Post, User
+
+VIEWS = ('index', 'group_list', 'profile', 'post_detail', 'follow_index')
+SAMPLE_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогоняет ленты, профиль и страницу поста через тестовый клиент '
+        'и печатает p50/p95/p99 задержки и число SQL-запросов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кэш перед каждым запросом.',
+        )
+        parser.add_argument(
+            '--scratch', action='store_true',
+            help='Прогнать на временной БД, заполненной командой seed.',
+        )
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--posts', type=int, default=5000)
+        parser.add_argument('--json', help='Сохранить результаты в файл.')
+        parser.add_argument(
+            '--compare', help='Сравнить с результатами из файла --json.'
+        )
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--templates', type=int, nargs='?', const=10, default=0,
+            metavar='TOP',
+            help='Профилировать шаблоны и показать TOP самых медленных '
+                 'узлов каждого представления (кэш страниц выключается).',
+        )
+
+    def handle(self, *args, **options):
+        self.profiles = {}
+        overrides = override_settings(PAGE_CACHE_TIMEOUT=0) if (
+            options['templates']) else nullcontext()
+        with overrides:
+            results = self.prepare_and_run(options)
+        self.report(results, options['compare'])
+        if options['templates']:
+            self.report_templates(options['templates'])
+        if options['json']:
+            with open(options['json'], 'w') as output:
+                json.dump(results, output, indent=2)
+
+    def prepare_and_run(self, options):
+        if options['scratch']:
+            with scratch_database():
+                call_command(
+                    'seed',
+                    users=options['users'],
+                    posts=options['posts'],
+                    comments=options['posts'] * 2,
+                    seed=options['seed'],
+                    stdout=self.stderr,
+                )
+                return self.run(options)
+        return self.run(options)
+
+    def samples(self):
+        posts = list(
+            Post.objects.order_by('-pk').values_list(
+                'pk', 'author__username')[:SAMPLE_SIZE]
+        )
+        groups = list(Group.objects.values_list('slug', flat=True)[:100])
+        reader = (
+            User.objects.filter(stats__following_count__gt=0)
+            .order_by('-stats__following_count').first()
+        )
+        if not posts or not groups or reader is None:
+            raise CommandError(
+                'В базе нет данных: запустите manage.py seed или --scratch.'
+            )
+        pages = max(1, min(50, Post.objects.count() // 10))
+        return {
+            'index': lambda: reverse('posts:index') + (
+                f'?page={self.rng.randint(1, pages)}'),
+            'group_list': lambda: reverse(
+                'posts:group_list', args=[self.rng.choice(groups)]),
+            'profile': lambda: reverse(
+                'posts:profile', args=[self.rng.choice(posts)[1]]),
+            'post_detail': lambda: reverse(
+                'posts:post_detail', args=[self.rng.choice(posts)[0]]),
+            'follow_index': lambda: reverse('posts:follow_index'),
+        }, reader
+
+    def run(self, options):
+        self.rng = random.Random(options['seed'])
+        urls, reader = self.samples()
+        anonymous = Client()
+        authorized = Client()
+        authorized.force_login(reader)
+        results = {}
+        for view in VIEWS:
+            client = authorized if view == 'follow_index' else anonymous
+            for _ in range(options['warmup']):
+                client.get(urls[view]())
+            timings = []
+            queries = []
+            profile = profiling.profile() if (
+                options['templates']) else nullcontext()
+            with profile as self.profiles[view]:
+                self.measure(client, urls[view], options, timings, queries)
+            results[view] = {
+                **summary(timings),
+                'queries': statistics.mean(queries) if queries else None,
+            }
+        return results
+
+    def measure(self, client, url_for, options, timings, queries):
+        for _ in range(options['requests']):
+            url = url_for()
+            if options['cold']:
+                cache.clear()
+            started = time.perf_counter()
+            response = client.get(url)
+            timings.append((time.perf_counter() - started) * 1000)
+            stats = getattr(response, 'query_stats', None)
+            if stats is not None:
+                queries.append(stats.count)
+
+    def report(self, results, compare):
+        baseline = {}
+        if compare:
+            with open(compare) as source:
+                baseline = json.load(source)
+        self.stdout.write(
+            f'{"view":<14}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}'
+            f'{"queries":>10}'
+        )
+        for view, row in results.items():
+            queries = '-' if row['queries'] is None else (
+                f'{row["queries"]:.1f}')
+            line = (
+                f'{view:<14}{row["p50"]:>10.2f}{row["p95"]:>10.2f}'
+                f'{row["p99"]:>10.2f}{queries:>10}'
+            )
+            if view in baseline:
+                delta = (row['p95'] / baseline[view]['p95'] - 1) * 100
+                line += f'   p95 {delta:+.1f}% vs baseline'
+            self.stdout.write(line)
+
+    def report_templates(self, top):
+        for view, profile in self.profiles.items():
+            self.stdout.write(f'\n{view}')
+            self.stdout.write(
+                f'  {"node":<52}{"calls":>8}{"total ms":>10}{"max ms":>9}')
+            for label, count, total, worst in profile.totals()[:top]:
+                self.stdout.write(
+                    f'  {label:<52}{count:>8}{total:>10.1f}{worst:>9.2f}')
@@ -0,0 +1,64 @@
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import export
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково выгружает группы, посты, комментарии и подписки '
+        'в NDJSON или CSV.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'names', nargs='*',
+            help=f'Что выгружать: {", ".join(export.EXPORTS)}; '
+                 f'по умолчанию всё.',
+        )
+        parser.add_argument(
+            '--format', choices=export.FORMATS, default='ndjson'
+        )
+        parser.add_argument('--gzip', action='store_true')
+        parser.add_argument(
+            '--output', default='-',
+            help='Каталог для файлов или «-» для stdout (одна таблица).',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=export.CHUNK_SIZE
+        )
+
+    def handle(self, *args, **options):
+        names = options['names'] or list(export.EXPORTS)
+        unknown = set(names) - set(export.EXPORTS)
+        if unknown:
+            raise CommandError(f'Неизвестные таблицы: {", ".join(unknown)}')
+        if options['output'] == '-':
+            if len(names) != 1:
+                raise CommandError('В stdout можно выгрузить одну таблицу.')
+            self.write(names[0], sys.stdout.buffer, options)
+            return
+        os.makedirs(options['output'], exist_ok=True)
+        for name in names:
+            path = os.path.join(options['output'], export.filename(
+                name, options['format'], options['gzip']))
+            started = time.perf_counter()
+            with open(path, 'wb') as output:
+                written = self.write(name, output, options)
+            self.stderr.write(
+                f'{path}: {written} bytes in '
+                f'{time.perf_counter() - started:.1f} s'
+            )
+
+    def write(self, name, output, options):
+        written = 0
+        for chunk in export.stream(
+            name, options['format'], options['gzip'], options['chunk_size']
+        ):
+            output.write(chunk)
+            written += len(chunk)
+        output.flush()
+        return written
@@ -0,0 +1,51 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from posts import thumbnails
+from posts.models import Post
+
+
+def generate(name):
+    try:
+        thumbnails.generate(name)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = (
+        'Параллельно генерирует недостающие миниатюры и варианты '
+        'картинок постов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=settings.THUMBNAIL_WORKERS or 1
+        )
+
+    def handle(self, *args, **options):
+        # Одинаковые картинки хранятся одним файлом (posts.uploads):
+        # каждый файл обрабатывается один раз.
+        names = (
+            Post.objects.exclude(image='')
+            .order_by()
+            .values_list('image', flat=True)
+            .distinct()
+            .iterator()
+        )
+        missing = (
+            name for name in names if thumbnails.needs_generation(name)
+        )
+        generated = 0
+        if options['workers'] <= 1:
+            for name in missing:
+                thumbnails.generate(name)
+                generated += 1
+        else:
+            with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+                for _ in pool.map(generate, missing):
+                    generated += 1
+        self.stdout.write(f'Generated thumbnails for {generated} images\n')
@@ -0,0 +1,89 @@
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import importer
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает группы, посты, комментарии и подписки из NDJSON или '
+        'CSV (в том числе выгрузок команды export) пачками bulk_create.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='+',
+            help='Файлы вида posts.ndjson[.gz], каталоги с ними или «-».',
+        )
+        parser.add_argument(
+            '--table', choices=importer.TABLES,
+            help='Таблица для stdin или файла с другим именем.',
+        )
+        parser.add_argument('--format', choices=importer.FORMATS)
+        parser.add_argument(
+            '--batch-size', type=int, default=importer.BATCH_SIZE
+        )
+        parser.add_argument(
+            '--images',
+            help='Каталог с картинками постов; файлы копируются в media.',
+        )
+        parser.add_argument('--workers', type=int, default=4)
+
+    def sources(self, paths, options):
+        found = []
+        for path in paths:
+            if os.path.isdir(path):
+                found.extend(
+                    self.sources([
+                        os.path.join(path, name)
+                        for name in sorted(os.listdir(path))
+                        if importer.detect(name)[0] in importer.TABLES
+                    ], options)
+                )
+                continue
+            name, fmt = importer.detect(path)
+            name = options['table'] or name
+            fmt = options['format'] or fmt or 'ndjson'
+            if name not in importer.TABLES:
+                raise CommandError(
+                    f'{path}: не удалось определить таблицу, укажите --table'
+                )
+            found.append((name, fmt, path))
+        return found
+
+    def handle(self, *args, **options):
+        sources = sorted(
+            self.sources(options['paths'], options),
+            key=lambda source: importer.TABLES.index(source[0]),
+        )
+        loader = importer.Importer(
+            options['batch_size'], options['images'], options['workers']
+        )
+        for name, fmt, path in sources:
+            started = time.perf_counter()
+            if path == '-':
+                count = loader.load(
+                    name, importer.read_rows(sys.stdin.buffer, fmt))
+            else:
+                with open(path, 'rb') as source:
+                    count = loader.load(
+                        name, importer.read_rows(source, fmt))
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'{name}: {count} rows in {elapsed:.1f} s '
+                f'({count / max(elapsed, 1e-9):.0f} rows/s), '
+                f'{loader.skipped[name]} skipped'
+            )
+        started = time.perf_counter()
+        loader.finish()
+        self.stdout.write(
+            f'Counters, timelines and search refreshed in '
+            f'{time.perf_counter() - started:.1f} s'
+        )
+        if options['images']:
+            self.stdout.write(
+                'Run generate_thumbnails to prepare the imported images.'
+            )
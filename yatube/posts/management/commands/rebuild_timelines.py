@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import timeline
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает материализованные ленты подписок с нуля.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=timeline.BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            follows = timeline.rebuild(options['batch_size'])
+        self.stdout.write(f'Rebuilt timelines for {follows} follows\n')
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает разошедшиеся счётчики постов, комментариев '
+        'и подписок.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=counters.BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        fixed = counters.reconcile(options['batch_size'])
+        for name, count in fixed.items():
+            self.stdout.write(f'Fixed {count} {name}\n')
@@ -0,0 +1,192 @@
+import io
+import random
+import time
+from datetime import timedelta
+from itertools import accumulate
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from faker import Faker
+from PIL import Image
+
+from core.db import without_auto_now
+from posts import counters, feed_cache, search, timeline
+from posts.models import Comment, Follow, Group, Post, User
+
+SENTENCES = 500
+IMAGES = 20
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, группами, постами, '
+        'комментариями и степенным графом подписок.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=50000)
+        parser.add_argument(
+            '--follows', type=int, default=20,
+            help='Среднее число подписок на пользователя.',
+        )
+        parser.add_argument(
+            '--images', type=float, default=0.0,
+            help='Доля постов с картинкой, от 0 до 1.',
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        fake = Faker('ru_RU')
+        fake.seed_instance(options['seed'])
+        self.sentences = [fake.sentence() for _ in range(SENTENCES)]
+        self.prefix = f'seed{int(time.time())}'
+        started = time.perf_counter()
+        with transaction.atomic():
+            user_ids = self.create_users(options['users'])
+            group_ids = self.create_groups(options['groups'])
+            self.create_follows(user_ids, options['follows'])
+            post_ids = self.create_posts(
+                user_ids, group_ids, options['posts'], options['images']
+            )
+            self.create_comments(user_ids, post_ids, options['comments'])
+            self.stdout.write('Refreshing counters, timelines and search...')
+            counters.reconcile()
+            timeline.rebuild()
+            search.reindex()
+        feed_cache.bump('index')
+        self.stdout.write(
+            f'Seeded in {time.perf_counter() - started:.1f} s\n'
+        )
+
+    def batches(self, objects):
+        batch = []
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) == self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def text(self, low, high):
+        return ' '.join(self.rng.choices(
+            self.sentences, k=self.rng.randint(low, high)
+        ))
+
+    def create_users(self, count):
+        for batch in self.batches(
+            User(username=f'{self.prefix}_{number}', password='!')
+            for number in range(count)
+        ):
+            User.objects.bulk_create(batch)
+        self.stdout.write(f'{count} users')
+        return list(User.objects.filter(
+            username__startswith=f'{self.prefix}_'
+        ).values_list('pk', flat=True))
+
+    def create_groups(self, count):
+        Group.objects.bulk_create(
+            Group(
+                title=f'Группа {number}',
+                slug=f'{self.prefix}-{number}',
+                description=self.text(1, 3),
+            )
+            for number in range(count)
+        )
+        self.stdout.write(f'{count} groups')
+        return list(Group.objects.filter(
+            slug__startswith=f'{self.prefix}-'
+        ).values_list('pk', flat=True))
+
+    def create_follows(self, user_ids, average):
+        # Популярность авторов и число подписок распределены по Парето:
+        # у немногих авторов большинство подписчиков.
+        popularity = list(accumulate(
+            self.rng.paretovariate(1.2) for _ in user_ids
+        ))
+
+        def follows():
+            for user_id in user_ids:
+                wanted = min(
+                    int(self.rng.paretovariate(1.5) * average / 3),
+                    len(user_ids) - 1,
+                )
+                authors = set(self.rng.choices(
+                    user_ids, cum_weights=popularity, k=wanted
+                ))
+                authors.discard(user_id)
+                for author_id in authors:
+                    yield Follow(user_id=user_id, author_id=author_id)
+
+        created = 0
+        for batch in self.batches(follows()):
+            Follow.objects.bulk_create(batch)
+            created += len(batch)
+        self.stdout.write(f'{created} follows')
+
+    def create_images(self):
+        names = []
+        for number in range(IMAGES):
+            buffer = io.BytesIO()
+            color = tuple(self.rng.randrange(256) for _ in range(3))
+            Image.new('RGB', (1200, 800), color).save(buffer, 'JPEG')
+            names.append(default_storage.save(
+                f'posts/{self.prefix}_{number}.jpg',
+                ContentFile(buffer.getvalue()),
+            ))
+        return names
+
+    def create_posts(self, user_ids, group_ids, count, images):
+        image_names = self.create_images() if images else []
+        last_pk = Post.objects.order_by('-pk').values_list(
+            'pk', flat=True).first() or 0
+        start = timezone.now() - timedelta(days=365)
+        step = timedelta(days=365) / max(count, 1)
+        posts = (
+            Post(
+                author_id=self.rng.choice(user_ids),
+                group_id=(
+                    self.rng.choice(group_ids)
+                    if group_ids and self.rng.random() < 0.5 else None
+                ),
+                text=self.text(1, 8),
+                image=(
+                    self.rng.choice(image_names)
+                    if image_names and self.rng.random() < images else ''
+                ),
+                pub_date=start + step * number,
+            )
+            for number in range(count)
+        )
+        with without_auto_now(Post, 'pub_date'):
+            for batch in self.batches(posts):
+                Post.objects.bulk_create(batch)
+        self.stdout.write(f'{count} posts')
+        return list(Post.objects.filter(
+            pk__gt=last_pk
+        ).values_list('pk', flat=True))
+
+    def create_comments(self, user_ids, post_ids, count):
+        # Обсуждения тоже неравномерны: часть постов собирает большинство
+        # комментариев.
+        weights = [self.rng.paretovariate(1.2) for _ in post_ids]
+        comments = (
+            Comment(
+                post_id=post_id,
+                author_id=self.rng.choice(user_ids),
+                text=self.text(1, 3),
+            )
+            for post_id in self.rng.choices(post_ids, weights, k=count)
+        )
+        for batch in self.batches(comments):
+            Comment.objects.bulk_create(batch)
+        self.stdout.write(f'{count} comments')
@@ -0,0 +1,160 @@
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from posts.benchmarks import summary
+from posts.models import Post, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест SQLite: одни потоки публикуют посты и '
+        'комментарии, другие читают ленты. Работает на временной БД.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8)
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--duration', type=float, default=10)
+        parser.add_argument(
+            '--queue', action='store_true',
+            help='Включить SQLITE_WRITE_QUEUE.',
+        )
+        parser.add_argument(
+            '--no-pragmas', action='store_true',
+            help='Не выполнять SQLITE_PRAGMAS (для сравнения).',
+        )
+
+    def handle(self, *args, **options):
+        # Без лимита комментариев: тест меряет конкуренцию за запись.
+        overrides = {'SQLITE_WRITE_QUEUE': options['queue'], 'COMMENT_RATE': 0}
+        if options['no_pragmas']:
+            overrides['SQLITE_PRAGMAS'] = {}
+        settings_dict = connections.databases['default']
+        old_name = settings_dict['NAME']
+        with tempfile.TemporaryDirectory() as directory, \
+                override_settings(**overrides):
+            connection.close()
+            settings_dict['NAME'] = os.path.join(directory, 'stress.sqlite3')
+            try:
+                call_command('migrate', verbosity=0)
+                results = self.run(options)
+            finally:
+                connection.close()
+                settings_dict['NAME'] = old_name
+        self.report(results, options['duration'])
+
+    def run(self, options):
+        users = [
+            User.objects.create(username=f'stress_{number}')
+            for number in range(options['writers'])
+        ]
+        self.post_ids = [
+            Post.objects.create(author=user, text='Первый пост').pk
+            for user in users
+        ]
+        self.deadline = time.monotonic() + options['duration']
+        self.timings = defaultdict(list)
+        self.errors = Counter()
+        self.lock = threading.Lock()
+        threads = [
+            threading.Thread(target=self.in_thread(self.writer), args=(user,))
+            for user in users
+        ] + [
+            threading.Thread(target=self.in_thread(self.reader), args=(n,))
+            for n in range(options['readers'])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self.timings, self.errors
+
+    def record(self, role, started, error=None):
+        elapsed = (time.perf_counter() - started) * 1000
+        with self.lock:
+            if error is None:
+                self.timings[role].append(elapsed)
+            else:
+                self.errors[f'{role}: {error}'] += 1
+
+    def writer(self, user):
+        client = Client()
+        client.force_login(user)
+        rng = random.Random(user.pk)
+        while time.monotonic() < self.deadline:
+            if rng.random() < 0.5:
+                self.request(
+                    client.post, reverse('posts:post_create'),
+                    {'text': 'Нагрузочный пост'}, 'post',
+                )
+            else:
+                self.request(
+                    client.post,
+                    reverse('posts:add_comment',
+                            args=[rng.choice(self.post_ids)]),
+                    {'text': 'Нагрузочный комментарий'}, 'comment',
+                )
+
+    def reader(self, number):
+        client = Client()
+        rng = random.Random(number)
+        while time.monotonic() < self.deadline:
+            if rng.random() < 0.5:
+                url = reverse('posts:index')
+            else:
+                url = reverse(
+                    'posts:post_detail', args=[rng.choice(self.post_ids)])
+            self.request(client.get, url, None, 'read')
+
+    @staticmethod
+    def in_thread(target):
+        def run(*args):
+            try:
+                target(*args)
+            finally:
+                connection.close()
+        return run
+
+    def request(self, method, url, data, role):
+        started = time.perf_counter()
+        try:
+            response = method(url, data) if data else method(url)
+        except Exception as error:
+            self.record(role, started, f'{type(error).__name__} {error}')
+            return
+        if response.status_code >= 400:
+            self.record(role, started, f'HTTP {response.status_code}')
+        else:
+            self.record(role, started)
+
+    def report(self, results, duration):
+        timings, errors = results
+        self.stdout.write(
+            f'{"role":<10}{"ops":>8}{"ops/s":>10}'
+            f'{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}'
+        )
+        for role in ('post', 'comment', 'read'):
+            values = timings.get(role)
+            if not values:
+                continue
+            stats = summary(values)
+            self.stdout.write(
+                f'{role:<10}{len(values):>8}{len(values) / duration:>10.1f}'
+                f'{stats["p50"]:>10.1f}{stats["p95"]:>10.1f}'
+                f'{stats["p99"]:>10.1f}'
+            )
+        total = sum(errors.values())
+        self.stdout.write(f'Errors: {total}')
+        for error, count in errors.most_common(5):
+            self.stdout.write(f'  {count} x {error}')
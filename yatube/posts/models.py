@@ -16,6 +16,11 @@ class Group(models.Model):
     description = models.TextField(
         verbose_name='Описание'
     )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Число постов'
+    )
 
     def __str__(self) -> str:
         return self.title
@@ -47,12 +52,30 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    comments_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Число комментариев'
+    )
 
     def __str__(self) -> str:
         return self.text[:15]
 
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'], name='post_pub_date_id_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_date_idx'
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_date_idx'
+            ),
+        ]
 
 
 class Comment(models.Model):
@@ -76,6 +99,14 @@ class Comment(models.Model):
         verbose_name='Дата комментария',
     )
 
+    class Meta:
+        ordering = ['created', 'id']
+        indexes = [
+            models.Index(
+                fields=['post', 'created'], name='comment_post_created_idx'
+            ),
+        ]
+
     def __str__(self) -> str:
         return self.text
 
@@ -103,9 +134,151 @@ class Follow(models.Model):
                 check=~models.Q(user=models.F('author')),
                 name='prevent self-following')
         ]
+        indexes = [
+            models.Index(
+                fields=['author', 'user'], name='follow_author_user_idx'
+            ),
+        ]
         verbose_name = 'Подписка'
         verbose_name_plural = 'Подписки'
 
     def __str__(self) -> str:
         return self.PHRASE_FOLLOW.format(
             key_user=self.user, key_author=self.author)
+
+
+class UserStats(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь',
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число постов'
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число подписчиков'
+    )
+    following_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число подписок'
+    )
+
+    class Meta:
+        verbose_name = 'Счётчики пользователя'
+        verbose_name_plural = 'Счётчики пользователей'
+
+    def __str__(self) -> str:
+        return str(self.user)
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Подписчик',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост',
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата_публикации'
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=('user', 'post'),
+                                    name='unique_timeline_entry'),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_date_idx'
+            ),
+        ]
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи лент'
+
+    def __str__(self) -> str:
+        return f'{self.user}: {self.post}'
+
+
+class SearchPosting(models.Model):
+    term = models.CharField(
+        max_length=64,
+        verbose_name='Термин'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='search_postings',
+        verbose_name='Пост',
+    )
+    frequency = models.PositiveIntegerField(
+        verbose_name='Частота'
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=('term', 'post'),
+                                    name='unique_search_posting'),
+        ]
+        verbose_name = 'Вхождение термина'
+        verbose_name_plural = 'Поисковый индекс'
+
+    def __str__(self) -> str:
+        return f'{self.term}: {self.post_id}'
+
+
+class PostImageVariant(models.Model):
+    """Уменьшенная копия картинки поста для srcset.
+
+    Привязана к имени файла, а не к посту: одинаковые картинки хранятся
+    одним файлом (posts.uploads), и варианты у них общие.
+    """
+    WEBP = 'webp'
+    JPEG = 'jpeg'
+    FORMAT_CHOICES = (
+        (WEBP, 'WebP'),
+        (JPEG, 'JPEG'),
+    )
+
+    source = models.CharField(
+        max_length=255,
+        db_index=True,
+        verbose_name='Исходная картинка'
+    )
+    format = models.CharField(
+        max_length=4,
+        choices=FORMAT_CHOICES,
+        verbose_name='Формат'
+    )
+    width = models.PositiveIntegerField(
+        verbose_name='Ширина'
+    )
+    height = models.PositiveIntegerField(
+        verbose_name='Высота'
+    )
+    file = models.ImageField(
+        upload_to='posts/variants/',
+        verbose_name='Файл'
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=('source', 'format', 'width'),
+                                    name='unique_post_image_variant'),
+        ]
+        verbose_name = 'Вариант картинки'
+        verbose_name_plural = 'Варианты картинок'
+
+    def __str__(self) -> str:
+        return f'{self.source} {self.format} {self.width}w'
@@ -0,0 +1,103 @@
+"""Кэш целых страниц для анонимных посетителей.
+
+Представление помечает ответ областями feed_cache, от которых он
+зависит (tag(request, 'index'), 'group:<id>', 'profile:<id>',
+'post:<id>'). Вместе с ответом сохраняются версии этих областей, и
+запись отдаётся, только пока версии не изменились: сигналы Post,
+Comment и Follow увеличивают версии лишь затронутых областей, так что
+остальные страницы остаются в кэше.
+
+Middleware стоит до сессий и аутентификации: попадание в кэш не
+открывает сессию и не делает ни одного SQL-запроса. Запросы с кукой
+сессии или сообщений проходят мимо кэша.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+from . import feed_cache
+
+PAGE_KEY = 'page:{path}'
+
+
+def tag(request, *scopes):
+    """Отмечает, от каких областей зависит страница.
+
+    Версии снимаются в момент вызова, до чтения данных: если пост
+    изменят во время рендеринга, запись уже будет устаревшей.
+    """
+    versions, _ = feed_cache.snapshot(scopes)
+    request.page_cache_versions = {
+        **getattr(request, 'page_cache_versions', {}), **versions
+    }
+
+
+def page_key(request):
+    return PAGE_KEY.format(
+        path=hashlib.md5(request.get_full_path().encode()).hexdigest()
+    )
+
+
+def _anonymous(request):
+    return not any(
+        name in request.COOKIES
+        for name in (settings.SESSION_COOKIE_NAME, 'messages')
+    )
+
+
+class AnonymousPageCacheMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        cacheable = (
+            settings.PAGE_CACHE_TIMEOUT
+            and request.method in ('GET', 'HEAD')
+            and _anonymous(request)
+        )
+        if cacheable:
+            response = self.cached(request)
+            if response is not None:
+                return response
+        response = self.get_response(request)
+        versions = getattr(request, 'page_cache_versions', None)
+        if versions is None:
+            return response
+        if cacheable and self.storable(request, response):
+            patch_cache_control(
+                response, public=True, max_age=0,
+                s_maxage=settings.PAGE_CACHE_PROXY_MAX_AGE,
+            )
+            patch_vary_headers(response, ('Cookie',))
+            cache.set(
+                page_key(request), (versions, response),
+                settings.PAGE_CACHE_TIMEOUT,
+            )
+            response['X-Page-Cache'] = 'miss'
+        else:
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def cached(self, request):
+        entry = cache.get(page_key(request))
+        if entry is None:
+            return None
+        versions, response = entry
+        current, _ = feed_cache.snapshot(versions)
+        if current != versions:
+            return None
+        response['X-Page-Cache'] = 'hit'
+        return response
+
+    @staticmethod
+    def storable(request, response):
+        user = getattr(request, 'user', None)
+        return (
+            request.method == 'GET'
+            and response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and not (user is not None and user.is_authenticated)
+        )
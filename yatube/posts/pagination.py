@@ -0,0 +1,162 @@
+import base64
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+CURSOR_ORDERING = ('-pub_date', '-id')
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(obj, direction='next', field='pub_date', pk_field='pk'):
+    raw = (
+        f'{direction}|{getattr(obj, field).isoformat()}|'
+        f'{getattr(obj, pk_field)}'
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    try:
+        direction, pub_date, pk = (
+            base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        )
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor(cursor)
+    if direction not in ('next', 'prev') or not isinstance(
+            pub_date, datetime):
+        raise InvalidCursor(cursor)
+    return direction, pub_date, pk
+
+
+def cursor_key(object_list):
+    """Поля ключа курсора (дата, id).
+
+    Queryset с явным порядком из двух убывающих полей (например, лента
+    подписок по записям TimelineEntry) листается по ним, остальные — по
+    CURSOR_ORDERING.
+    """
+    ordering = object_list.query.order_by
+    if len(ordering) != 2 or not all(
+            isinstance(field, str) and field.startswith('-')
+            for field in ordering):
+        ordering = CURSOR_ORDERING
+    return tuple(field[1:] for field in ordering)
+
+
+class CursorPage:
+    """Страница ленты, полученная поиском по ключу (pub_date, id).
+
+    В отличие от Page не знает общего числа страниц: COUNT(*) и OFFSET
+    не выполняются, поэтому глубокие страницы стоят столько же,
+    сколько первая.
+    """
+    is_cursor = True
+
+    def __init__(self, object_list, has_next, has_previous,
+                 key=('pub_date', 'pk')):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.key = key
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self.object_list)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self._has_next:
+            return None
+        return encode_cursor(self.object_list[-1], 'next', *self.key)
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous:
+            return None
+        return encode_cursor(self.object_list[0], 'prev', *self.key)
+
+
+class CursorPaginator:
+    def __init__(self, object_list, per_page):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+
+    def page(self, cursor=None):
+        date, pk_field = key = cursor_key(self.object_list)
+        posts = self.object_list.order_by(f'-{date}', f'-{pk_field}')
+        if not cursor:
+            rows = list(posts[:self.per_page + 1])
+            return CursorPage(
+                rows[:self.per_page], len(rows) > self.per_page, False, key
+            )
+        direction, pub_date, pk = decode_cursor(cursor)
+        if direction == 'next':
+            rows = list(posts.filter(
+                Q(**{f'{date}__lt': pub_date}) | Q(**{f'{pk_field}__lt': pk}),
+                **{f'{date}__lte': pub_date},
+            )[:self.per_page + 1])
+            # Пустая страница (посты за курсором удалены) не даёт курсоров.
+            return CursorPage(
+                rows[:self.per_page], len(rows) > self.per_page, bool(rows),
+                key,
+            )
+        rows = list(posts.filter(
+            Q(**{f'{date}__gt': pub_date}) | Q(**{f'{pk_field}__gt': pk}),
+            **{f'{date}__gte': pub_date},
+        ).order_by(date, pk_field)[:self.per_page + 1])
+        has_previous = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        rows.reverse()
+        return CursorPage(rows, bool(rows), has_previous, key)
+
+    def get_page(self, cursor=None):
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page()
+
+
+def comments_page(comments, cursor=None, per_page=None):
+    """Порция комментариев по ключу (created, id) и курсор следующей."""
+    per_page = per_page or settings.COMMENTS_PER_PAGE
+    comments = comments.order_by('created', 'id')
+    if cursor:
+        try:
+            _, created, pk = decode_cursor(cursor)
+        except InvalidCursor:
+            pass
+        else:
+            comments = comments.filter(
+                Q(created__gt=created) | Q(id__gt=pk), created__gte=created
+            )
+    rows = list(comments[:per_page + 1])
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor(rows[-1], field='created')
+    return rows, next_cursor
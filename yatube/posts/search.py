@@ -0,0 +1,302 @@
+"""Полнотекстовый поиск по текстам постов и комментариев к ним.
+
+Основной движок — виртуальная таблица SQLite FTS5 (создаётся миграцией,
+если FTS5 доступен). Переносимый запасной вариант — инвертированный
+индекс в таблице SearchPosting, который строится на Python. Индекс
+обновляется сигналами моделей, полная пересборка — reindex_search.
+Новый комментарий дописывается к документу поста (append), не
+перечитывая пост и остальные комментарии.
+"""
+import math
+import re
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import (Case, Count, F, FloatField, Q, Sum, Value,
+                              When)
+
+from .models import Comment, Post, SearchPosting
+
+FTS_TABLE = 'posts_search'
+BATCH_SIZE = 1000
+MAX_TERM_LENGTH = SearchPosting._meta.get_field('term').max_length
+TOKEN_RE = re.compile(r'\w+\*?')
+
+
+def tokenize(text):
+    return [
+        token[:MAX_TERM_LENGTH]
+        for token in re.findall(r'\w+', text.lower())
+    ]
+
+
+def parse_query(query):
+    """Термины запроса: пары (термин, поиск_по_префиксу)."""
+    terms = []
+    for token in TOKEN_RE.findall(query.lower()):
+        prefix = token.endswith('*')
+        terms.append((token.rstrip('*')[:MAX_TERM_LENGTH], prefix))
+    return terms
+
+
+def documents(post_ids):
+    """Тексты для индекса: пост вместе с комментариями к нему."""
+    texts = dict(
+        Post.objects.filter(pk__in=post_ids).values_list('pk', 'text')
+    )
+    comments = (
+        Comment.objects.filter(post_id__in=texts)
+        .order_by()
+        .values_list('post_id', 'text')
+    )
+    for post_id, text in comments:
+        texts[post_id] += '\n' + text
+    return texts
+
+
+class Fts5Backend:
+    name = 'fts5'
+
+    def index(self, docs):
+        # Одна инструкция на документ: при параллельной переиндексации
+        # одного поста пара DELETE + INSERT может нарушить уникальность
+        # rowid.
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT OR REPLACE INTO {FTS_TABLE} (rowid, body) '
+                f'VALUES (%s, %s)',
+                list(docs.items()),
+            )
+
+    def append(self, docs):
+        # Ещё не проиндексированный пост получит текст при индексации.
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'UPDATE {FTS_TABLE} SET body = body || char(10) || %s '
+                f'WHERE rowid = %s',
+                [(text, post_id) for post_id, text in docs.items()],
+            )
+
+    def remove(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id]
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+
+    @staticmethod
+    def match_expression(terms):
+        return ' '.join(
+            '"{}"{}'.format(term, '*' if prefix else '')
+            for term, prefix in terms
+        )
+
+    def count(self, terms):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT COUNT(*) FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s',
+                [self.match_expression(terms)],
+            )
+            return cursor.fetchone()[0]
+
+    def ids(self, terms, offset, limit):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY rank LIMIT %s OFFSET %s',
+                [self.match_expression(terms), limit, offset],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class InvertedIndexBackend:
+    name = 'inverted'
+
+    @transaction.atomic
+    def index(self, docs):
+        SearchPosting.objects.filter(post_id__in=list(docs)).delete()
+        SearchPosting.objects.bulk_create(
+            (
+                SearchPosting(post_id=post_id, term=term, frequency=count)
+                for post_id, text in docs.items()
+                for term, count in Counter(tokenize(text)).items()
+            ),
+        )
+
+    @transaction.atomic
+    def append(self, docs):
+        terms = {
+            post_id: Counter(tokenize(text))
+            for post_id, text in docs.items()
+        }
+        SearchPosting.objects.bulk_create(
+            (
+                SearchPosting(post_id=post_id, term=term, frequency=0)
+                for post_id, counts in terms.items()
+                for term in counts
+            ),
+            ignore_conflicts=True,
+        )
+        # Одно обновление на пост и частоту: у большинства терминов
+        # комментария она равна 1.
+        for post_id, counts in terms.items():
+            by_count = defaultdict(list)
+            for term, count in counts.items():
+                by_count[count].append(term)
+            for count, group in by_count.items():
+                SearchPosting.objects.filter(
+                    post_id=post_id, term__in=group
+                ).update(frequency=F('frequency') + count)
+
+    def remove(self, post_id):
+        SearchPosting.objects.filter(post_id=post_id).delete()
+
+    def clear(self):
+        SearchPosting.objects.all().delete()
+
+    @staticmethod
+    def term_filter(term, prefix):
+        if prefix:
+            return Q(term__gte=term, term__lt=term + '\uffff')
+        return Q(term=term)
+
+    def matches(self, terms):
+        filters = [self.term_filter(term, prefix) for term, prefix in terms]
+        total = Post.objects.count() or 1
+        weights = []
+        for term_filter in filters:
+            found = (
+                SearchPosting.objects.filter(term_filter)
+                .values('post').distinct().count()
+            )
+            weights.append(math.log(1 + total / (found or 1)))
+        any_term = Q()
+        for term_filter in filters:
+            any_term |= term_filter
+        postings = (
+            SearchPosting.objects.filter(any_term)
+            .values('post_id')
+            .annotate(**{
+                f'matched_{number}': Count('pk', filter=term_filter)
+                for number, term_filter in enumerate(filters)
+            })
+            .filter(**{
+                f'matched_{number}__gt': 0 for number in range(len(filters))
+            })
+        )
+        return postings.annotate(score=Sum(Case(
+            *(
+                When(term_filter, then=F('frequency') * Value(weight))
+                for term_filter, weight in zip(filters, weights)
+            ),
+            default=Value(0),
+            output_field=FloatField(),
+        )))
+
+    def count(self, terms):
+        return self.matches(terms).count()
+
+    def ids(self, terms, offset, limit):
+        return list(
+            self.matches(terms)
+            .order_by('-score', '-post_id')
+            .values_list('post_id', flat=True)[offset:offset + limit]
+        )
+
+
+_fts_tables = {}
+
+
+def fts5_ready():
+    key = (connection.alias, connection.settings_dict['NAME'])
+    if key not in _fts_tables:
+        _fts_tables[key] = (
+            connection.vendor == 'sqlite'
+            and FTS_TABLE in connection.introspection.table_names()
+        )
+    return _fts_tables[key]
+
+
+def get_backend():
+    choice = settings.SEARCH_BACKEND
+    if choice == 'fts5' or (choice == 'auto' and fts5_ready()):
+        return Fts5Backend()
+    return InvertedIndexBackend()
+
+
+class SearchResults:
+    """Ленивый список найденных постов в порядке релевантности.
+
+    Поддерживает count() и срезы, поэтому подходит для Paginator.
+    """
+
+    def __init__(self, query, backend=None):
+        self.terms = parse_query(query)
+        self.backend = backend or get_backend()
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            self._count = (
+                self.backend.count(self.terms) if self.terms else 0
+            )
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start = index.start or 0
+        stop = self.count() if index.stop is None else index.stop
+        if not self.terms or stop <= start:
+            return []
+        ids = self.backend.ids(self.terms, start, stop - start)
+        posts = Post.objects.select_related('author', 'group').in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
+
+
+def search(query):
+    return SearchResults(query)
+
+
+def index_posts(post_ids, backend=None):
+    (backend or get_backend()).index(documents(post_ids))
+
+
+def index_comments(comments, backend=None):
+    """Дописывает в индекс тексты новых комментариев."""
+    docs = defaultdict(list)
+    for comment in comments:
+        docs[comment.post_id].append(comment.text)
+    (backend or get_backend()).append({
+        post_id: '\n'.join(texts) for post_id, texts in docs.items()
+    })
+
+
+def remove_post(post_id):
+    get_backend().remove(post_id)
+
+
+def reindex(batch_size=BATCH_SIZE):
+    backend = get_backend()
+    backend.clear()
+    post_ids = Post.objects.order_by('pk').values_list('pk', flat=True)
+    batch = []
+    indexed = 0
+    for post_id in post_ids.iterator(chunk_size=batch_size):
+        batch.append(post_id)
+        if len(batch) == batch_size:
+            backend.index(documents(batch))
+            indexed += len(batch)
+            batch = []
+    if batch:
+        backend.index(documents(batch))
+        indexed += len(batch)
+    return indexed
@@ -0,0 +1,120 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from . import (counters, feed_cache, follow_graph, search, tasks,
+               thumbnails, timeline)
+from .models import Comment, Follow, Group, Post
+
+
+def _loaded(instance, attname):
+    # Через __dict__, чтобы не догружать отложенные поля.
+    value = instance.__dict__.get(attname)
+    return getattr(value, 'name', value)
+
+
+@receiver(post_init, sender=Post)
+def post_loaded(sender, instance, **kwargs):
+    instance._loaded_group_id = _loaded(instance, 'group_id')
+    instance._loaded_image = _loaded(instance, 'image')
+    instance._loaded_text = _loaded(instance, 'text')
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        counters.adjust_user(instance.author_id, 'posts_count', 1)
+        counters.adjust_group(instance.group_id, 1)
+        tasks.fan_out.enqueue(instance.pk, key=f'fan_out:{instance.pk}')
+    elif instance._loaded_group_id != instance.group_id:
+        counters.adjust_group(instance._loaded_group_id, -1)
+        counters.adjust_group(instance.group_id, 1)
+    if created or instance.image.name != instance._loaded_image:
+        thumbnails.schedule(instance.image.name)
+    if created or instance.text != instance._loaded_text:
+        tasks.index_post_later(instance.pk)
+    feed_cache.bump(
+        *feed_cache.post_scopes(instance, instance._loaded_group_id)
+    )
+    instance._loaded_group_id = instance.group_id
+    instance._loaded_image = instance.image.name
+    instance._loaded_text = instance.text
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    search.remove_post(instance.pk)
+    counters.adjust_user(instance.author_id, 'posts_count', -1)
+    counters.adjust_group(instance._loaded_group_id, -1)
+    feed_cache.bump(
+        *feed_cache.post_scopes(instance, instance._loaded_group_id)
+    )
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        counters.adjust_post(instance.post_id, 1)
+        search.index_comments([instance])
+    else:
+        # Прежний текст неизвестен: пост индексируется заново.
+        tasks.index_post_later(instance.post_id)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.adjust_post(instance.post_id, -1)
+    tasks.index_post_later(instance.post_id)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    try:
+        post = instance.post
+    except Post.DoesNotExist:
+        return
+    feed_cache.bump(*feed_cache.comment_scopes(post))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        feed_cache.bump('index', f'group:{instance.pk}')
+
+
+def _follow_changed(follow):
+    # Счётчики подписок видны на страницах обоих профилей.
+    feed_cache.bump(
+        f'following:{follow.user_id}',
+        f'profile:{follow.user_id}',
+        f'profile:{follow.author_id}',
+    )
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.adjust_user(instance.author_id, 'followers_count', 1)
+        counters.adjust_user(instance.user_id, 'following_count', 1)
+        follow_graph.invalidate(instance.user_id, instance.author_id)
+        tasks.backfill.enqueue(
+            instance.user_id, instance.author_id,
+            key=f'backfill:{instance.user_id}:{instance.author_id}',
+        )
+        _follow_changed(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    counters.adjust_user(instance.author_id, 'followers_count', -1)
+    counters.adjust_user(instance.user_id, 'following_count', -1)
+    follow_graph.invalidate(instance.user_id, instance.author_id)
+    timeline.prune(instance.user_id, instance.author_id)
+    _follow_changed(instance)
@@ -0,0 +1,36 @@
+"""Побочные эффекты записи, которые не нужны автору сразу.
+
+Ставятся в очередь utils.tasks из posts.signals: лента подписчиков и
+поисковый индекс обновляются воркером, а запрос на создание поста или
+комментария не ждёт их. Счётчики и версии кэша по-прежнему меняются
+синхронно — их автор видит на следующей же странице.
+"""
+from utils.tasks import task
+
+from . import search, timeline
+from .models import Follow, Post
+
+
+@task
+def fan_out(post_id):
+    post = Post.objects.filter(pk=post_id).only(
+        'pk', 'author_id', 'pub_date').first()
+    if post is not None:
+        timeline.fan_out(post)
+
+
+@task
+def backfill(user_id, author_id):
+    # Подписку могли отменить, пока задача ждала в очереди.
+    if Follow.objects.filter(user_id=user_id, author_id=author_id).exists():
+        timeline.backfill(user_id, author_id)
+
+
+@task
+def index_post(post_id):
+    search.index_posts([post_id])
+
+
+def index_post_later(post_id):
+    # Комментарии к одному посту сливаются в одну переиндексацию.
+    index_post.enqueue(post_id, key=f'search:{post_id}')
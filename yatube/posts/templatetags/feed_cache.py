@@ -0,0 +1,39 @@
+from django import template
+
+from .. import feed_cache
+
+register = template.Library()
+
+
+class FeedCacheNode(template.Node):
+    def __init__(self, nodelist, scope_parts):
+        self.nodelist = nodelist
+        self.scope_parts = scope_parts
+
+    def render(self, context):
+        scope = ':'.join(
+            str(part.resolve(context)) for part in self.scope_parts
+        )
+        key = feed_cache.fragment_key(
+            scope, context['request'].get_full_path()
+        )
+        fragment = feed_cache.get_fragment(key)
+        if fragment is None:
+            fragment = self.nodelist.render(context)
+            feed_cache.set_fragment(key, fragment)
+        return fragment
+
+
+@register.tag
+def feedcache(parser, token):
+    """{% feedcache 'group' group.pk %} ... {% endfeedcache %}"""
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' tag requires at least one scope argument."
+        )
+    nodelist = parser.parse(('endfeedcache',))
+    parser.delete_first_token()
+    return FeedCacheNode(
+        nodelist, [parser.compile_filter(bit) for bit in bits[1:]]
+    )
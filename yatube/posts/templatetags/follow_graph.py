@@ -0,0 +1,21 @@
+from django import template
+
+from .. import follow_graph
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def followed_authors(context, posts):
+    """Id авторов страницы, на которых подписан текущий пользователь.
+
+    {% followed_authors page_obj as followed %} и затем
+    {% if post.author_id in followed %} — без запросов на каждый пост.
+    """
+    user = context.get('user')
+    if user is None:
+        return set()
+    following = follow_graph.following_many(
+        user, {post.author_id for post in posts}
+    )
+    return {author_id for author_id, value in following.items() if value}
@@ -0,0 +1,67 @@
+from django import template
+
+from .. import image_variants, thumbnails
+from ..models import PostImageVariant
+
+register = template.Library()
+
+FALLBACK_GEOMETRY = '960x339'
+DEFAULT_SIZES = '(max-width: 992px) 100vw, 960px'
+
+
+@register.simple_tag
+def ready_thumbnail(image, geometry_string):
+    """Готовая миниатюра или заглушка того же размера, если её ещё нет.
+
+    Картинка на пути запроса не декодируется: недостающая миниатюра
+    ставится в очередь генерации.
+    """
+    if not image:
+        return None
+    thumbnail = thumbnails.ready_thumbnail(image.name, geometry_string)
+    if thumbnail:
+        return thumbnail
+    thumbnails.schedule(image.name)
+    return thumbnails.Placeholder(geometry_string)
+
+
+@register.inclusion_tag('posts/includes/picture.html', takes_context=True)
+def post_picture(context, image, sizes=DEFAULT_SIZES):
+    """<picture> со srcset из PostImageVariant.
+
+    Варианты всех картинок страницы (page_obj или post) читаются одним
+    запросом при первом вызове и запоминаются в запросе. Пока вариантов
+    нет, выводится миниатюра 960x339 или заглушка.
+    """
+    if not image:
+        return {}
+    request = context.get('request')
+    known = getattr(request, 'image_variants', None)
+    if known is None or image.name not in known:
+        found = image_variants.lookup({image.name, *_page_images(context)})
+        # Картинки без вариантов покажут миниатюру: её записи тоже
+        # читаются для всей страницы сразу.
+        thumbnails.prefetch([
+            name for name, formats in found.items()
+            if not formats.get(PostImageVariant.JPEG)
+        ], FALLBACK_GEOMETRY)
+        known = {**(known or {}), **found}
+        if request is not None:
+            request.image_variants = known
+    variants = known.get(image.name) or {}
+    jpeg = variants.get(PostImageVariant.JPEG)
+    if not jpeg:
+        return {'thumbnail': ready_thumbnail(image, FALLBACK_GEOMETRY)}
+    return {
+        'webp': variants.get(PostImageVariant.WEBP),
+        'jpeg': jpeg,
+        'fallback': jpeg[-1],
+        'sizes': sizes,
+    }
+
+
+def _page_images(context):
+    posts = list(getattr(context.get('page_obj'), 'object_list', ()))
+    if context.get('post') is not None:
+        posts.append(context['post'])
+    return [post.image.name for post in posts if post.image]
@@ -0,0 +1,104 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+
+NUM_OF_POSTS: int = 13
+
+
+class FeedApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='post_author')
+        cls.reader = User.objects.create(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание'
+        )
+        for number in range(NUM_OF_POSTS):
+            Post.objects.create(
+                author=cls.author,
+                text=f'Пост {number}',
+                group=cls.group,
+            )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def test_feeds_return_compact_cursor_pages(self):
+        """API лент отдаёт посты страницами по курсору"""
+        urls = (
+            (self.client, reverse('posts:api_index')),
+            (self.client, reverse('posts:api_group_list',
+                                  args=[self.group.slug])),
+            (self.authorized_client, reverse('posts:api_follow_index')),
+        )
+        for client, url in urls:
+            with self.subTest(url=url):
+                first = client.get(url).json()
+                self.assertEqual(len(first['results']), 10)
+                self.assertEqual(first['results'][0]['text'], 'Пост 12')
+                self.assertEqual(
+                    first['results'][0]['author'], self.author.username)
+                second = client.get(url, {'cursor': first['next']}).json()
+                self.assertEqual(len(second['results']), 3)
+                self.assertIsNone(second['next'])
+
+    def test_unchanged_feed_is_not_modified(self):
+        """Повторный опрос без изменений получает 304 без основного запроса"""
+        url = reverse('posts:api_index')
+        response = self.client.get(url)
+        self.assertTrue(response.has_header('ETag'))
+        self.assertTrue(response.has_header('Last-Modified'))
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_comment_changes_etag_of_feeds_with_its_post(self):
+        """Число комментариев в JSON-лентах не устаревает"""
+        url = reverse('posts:api_group_list', args=[self.group.slug])
+        etag = self.client.get(url)['ETag']
+        Comment.objects.create(
+            post=Post.objects.get(text='Пост 12'), author=self.reader,
+            text='Комментарий',
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['comments'], 1)
+
+    def test_etag_changes_when_feed_changes(self):
+        """Правка поста и новая подписка меняют ETag лент"""
+        index_url = reverse('posts:api_index')
+        follow_url = reverse('posts:api_follow_index')
+        index_etag = self.client.get(index_url)['ETag']
+        follow_etag = self.authorized_client.get(follow_url)['ETag']
+        post = Post.objects.get(text='Пост 0')
+        post.text = 'Изменённый пост'
+        post.save()
+        self.assertNotEqual(self.client.get(index_url)['ETag'], index_etag)
+        follow_etag_edited = self.authorized_client.get(follow_url)['ETag']
+        self.assertNotEqual(follow_etag_edited, follow_etag)
+        Follow.objects.create(
+            user=self.reader,
+            author=User.objects.create(username='another_author'),
+        )
+        response = self.authorized_client.get(
+            follow_url, HTTP_IF_NONE_MATCH=follow_etag_edited)
+        self.assertEqual(response.status_code, 200)
+
+    def test_follow_feed_requires_authentication(self):
+        response = self.client.get(reverse('posts:api_follow_index'))
+        self.assertEqual(response.status_code, 401)
+
+    def test_unknown_group_is_not_found(self):
+        response = self.client.get(
+            reverse('posts:api_group_list', args=['missing']))
+        self.assertEqual(response.status_code, 404)
@@ -3,6 +3,7 @@ from django.test import Client, TestCase
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
 
+from .. import feed_cache
 from ..models import Comment, Group, Post, User
 
 
@@ -61,3 +62,68 @@ class PostPagesTests(TestCase):
         response_2 = self.authorized_client.get(reverse("posts:index"))
         response_2_context = response_2.content
         self.assertNotEqual(response_1_context, response_2_context)
+
+
+class FeedCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='post_author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание'
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other_slug',
+            description='Тестовое описание'
+        )
+        for number in range(13):
+            cls.post = Post.objects.create(
+                author=cls.user,
+                text=f'Тестовый пост {number}',
+                group=cls.group,
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_pages_are_cached_separately(self):
+        """Каждая страница ленты кэшируется под своим ключом"""
+        first = self.client.get(reverse('posts:index'))
+        second = self.client.get(reverse('posts:index'), {'page': 2})
+        self.assertNotEqual(first.content, second.content)
+        self.assertContains(second, 'Тестовый пост 0')
+        self.assertNotContains(first, 'Тестовый пост 0<')
+
+    def test_new_post_invalidates_feeds(self):
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:profile', args=[self.user]))
+        Post.objects.create(author=self.user, text='Свежий пост')
+        for url in (
+            reverse('posts:index'),
+            reverse('posts:profile', args=[self.user]),
+        ):
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), 'Свежий пост')
+
+    def test_moving_post_invalidates_old_group(self):
+        url = reverse('posts:group_list', args=[self.group.slug])
+        self.assertContains(self.client.get(url), self.post.text)
+        self.post.group = self.other_group
+        self.post.save()
+        self.assertNotContains(self.client.get(url), self.post.text)
+        self.assertContains(
+            self.client.get(
+                reverse('posts:group_list', args=[self.other_group.slug])),
+            self.post.text,
+        )
+
+    def test_hit_and_miss_counters(self):
+        # Анонимам страницу целиком отдаёт page_cache, поэтому
+        # фрагменты проверяем на авторизованном клиенте.
+        self.client.force_login(self.user)
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        self.assertEqual(feed_cache.stats(), {'hits': 1, 'misses': 1})
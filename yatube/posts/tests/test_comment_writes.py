@@ -0,0 +1,108 @@
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import comment_buffer
+from ..models import Comment, Post, User
+
+
+class CommentWriteTestMixin:
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='commentator')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def comment(self, post_id, text='Комментарий'):
+        return self.client.post(
+            reverse('posts:add_comment', args=[post_id]), {'text': text}
+        )
+
+
+@override_settings(COMMENT_BATCH_WINDOW=0.01)
+class BatchedCommentTests(CommentWriteTestMixin, TestCase):
+    def test_author_sees_comment_right_after_redirect(self):
+        response = self.comment(self.post.pk, 'Сразу видно')
+        self.assertRedirects(
+            response, reverse('posts:post_detail', args=[self.post.pk]))
+        detail = self.client.get(response.url)
+        self.assertEqual(
+            [comment.text for comment in detail.context['comments']],
+            ['Сразу видно'],
+        )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+
+    def test_comment_to_missing_post_is_not_found(self):
+        self.assertEqual(self.comment(self.post.pk + 100).status_code, 404)
+        self.assertFalse(Comment.objects.exists())
+
+    def test_flush_writes_batch_with_one_insert(self):
+        other = Post.objects.create(author=self.user, text='Второй пост')
+        comments = [
+            Comment(post_id=post.pk, author=self.user, text='Пачка')
+            for post in (self.post, other, self.post)
+        ]
+        with CaptureQueriesContext(connection) as captured:
+            comment_buffer.flush(comments)
+        inserts = [
+            query for query in captured
+            if query['sql'].startswith('INSERT INTO "posts_comment"')
+        ]
+        self.assertEqual(len(inserts), 1)
+        self.post.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.post.comments_count, other.comments_count),
+                         (2, 1))
+
+    @override_settings(COMMENT_BATCH_WINDOW=5, COMMENT_BATCH_SIZE=3)
+    def test_concurrent_comments_share_one_flush(self):
+        results = []
+
+        def follower():
+            while comment_buffer._batch is None:
+                time.sleep(0.001)
+            results.append(comment_buffer.submit(
+                Comment(post_id=self.post.pk, author=self.user, text='Ещё')
+            ))
+
+        threads = [threading.Thread(target=follower) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        started = time.monotonic()
+        # Первый комментарий ведущий: пачку записывает этот поток.
+        self.assertTrue(comment_buffer.submit(
+            Comment(post_id=self.post.pk, author=self.user, text='Первый')
+        ))
+        for thread in threads:
+            thread.join()
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(results, [True, True])
+        self.assertEqual(Comment.objects.filter(post=self.post).count(), 3)
+
+
+@override_settings(COMMENT_RATE=1, COMMENT_BURST=2)
+class CommentRateLimitTests(CommentWriteTestMixin, TestCase):
+    def test_burst_over_limit_gets_429(self):
+        for _ in range(2):
+            self.assertEqual(self.comment(self.post.pk).status_code, 302)
+        response = self.comment(self.post.pk)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertTemplateUsed(response, 'core/429.html')
+        self.assertEqual(Comment.objects.count(), 2)
+
+    def test_limit_is_per_user(self):
+        for _ in range(2):
+            self.comment(self.post.pk)
+        self.client.force_login(User.objects.create(username='other'))
+        self.assertEqual(self.comment(self.post.pk).status_code, 302)
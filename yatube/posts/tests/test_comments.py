@@ -0,0 +1,75 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Post, User
+
+NUM_OF_COMMENTS: int = 7
+PER_PAGE: int = 3
+
+
+@override_settings(COMMENTS_PER_PAGE=PER_PAGE)
+class PostCommentsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='post_author')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+        cls.quiet_post = Post.objects.create(
+            author=cls.user, text='Пост без обсуждения')
+        for number in range(NUM_OF_COMMENTS):
+            Comment.objects.create(
+                post=cls.post,
+                author=User.objects.create(username=f'reader_{number}'),
+                text=f'Комментарий {number}',
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def count_queries(self, post):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(
+                reverse('posts:post_detail', args=[post.pk]))
+        return len(captured), response
+
+    def test_post_detail_queries_do_not_grow_with_comments(self):
+        """Число запросов post_detail не зависит от числа комментариев"""
+        quiet_queries, _ = self.count_queries(self.quiet_post)
+        busy_queries, response = self.count_queries(self.post)
+        self.assertEqual(busy_queries, quiet_queries)
+        self.assertEqual(len(response.context['comments']), PER_PAGE)
+        self.assertIsNotNone(response.context['comments_next'])
+
+    def test_load_more_endpoint_pages_through_comments(self):
+        url = reverse('posts:post_comments', args=[self.post.pk])
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk]))
+        texts = [comment.text for comment in response.context['comments']]
+        cursor = response.context['comments_next']
+        while cursor:
+            data = self.client.get(url, {'cursor': cursor}).json()
+            texts.extend(comment['text'] for comment in data['comments'])
+            cursor = data['next']
+        self.assertEqual(
+            texts,
+            [f'Комментарий {number}' for number in range(NUM_OF_COMMENTS)]
+        )
+
+    def test_no_js_fallback_renders_next_comments(self):
+        first = self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk]))
+        second = self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk]),
+            {'comments': first.context['comments_next']},
+        )
+        self.assertEqual(
+            second.context['comments'][0].text, f'Комментарий {PER_PAGE}')
+
+    def test_load_more_endpoint_for_missing_post_is_not_found(self):
+        response = self.client.get(
+            reverse('posts:post_comments', args=[self.post.pk + 100]))
+        self.assertEqual(response.status_code, 404)
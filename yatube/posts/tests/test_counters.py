@@ -0,0 +1,81 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User, UserStats
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='post_author')
+        cls.reader = User.objects.create(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост',
+            group=cls.group,
+        )
+
+    def refresh(self):
+        self.post.refresh_from_db()
+        self.group.refresh_from_db()
+        return UserStats.objects.get(user=self.user)
+
+    def test_post_counters_follow_create_and_delete(self):
+        """Счётчики постов автора и группы меняются вместе с постами"""
+        extra = Post.objects.create(
+            author=self.user, text='Ещё пост', group=self.group)
+        stats = self.refresh()
+        self.assertEqual(stats.posts_count, 2)
+        self.assertEqual(self.group.posts_count, 2)
+        extra.delete()
+        stats = self.refresh()
+        self.assertEqual(stats.posts_count, 1)
+        self.assertEqual(self.group.posts_count, 1)
+
+    def test_moving_post_between_groups(self):
+        other = Group.objects.create(
+            title='Другая группа', slug='other', description='Описание')
+        self.post.group = other
+        self.post.save()
+        other.refresh_from_db()
+        self.refresh()
+        self.assertEqual(self.group.posts_count, 0)
+        self.assertEqual(other.posts_count, 1)
+
+    def test_comment_and_follow_counters(self):
+        comment = Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий')
+        Follow.objects.create(user=self.reader, author=self.user)
+        stats = self.refresh()
+        self.assertEqual(self.post.comments_count, 1)
+        self.assertEqual(stats.followers_count, 1)
+        self.assertEqual(
+            UserStats.objects.get(user=self.reader).following_count, 1)
+        comment.delete()
+        Follow.objects.all().delete()
+        stats = self.refresh()
+        self.assertEqual(self.post.comments_count, 0)
+        self.assertEqual(stats.followers_count, 0)
+
+    def test_reconcile_fixes_drifted_counters(self):
+        UserStats.objects.filter(user=self.user).update(posts_count=42)
+        Group.objects.update(posts_count=7)
+        call_command('reconcile_counters', batch_size=1, stdout=StringIO())
+        stats = self.refresh()
+        self.assertEqual(stats.posts_count, 1)
+        self.assertEqual(self.group.posts_count, 1)
+
+    def test_profile_reads_stored_counter(self):
+        UserStats.objects.filter(user=self.user).update(posts_count=42)
+        response = self.client.get(
+            reverse('posts:profile', args=[self.user]))
+        self.assertEqual(response.context['posts_count'], 42)
@@ -0,0 +1,88 @@
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+
+NUM_OF_POSTS: int = 5
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='post_author')
+        cls.reader = User.objects.create(username='reader')
+        cls.admin = User.objects.create(username='admin', is_staff=True)
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание'
+        )
+        for number in range(NUM_OF_POSTS):
+            post = Post.objects.create(
+                author=cls.user,
+                text=f'Пост {number}, с запятой',
+                group=cls.group,
+            )
+        Comment.objects.create(post=post, author=cls.reader, text='Ответ')
+        Follow.objects.create(user=cls.reader, author=cls.user)
+
+    def setUp(self):
+        self.admin_client = Client()
+        self.admin_client.force_login(self.admin)
+
+    def test_view_streams_ndjson(self):
+        """Администратор получает посты построчно в NDJSON"""
+        response = self.admin_client.get(
+            reverse('posts:export', args=['posts']))
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual(len(rows), NUM_OF_POSTS)
+        self.assertEqual(rows[0]['author'], self.user.username)
+        self.assertEqual(rows[0]['group'], self.group.slug)
+        self.assertEqual(rows[0]['text'], 'Пост 0, с запятой')
+
+    def test_view_streams_gzipped_csv(self):
+        response = self.admin_client.get(
+            reverse('posts:export', args=['comments']),
+            {'format': 'csv', 'gzip': '1'},
+        )
+        self.assertIn('comments.csv.gz', response['Content-Disposition'])
+        data = gzip.decompress(b''.join(response.streaming_content))
+        rows = list(csv.DictReader(io.StringIO(data.decode())))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['author'], self.reader.username)
+
+    def test_view_is_admin_only(self):
+        """Выгрузка недоступна обычным пользователям"""
+        client = Client()
+        client.force_login(self.reader)
+        url = reverse('posts:export', args=['follows'])
+        self.assertEqual(client.get(url).status_code, 302)
+        unknown = self.admin_client.get(
+            reverse('posts:export', args=['users']))
+        self.assertEqual(unknown.status_code, 404)
+
+    def test_command_writes_all_tables(self):
+        with tempfile.TemporaryDirectory() as directory:
+            call_command(
+                'export', output=directory, chunk_size=2, stderr=StringIO()
+            )
+            self.assertEqual(
+                sorted(os.listdir(directory)),
+                ['comments.ndjson', 'follows.ndjson', 'groups.ndjson',
+                 'posts.ndjson'],
+            )
+            with open(os.path.join(directory, 'posts.ndjson')) as posts:
+                self.assertEqual(len(posts.readlines()), NUM_OF_POSTS)
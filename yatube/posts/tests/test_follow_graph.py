@@ -0,0 +1,97 @@
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connection
+from django.template import Context, Template
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import follow_graph
+from ..models import Follow, Post, User
+
+
+class FollowGraphTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='post_author')
+        cls.other_author = User.objects.create(username='other_author')
+        cls.reader = User.objects.create(username='reader')
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_membership_is_cached_and_invalidated(self):
+        """Проверка подписки берётся из кэша и сбрасывается сигналами"""
+        self.assertFalse(
+            follow_graph.is_following(self.reader, self.author.pk))
+        Follow.objects.create(user=self.reader, author=self.author)
+        with self.assertNumQueries(1):
+            self.assertTrue(
+                follow_graph.is_following(self.reader, self.author.pk))
+        with self.assertNumQueries(0):
+            self.assertTrue(
+                follow_graph.is_following(self.reader, self.author.pk))
+            self.assertEqual(
+                follow_graph.following_many(
+                    self.reader, [self.author.pk, self.other_author.pk]),
+                {self.author.pk: True, self.other_author.pk: False},
+            )
+        self.reader_client.get(reverse(
+            'posts:profile_unfollow', kwargs={'username': self.author}))
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(
+            follow_graph.is_following(self.reader, self.author.pk))
+        self.assertFalse(
+            follow_graph.is_following(AnonymousUser(), self.author.pk))
+
+    def test_followers_counts(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        counts = follow_graph.followers_counts(
+            [self.author.pk, self.other_author.pk])
+        self.assertEqual(counts, {self.author.pk: 1, self.other_author.pk: 0})
+        Follow.objects.create(user=self.other_author, author=self.author)
+        self.assertEqual(follow_graph.followers_count(self.author.pk), 2)
+
+    def test_followed_authors_tag(self):
+        """Тег отмечает авторов всей страницы одним обращением к кэшу"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        posts = [
+            Post.objects.create(author=self.author, text='Пост'),
+            Post.objects.create(author=self.other_author, text='Другой пост'),
+        ]
+        follow_graph.following(self.reader.pk)
+        template = Template(
+            '{% load follow_graph %}'
+            '{% followed_authors posts as followed %}'
+            '{% for post in posts %}'
+            '{% if post.author_id in followed %}+{% else %}-{% endif %}'
+            '{% endfor %}'
+        )
+        with self.assertNumQueries(0):
+            rendered = template.render(
+                Context({'posts': posts, 'user': self.reader}))
+        self.assertEqual(rendered, '+-')
+
+    def test_search_page_shows_follow_buttons_from_cache(self):
+        """Кнопки подписки для страницы постов не делают запросов к Follow"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        Post.objects.create(author=self.author, text='Котик автора')
+        Post.objects.create(author=self.other_author, text='Котик другого')
+        follow_graph.following(self.reader.pk)
+        with CaptureQueriesContext(connection) as captured:
+            response = self.reader_client.get(
+                reverse('posts:search'), {'q': 'котик'})
+        self.assertContains(response, reverse(
+            'posts:profile_unfollow', args=[self.author.username]))
+        self.assertContains(response, reverse(
+            'posts:profile_follow', args=[self.other_author.username]))
+        self.assertEqual(
+            [
+                query['sql'] for query in captured
+                if 'posts_follow' in query['sql']
+            ],
+            [],
+        )
@@ -0,0 +1,103 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from .. import image_variants
+from ..models import Post, PostImageVariant, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def jpeg(name, size):
+    output = BytesIO()
+    Image.new('RGB', size, (30, 120, 200)).save(output, 'JPEG')
+    return SimpleUploadedFile(name, output.getvalue(), 'image/jpeg')
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0,
+    POST_IMAGE_VARIANT_WIDTHS=(480, 960, 1440),
+)
+class ImageVariantTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='post_author')
+        cls.post = Post.objects.create(
+            author=cls.user, text='Большая картинка',
+            image=jpeg('big.jpg', (1200, 800)),
+        )
+        cls.small = Post.objects.create(
+            author=cls.user, text='Маленькая картинка',
+            image=jpeg('small.jpg', (300, 300)),
+        )
+        # on_commit в TestCase не срабатывает.
+        for post in (cls.post, cls.small):
+            image_variants.build(post.image.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def variants(self, post, fmt=PostImageVariant.JPEG):
+        return PostImageVariant.objects.filter(
+            source=post.image.name, format=fmt).order_by('width')
+
+    def test_variants_are_built_without_upscaling(self):
+        """Варианты не шире оригинала и в пропорциях ленты"""
+        self.assertEqual(
+            [(v.width, v.height) for v in self.variants(self.post)],
+            [(480, 170), (960, 339)],
+        )
+        self.assertEqual(
+            [(v.width, v.height) for v in self.variants(self.small)],
+            [(300, 106)],
+        )
+        for variant in self.variants(self.post):
+            with Image.open(variant.file.path) as image:
+                self.assertEqual(image.size, (variant.width, variant.height))
+        self.assertEqual(
+            self.variants(self.post, PostImageVariant.WEBP).exists(),
+            PostImageVariant.WEBP in image_variants.formats(),
+        )
+
+    def test_build_is_idempotent(self):
+        self.assertEqual(image_variants.build(self.post.image.name), [])
+
+    def test_lookup_reads_page_variants_in_one_query(self):
+        names = [self.post.image.name, self.small.image.name]
+        with self.assertNumQueries(1):
+            found = image_variants.lookup(names)
+        with self.assertNumQueries(0):
+            self.assertEqual(image_variants.lookup(names), found)
+        self.assertEqual(
+            [variant.width for variant in found[names[0]]['jpeg']],
+            [480, 960],
+        )
+
+    def test_page_renders_srcset_with_dimensions(self):
+        response = self.client.get(reverse('posts:index'))
+        largest = self.variants(self.post).last()
+        self.assertContains(response, 'srcset="')
+        self.assertContains(response, f'{largest.file.url} 960w')
+        self.assertContains(
+            response, f'src="{largest.file.url}" sizes="')
+        self.assertContains(response, 'width="960" height="339"')
+
+    def test_build_purges_cached_pages(self):
+        PostImageVariant.objects.filter(source=self.post.image.name).delete()
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        self.assertNotContains(self.client.get(url), 'srcset=')
+        image_variants.build(self.post.image.name)
+        self.assertContains(self.client.get(url), 'srcset=')
@@ -0,0 +1,133 @@
+import gzip
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from .. import search
+from ..models import (Comment, Follow, Group, Post, TimelineEntry, User,
+                      UserStats)
+
+NUM_OF_POSTS: int = 4
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+class ImportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='post_author')
+        cls.reader = User.objects.create(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание'
+        )
+
+    def test_export_round_trip(self):
+        """Выгрузка export загружается обратно вместе со связями"""
+        for number in range(NUM_OF_POSTS):
+            post = Post.objects.create(
+                author=self.user, text=f'Пост {number}', group=self.group)
+        Comment.objects.create(
+            post=post, author=self.reader, text='Неожиданный ответ')
+        Follow.objects.create(user=self.reader, author=self.user)
+        with tempfile.TemporaryDirectory() as directory:
+            call_command('export', output=directory, stderr=StringIO())
+            Post.objects.all().delete()
+            Follow.objects.all().delete()
+            Group.objects.all().delete()
+            call_command('import', directory, batch_size=3, stdout=StringIO())
+        self.assertEqual(Post.objects.count(), NUM_OF_POSTS)
+        self.assertTrue(
+            Post.objects.filter(group__slug=self.group.slug).exists())
+        comment = Comment.objects.get()
+        self.assertEqual(comment.post.text, f'Пост {NUM_OF_POSTS - 1}')
+        self.assertEqual(comment.post.comments_count, 1)
+        self.assertEqual(
+            UserStats.objects.get(user=self.user).posts_count, NUM_OF_POSTS)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(),
+            NUM_OF_POSTS,
+        )
+        self.assertEqual(search.search('неожиданный').count(), 1)
+
+    def test_gzipped_csv_creates_missing_authors_and_groups(self):
+        rows = (
+            'id,author,group,pub_date,text,image\n'
+            '1,new_author,new_group,2020-01-01T00:00:00+00:00,Пост,\n'
+            '2,post_author,,,Ещё пост,\n'
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'external.csv.gz')
+            with gzip.open(path, 'wt') as source:
+                source.write(rows)
+            call_command('import', path, table='posts', stdout=StringIO())
+        post = Post.objects.get(author__username='new_author')
+        self.assertEqual(post.group.slug, 'new_group')
+        self.assertEqual(post.pub_date.year, 2020)
+        self.assertIsNone(Post.objects.get(text='Ещё пост').group)
+
+    def test_rows_without_author_are_skipped(self):
+        """Строки с пустым автором пропускаются, а не роняют загрузку"""
+        with tempfile.TemporaryDirectory() as directory:
+            for name, rows in (
+                ('posts.csv', 'id,author,group,pub_date,text,image\n'
+                              '1,,,,Без автора,\n'
+                              '2,post_author,,,С автором,\n'),
+                ('comments.csv', 'post,author,created,text\n'
+                                 '2,,,Без автора\n'
+                                 '2,reader,,С автором\n'),
+                ('follows.csv', 'user,author\n'
+                                ',post_author\n'
+                                'reader,post_author\n'),
+            ):
+                with open(os.path.join(directory, name), 'w') as source:
+                    source.write(rows)
+            output = StringIO()
+            call_command('import', directory, stdout=output)
+        self.assertEqual(
+            list(Post.objects.values_list('text', flat=True)), ['С автором'])
+        self.assertEqual(
+            list(Comment.objects.values_list('text', flat=True)),
+            ['С автором'],
+        )
+        self.assertTrue(Follow.objects.filter(
+            user=self.reader, author=self.user).exists())
+        self.assertEqual(Follow.objects.count(), 1)
+        for name in ('posts', 'comments', 'follows'):
+            self.assertRegex(
+                output.getvalue(), rf'{name}: 1 rows .* 1 skipped')
+
+    def test_images_outside_image_directory_are_not_read(self):
+        """Имена вида ../файл не выводят за каталог картинок"""
+        rows = (
+            'id,author,group,pub_date,text,image\n'
+            '1,post_author,,,Своя картинка,small.gif\n'
+            '2,post_author,,,Чужой файл,../secret.gif\n'
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            images = os.path.join(directory, 'images')
+            media = os.path.join(directory, 'media')
+            os.mkdir(images)
+            for path in (os.path.join(images, 'small.gif'),
+                         os.path.join(directory, 'secret.gif')):
+                with open(path, 'wb') as image:
+                    image.write(SMALL_GIF)
+            path = os.path.join(directory, 'posts.csv')
+            with open(path, 'w') as source:
+                source.write(rows)
+            with override_settings(MEDIA_ROOT=media):
+                call_command(
+                    'import', path, images=images, stdout=StringIO())
+        self.assertTrue(Post.objects.get(text='Своя картинка').image)
+        self.assertFalse(Post.objects.get(text='Чужой файл').image)
@@ -0,0 +1,105 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+
+
+class AnonymousPageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='post_author')
+        cls.reader = User.objects.create(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text='Тестовый пост', group=cls.group)
+        cls.other_post = Post.objects.create(
+            author=cls.reader, text='Пост читателя')
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, url, client=None):
+        return (client or self.client).get(url)
+
+    def test_second_anonymous_request_is_served_from_cache(self):
+        """Повторный запрос анонима не делает ни одного SQL-запроса"""
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        first = self.get(url)
+        self.assertEqual(first['X-Page-Cache'], 'miss')
+        with self.assertNumQueries(0):
+            second = self.get(url)
+        self.assertEqual(second['X-Page-Cache'], 'hit')
+        self.assertEqual(second.content, first.content)
+        self.assertIn('public', second['Cache-Control'])
+        self.assertIn('s-maxage', second['Cache-Control'])
+        self.assertIn('Cookie', second['Vary'])
+
+    def test_query_string_is_part_of_key(self):
+        url = reverse('posts:index')
+        self.get(url)
+        self.assertEqual(self.get(url + '?page=2')['X-Page-Cache'], 'miss')
+
+    def test_authenticated_users_bypass_cache(self):
+        client = Client()
+        client.force_login(self.reader)
+        url = reverse('posts:index')
+        self.get(url)
+        response = self.get(url, client)
+        self.assertFalse(response.has_header('X-Page-Cache'))
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_comment_purges_only_its_post(self):
+        """Комментарий сбрасывает только страницу своего поста"""
+        detail = reverse('posts:post_detail', args=[self.post.pk])
+        untouched = (
+            reverse('posts:post_detail', args=[self.other_post.pk]),
+            reverse('posts:profile', args=[self.reader]),
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.user]),
+        )
+        for url in (detail, *untouched):
+            self.get(url)
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Свежий комментарий')
+        response = self.get(detail)
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertContains(response, 'Свежий комментарий')
+        for url in untouched:
+            with self.subTest(url=url):
+                self.assertEqual(self.get(url)['X-Page-Cache'], 'hit')
+
+    def test_post_changes_purge_dependent_pages(self):
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.user]),
+            reverse('posts:post_detail', args=[self.post.pk]),
+        )
+        unrelated = reverse('posts:profile', args=[self.reader])
+        for url in (*urls, unrelated):
+            self.get(url)
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(self.get(url), 'Исправленный пост')
+        self.assertEqual(self.get(unrelated)['X-Page-Cache'], 'hit')
+
+    def test_follow_purges_both_profiles(self):
+        urls = (
+            reverse('posts:profile', args=[self.user]),
+            reverse('posts:profile', args=[self.reader]),
+        )
+        for url in urls:
+            self.get(url)
+        Follow.objects.create(user=self.reader, author=self.user)
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.get(url)['X-Page-Cache'], 'miss')
@@ -0,0 +1,98 @@
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import timeline
+from ..models import Follow, Post, User
+from ..pagination import CursorPage, CursorPaginator, encode_cursor
+
+NUM_OF_POSTS: int = 25
+PER_PAGE: int = 10
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='post_author')
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Тестовый пост {number}')
+            for number in range(NUM_OF_POSTS)
+        )
+        cls.expected = list(
+            Post.objects.order_by('-pub_date', '-id').values_list(
+                'id', flat=True)
+        )
+
+    def test_walks_feed_without_gaps_and_duplicates(self):
+        """Курсор проходит ленту целиком в порядке (pub_date, id)"""
+        paginator = CursorPaginator(Post.objects.all(), PER_PAGE)
+        page = paginator.page()
+        seen = []
+        while True:
+            seen.extend(post.id for post in page)
+            if not page.has_next():
+                break
+            page = paginator.page(page.next_cursor)
+        self.assertEqual(seen, self.expected)
+        self.assertEqual(len(page), NUM_OF_POSTS % PER_PAGE)
+
+    def test_previous_cursor_returns_previous_page(self):
+        paginator = CursorPaginator(Post.objects.all(), PER_PAGE)
+        first = paginator.page()
+        second = paginator.page(first.next_cursor)
+        back = paginator.page(second.previous_cursor)
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+        self.assertTrue(back.has_next())
+
+    def test_timeline_is_paged_by_entry_key(self):
+        """Лента подписок листается по (pub_date, post) записей ленты"""
+        reader = User.objects.create(username='reader')
+        Follow.objects.create(user=reader, author=self.user)
+        feed = timeline.feed(reader)
+        paginator = CursorPaginator(feed, PER_PAGE)
+        first = paginator.page()
+        second = paginator.page(first.next_cursor)
+        self.assertEqual(
+            [post.id for post in (*first, *second)],
+            list(feed.values_list('id', flat=True)[:2 * PER_PAGE]),
+        )
+        back = paginator.page(second.previous_cursor)
+        self.assertEqual(list(back), list(first))
+
+    def test_page_past_the_end_has_no_cursors(self):
+        oldest = Post.objects.get(pk=self.expected[-1])
+        page = CursorPaginator(Post.objects.all(), PER_PAGE).page(
+            encode_cursor(oldest))
+        self.assertEqual(list(page), [])
+        self.assertFalse(page.has_other_pages())
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        page = CursorPaginator(Post.objects.all(), PER_PAGE).get_page('bad')
+        self.assertEqual(
+            [post.id for post in page], self.expected[:PER_PAGE])
+
+    def test_cursor_pages_skip_count_query(self):
+        paginator = CursorPaginator(Post.objects.all(), PER_PAGE)
+        cursor = paginator.page().next_cursor
+        with self.assertNumQueries(1):
+            list(paginator.page(cursor))
+
+    def test_views_use_cursor_page_on_request(self):
+        client = Client()
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:profile', kwargs={'username': self.user}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = client.get(url, {'cursor': ''})
+                page_obj = response.context['page_obj']
+                self.assertIsInstance(page_obj, CursorPage)
+                self.assertContains(response, page_obj.next_cursor)
+
+    @override_settings(POSTS_CURSOR_PAGINATION=True)
+    def test_setting_enables_cursor_pages_for_all_feeds(self):
+        response = Client().get(
+            reverse('posts:profile', kwargs={'username': self.user}))
+        self.assertIsInstance(response.context['page_obj'], CursorPage)
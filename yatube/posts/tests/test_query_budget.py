@@ -0,0 +1,56 @@
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.testing import QueryBudgetMixin
+from ..models import Comment, Follow, Group, Post, User
+
+NUM_OF_POSTS: int = 13
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.authors = [
+            User.objects.create(username=f'author_{number}')
+            for number in range(3)
+        ]
+        cls.follower = User.objects.create(username='follower')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание'
+        )
+        for number in range(NUM_OF_POSTS):
+            cls.post = Post.objects.create(
+                author=cls.authors[number % len(cls.authors)],
+                text=f'Тестовый пост {number}',
+                group=cls.group,
+            )
+        for author in cls.authors:
+            Follow.objects.create(user=cls.follower, author=author)
+            Comment.objects.create(
+                post=cls.post, author=author, text='Комментарий')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.follower)
+
+    def test_views_stay_within_query_budget(self):
+        """Представления не превышают бюджет SQL-запросов из настроек"""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.authors[0]]),
+            reverse('posts:post_detail', args=[self.post.pk]),
+            reverse('posts:follow_index'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertWithinQueryBudget(response)
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertRegex(
+            response['Server-Timing'], r'^db;desc="\d+ queries";dur=')
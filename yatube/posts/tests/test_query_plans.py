@@ -0,0 +1,70 @@
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+from ..pagination import encode_cursor
+
+
+class QueryPlanTests(TestCase):
+    """Основные запросы лент идут по индексу и без сортировки во временном
+    B-дереве."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='post_author')
+        cls.follower = User.objects.create(username='follower')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text='Тестовый пост', group=cls.group)
+        Comment.objects.create(
+            post=cls.post, author=cls.follower, text='Комментарий')
+        Follow.objects.create(user=cls.follower, author=cls.user)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.follower)
+        self.cursor = encode_cursor(self.post)
+
+    def query_plan(self, url, table):
+        with CaptureQueriesContext(connection) as captured:
+            self.client.get(url)
+        queries = [
+            query['sql'] for query in captured.captured_queries
+            if query['sql'].startswith('SELECT')
+            and f'FROM "{table}"' in query['sql']
+            and 'COUNT(' not in query['sql']
+        ]
+        self.assertTrue(queries, f'{url} не выполняет запрос к {table}')
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + queries[-1])
+            return [row[-1] for row in cursor.fetchall()]
+
+    def test_feed_queries_use_indexes(self):
+        cases = (
+            (reverse('posts:index'), 'posts_post'),
+            (reverse('posts:index') + '?cursor=', 'posts_post'),
+            (reverse('posts:group_list', args=[self.group.slug]),
+             'posts_post'),
+            (reverse('posts:profile', args=[self.user]), 'posts_post'),
+            (reverse('posts:profile', args=[self.user]) + '?cursor=',
+             'posts_post'),
+            (reverse('posts:follow_index'), 'posts_post'),
+            (reverse('posts:follow_index') + '?cursor=', 'posts_post'),
+            (reverse('posts:follow_index') + f'?cursor={self.cursor}',
+             'posts_post'),
+            (reverse('posts:post_detail', args=[self.post.pk]),
+             'posts_comment'),
+        )
+        for url, table in cases:
+            with self.subTest(url=url):
+                plan = self.query_plan(url, table)
+                for step in plan:
+                    self.assertIn('USING', step, plan)
+                    self.assertNotIn('TEMP B-TREE', step, plan)
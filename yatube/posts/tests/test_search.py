@@ -0,0 +1,112 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import search
+from ..models import Comment, Post, SearchPosting, User
+
+
+class SearchTestsMixin:
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='post_author')
+        cls.cat_post = Post.objects.create(
+            author=cls.user, text='Котик спит на диване')
+        cls.many_cats = Post.objects.create(
+            author=cls.user, text='Котик и ещё котик, а рядом котик')
+        cls.river_post = Post.objects.create(
+            author=cls.user, text='Прогулка вдоль реки')
+        Comment.objects.create(
+            post=cls.river_post, author=cls.user, text='Красивый закат')
+
+    def found(self, query):
+        return list(search.search(query)[:10])
+
+    def test_finds_posts_ranked_by_relevance(self):
+        """Пост с большим числом совпадений выше в выдаче"""
+        self.assertEqual(self.found('котик'), [self.many_cats, self.cat_post])
+
+    def test_all_terms_must_match(self):
+        self.assertEqual(self.found('котик диване'), [self.cat_post])
+
+    def test_prefix_query(self):
+        self.assertEqual(self.found('прогул*'), [self.river_post])
+
+    def test_comment_text_is_indexed(self):
+        self.assertEqual(self.found('закат'), [self.river_post])
+        Comment.objects.create(
+            post=self.cat_post, author=self.user, text='Закат')
+        self.assertEqual(len(self.found('закат')), 2)
+
+    def test_new_comment_does_not_reread_post(self):
+        """Новый комментарий дописывается к документу поста"""
+        with CaptureQueriesContext(connection) as captured:
+            Comment.objects.create(
+                post=self.river_post, author=self.user, text='Котик у реки')
+        self.assertEqual(
+            [
+                query['sql'] for query in captured
+                if query['sql'].startswith('SELECT')
+                and 'posts_comment' in query['sql']
+            ],
+            [],
+        )
+        self.assertEqual(self.found('котик реки'), [self.river_post])
+
+    def test_edited_and_deleted_posts_leave_index(self):
+        post = Post.objects.get(pk=self.cat_post.pk)
+        post.text = 'Собака спит'
+        post.save()
+        self.assertEqual(self.found('котик'), [self.many_cats])
+        Post.objects.filter(pk=self.many_cats.pk).delete()
+        self.assertEqual(self.found('котик'), [])
+
+    def test_reindex_command(self):
+        search.get_backend().clear()
+        self.assertEqual(self.found('котик'), [])
+        call_command('reindex_search', batch_size=2, stdout=StringIO())
+        self.assertEqual(self.found('котик'), [self.many_cats, self.cat_post])
+
+    def test_search_view_paginates_results(self):
+        response = self.client.get(reverse('posts:search'), {'q': 'котик'})
+        self.assertEqual(response.context['page_obj'].paginator.count, 2)
+        self.assertEqual(
+            list(response.context['page_obj']),
+            [self.many_cats, self.cat_post],
+        )
+
+    @override_settings(POSTS_CURSOR_PAGINATION=True)
+    def test_search_view_ignores_cursor_pagination(self):
+        """Поиск листается по номерам страниц и при курсорной ленте"""
+        response = self.client.get(reverse('posts:search'), {'q': 'котик'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['page_obj'].paginator.count, 2)
+
+
+@override_settings(SEARCH_BACKEND='fts5')
+class Fts5SearchTests(SearchTestsMixin, TestCase):
+    pass
+
+
+@override_settings(SEARCH_BACKEND='inverted')
+class InvertedIndexSearchTests(SearchTestsMixin, TestCase):
+    def test_postings_are_stored(self):
+        self.assertTrue(SearchPosting.objects.filter(
+            term='котик', post=self.many_cats, frequency=3).exists())
+
+    def test_appended_postings_match_reindex(self):
+        Comment.objects.create(
+            post=self.many_cats, author=self.user, text='Котик, котик, закат')
+        appended = set(SearchPosting.objects.values_list(
+            'post', 'term', 'frequency'))
+        search.reindex()
+        self.assertEqual(
+            set(SearchPosting.objects.values_list(
+                'post', 'term', 'frequency')),
+            appended,
+        )
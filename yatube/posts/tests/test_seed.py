@@ -0,0 +1,29 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from .. import search
+from ..models import Comment, Follow, Group, Post, TimelineEntry, UserStats
+
+
+class SeedCommandTests(TestCase):
+    def test_seed_builds_consistent_dataset(self):
+        """seed создаёт данные и пересчитывает производные таблицы"""
+        call_command(
+            'seed', users=20, groups=3, posts=60, comments=100, follows=4,
+            stdout=StringIO(),
+        )
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 60)
+        self.assertEqual(Comment.objects.count(), 100)
+        self.assertTrue(Follow.objects.exists())
+        self.assertEqual(
+            sum(UserStats.objects.values_list('posts_count', flat=True)), 60
+        )
+        self.assertEqual(
+            sum(Post.objects.values_list('comments_count', flat=True)), 100
+        )
+        self.assertTrue(TimelineEntry.objects.exists())
+        word = Post.objects.first().text.split()[0].strip('.,')
+        self.assertGreater(search.search(word).count(), 0)
@@ -0,0 +1,105 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import thumbnails
+from ..models import Post, PostImageVariant, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='post_author')
+        small_gif = (
+            b'\x47\x49\x46\x38\x39\x61\x02\x00'
+            b'\x01\x00\x80\x00\x00\x00\x00\x00'
+            b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+            b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+            b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+            b'\x0A\x00\x3B'
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост',
+            image=SimpleUploadedFile(
+                name='small.gif', content=small_gif, content_type='image/gif'
+            ),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_missing_thumbnail_renders_placeholder(self):
+        """Пока миниатюры нет, страница отдаёт заглушку и не ресайзит"""
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'data:image/svg+xml')
+        self.assertEqual(
+            thumbnails.missing_sizes(self.post.image.name),
+            list(settings.POST_THUMBNAIL_SIZES),
+        )
+
+    def test_generated_variants_are_rendered(self):
+        thumbnails.generate(self.post.image.name)
+        variant = PostImageVariant.objects.get(
+            source=self.post.image.name, format=PostImageVariant.JPEG)
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk]))
+        self.assertContains(response, f'{variant.file.url} {variant.width}w')
+        self.assertNotContains(response, 'data:image/svg+xml')
+
+    def test_thumbnail_is_rendered_without_variants(self):
+        thumbnails.generate(self.post.image.name)
+        PostImageVariant.objects.all().delete()
+        cache.clear()
+        thumbnail = thumbnails.ready_thumbnail(
+            self.post.image.name, '960x339')
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk]))
+        self.assertContains(response, thumbnail.url)
+        self.assertNotContains(response, 'data:image/svg+xml')
+
+    def test_page_reads_thumbnail_records_in_one_query(self):
+        """Миниатюры картинок без вариантов ищутся одним запросом"""
+        for number in range(5):
+            Post.objects.create(
+                author=self.user, text=f'Пост {number}',
+                image=f'posts/missing_{number}.gif',
+            )
+        with CaptureQueriesContext(connection) as captured:
+            self.client.get(reverse('posts:index'))
+        kvstore_queries = [
+            query for query in captured
+            if 'thumbnail_kvstore' in query['sql']
+        ]
+        self.assertEqual(len(kvstore_queries), 1)
+
+    def test_command_generates_missing_thumbnails(self):
+        call_command('generate_thumbnails', workers=1, stdout=StringIO())
+        self.assertEqual(thumbnails.missing_sizes(self.post.image.name), [])
+
+    def test_command_processes_shared_image_once(self):
+        Post.objects.create(
+            author=self.user, text='Та же картинка', image=self.post.image.name
+        )
+        output = StringIO()
+        call_command('generate_thumbnails', workers=1, stdout=output)
+        self.assertEqual(
+            output.getvalue(), 'Generated thumbnails for 1 images\n')
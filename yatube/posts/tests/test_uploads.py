@@ -0,0 +1,110 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from .. import uploads
+from ..models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def image_upload(name='photo.jpg', size=(300, 200), fmt='JPEG', mode='RGB',
+                 **save):
+    output = BytesIO()
+    color = (0, 220, 220, 0) if mode == 'CMYK' else (200, 30, 30)
+    Image.new(mode, size, color).save(output, fmt, **save)
+    return SimpleUploadedFile(
+        name, output.getvalue(), content_type=f'image/{fmt.lower()}')
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0, POST_IMAGE_MAX_SIDE=100
+)
+class ImageUploadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='post_author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def create_post(self, image):
+        self.client.post(
+            reverse('posts:post_create'), {'text': 'Пост', 'image': image})
+        return Post.objects.latest('pk')
+
+    def test_large_image_is_downscaled_without_metadata(self):
+        """Оригинал уменьшается, EXIF не сохраняется"""
+        exif = Image.Exif()
+        exif[0x010F] = 'Телефон'
+        post = self.create_post(
+            image_upload(size=(800, 400), exif=exif.tobytes()))
+        with Image.open(post.image.path) as stored:
+            self.assertEqual(stored.size, (100, 50))
+            self.assertEqual(stored.format, 'JPEG')
+            self.assertEqual(dict(stored.getexif()), {})
+        self.assertRegex(post.image.name, r'^posts/[0-9a-f]{64}\.jpg$')
+
+    def test_exif_orientation_is_applied(self):
+        exif = Image.Exif()
+        exif[uploads.EXIF_ORIENTATION] = 6
+        post = self.create_post(
+            image_upload(size=(80, 40), exif=exif.tobytes()))
+        with Image.open(post.image.path) as stored:
+            self.assertEqual(stored.size, (40, 80))
+
+    def test_cmyk_image_loses_its_icc_profile(self):
+        """После перевода CMYK в RGB профиль CMYK не сохраняется"""
+        post = self.create_post(image_upload(
+            mode='CMYK', icc_profile=b'cmyk profile'))
+        with Image.open(post.image.path) as stored:
+            self.assertEqual(stored.mode, 'RGB')
+            self.assertNotIn('icc_profile', stored.info)
+        post = self.create_post(image_upload(
+            name='rgb.jpg', icc_profile=b'rgb profile'))
+        with Image.open(post.image.path) as stored:
+            self.assertEqual(stored.info.get('icc_profile'), b'rgb profile')
+
+    def test_same_image_is_stored_once(self):
+        first = self.create_post(image_upload('first.png', fmt='PNG'))
+        second = self.create_post(image_upload('second.png', fmt='PNG'))
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertTrue(first.image.name.endswith('.png'))
+
+    def test_invalid_uploads_are_rejected(self):
+        cases = {
+            'not_image': SimpleUploadedFile(
+                'fake.jpg', b'not an image', content_type='image/jpeg'),
+            'too_many_pixels': image_upload(size=(200, 200)),
+        }
+        with override_settings(POST_IMAGE_MAX_PIXELS=10_000):
+            for code, upload in cases.items():
+                with self.subTest(code=code):
+                    posts = Post.objects.count()
+                    response = self.client.post(
+                        reverse('posts:post_create'),
+                        {'text': 'Пост', 'image': upload},
+                    )
+                    self.assertTrue(response.context['form'].errors['image'])
+                    self.assertEqual(Post.objects.count(), posts)
+
+    def test_oversized_file_fails_before_decoding(self):
+        upload = image_upload()
+        with override_settings(POST_IMAGE_MAX_UPLOAD_SIZE=upload.size - 1):
+            with self.assertRaises(ValidationError) as error:
+                uploads.prepare(upload)
+        self.assertEqual(error.exception.code, 'file_too_large')
@@ -0,0 +1,160 @@
+"""Заблаговременная генерация миниатюр картинок постов.
+
+Миниатюры всех размеров из POST_THUMBNAIL_SIZES и варианты для srcset
+(posts.image_variants) строятся в пуле потоков после сохранения поста,
+а шаблоны только читают готовую запись из хранилища sorl-thumbnail и
+до её появления показывают заглушку.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.kvstores import cached_db_kvstore
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.models import KVStore as KVStoreModel
+from sorl.thumbnail.parsers import parse_geometry
+
+from . import image_variants
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = set()
+
+
+class ReadyThumbnailBackend(ThumbnailBackend):
+    def cached_thumbnail(self, file_, geometry_string, **options):
+        """Как get_thumbnail, но без генерации: None, если миниатюры нет."""
+        return default.kvstore.get(
+            self.thumbnail_file(file_, geometry_string, **options)
+        )
+
+    def thumbnail_file(self, file_, geometry_string, **options):
+        source = ImageFile(file_)
+        if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(sorl_settings, attr)
+            if value != getattr(sorl_defaults, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return ImageFile(name, default.storage)
+
+
+backend = ReadyThumbnailBackend()
+
+
+class Placeholder:
+    is_placeholder = True
+
+    def __init__(self, geometry_string):
+        self.width, self.height = parse_geometry(geometry_string)
+        self.height = self.height or self.width
+        self.width = self.width or self.height
+
+    @property
+    def url(self):
+        svg = (
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{self.width}" '
+            f'height="{self.height}"><rect width="100%" height="100%" '
+            f'fill="#e9ecef"/></svg>'
+        )
+        return 'data:image/svg+xml,' + quote(svg)
+
+
+def options_for(geometry_string):
+    return dict(settings.POST_THUMBNAIL_SIZES.get(geometry_string, {}))
+
+
+def ready_thumbnail(name, geometry_string):
+    return backend.cached_thumbnail(
+        name, geometry_string, **options_for(geometry_string)
+    )
+
+
+def prefetch(names, geometry_string):
+    """Читает записи миниатюр names одним запросом в кэш sorl-thumbnail.
+
+    После этого ready_thumbnail для них не обращается к БД, в том числе
+    для ещё не созданных миниатюр.
+    """
+    kvstore = default.kvstore
+    if not names or not isinstance(kvstore, cached_db_kvstore.KVStore):
+        return
+    keys = {
+        add_prefix(backend.thumbnail_file(
+            name, geometry_string, **options_for(geometry_string)
+        ).key)
+        for name in names
+    }
+    missing = keys - set(kvstore.cache.get_many(keys))
+    if not missing:
+        return
+    stored = dict(
+        KVStoreModel.objects.filter(key__in=missing)
+        .values_list('key', 'value')
+    )
+    empty = cached_db_kvstore.EMPTY_VALUE
+    kvstore.cache.set_many(
+        {key: stored.get(key, empty) for key in missing},
+        sorl_settings.THUMBNAIL_CACHE_TIMEOUT,
+    )
+
+
+def missing_sizes(name):
+    return [
+        geometry for geometry in settings.POST_THUMBNAIL_SIZES
+        if not ready_thumbnail(name, geometry)
+    ]
+
+
+def needs_generation(name):
+    return bool(missing_sizes(name)) or not image_variants.built(name)
+
+
+def generate(name):
+    for geometry in missing_sizes(name):
+        backend.get_thumbnail(name, geometry, **options_for(geometry))
+    image_variants.build(name)
+
+
+def _generate_in_worker(name):
+    try:
+        generate(name)
+    finally:
+        _pending.discard(name)
+        close_old_connections()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.THUMBNAIL_WORKERS,
+                thread_name_prefix='thumbnails',
+            )
+        return _executor
+
+
+def submit(name):
+    if not settings.THUMBNAIL_WORKERS:
+        generate(name)
+        return
+    if name in _pending:
+        return
+    _pending.add(name)
+    _get_executor().submit(_generate_in_worker, name)
+
+
+def schedule(name):
+    if name:
+        transaction.on_commit(lambda: submit(name))
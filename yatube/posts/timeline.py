@@ -0,0 +1,117 @@
+"""Материализованные ленты подписок (fan-out-on-write).
+
+Новый пост раскладывается по лентам подписчиков автора сразу после
+сохранения, поэтому follow_index читает готовую ленту по индексу
+(user, pub_date) вместо соединения с Follow. Посты авторов, у которых
+подписчиков больше TIMELINE_FANOUT_MAX_FOLLOWERS, не раскладываются:
+они подмешиваются в ленту при чтении.
+"""
+from collections import defaultdict
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import F, Q
+
+from . import follow_graph
+from .models import Follow, Post, TimelineEntry
+
+BATCH_SIZE = 1000
+
+
+def is_fanout_author(author_id):
+    return (
+        follow_graph.followers_count(author_id)
+        <= settings.TIMELINE_FANOUT_MAX_FOLLOWERS
+    )
+
+
+def popular_authors_followed(user):
+    counts = follow_graph.followers_counts(follow_graph.following(user.pk))
+    return sorted(
+        author_id for author_id, count in counts.items()
+        if count > settings.TIMELINE_FANOUT_MAX_FOLLOWERS
+    )
+
+
+def _bulk_insert(entries, batch_size=BATCH_SIZE):
+    entries = iter(entries)
+    while True:
+        batch = list(islice(entries, batch_size))
+        if not batch:
+            return
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def fan_out(post):
+    if not is_fanout_author(post.author_id):
+        return
+    follower_ids = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    _bulk_insert(
+        TimelineEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+        for user_id in follower_ids.iterator()
+    )
+
+
+def backfill(user_id, author_id):
+    if not is_fanout_author(author_id):
+        return
+    posts = Post.objects.filter(author_id=author_id).values_list(
+        'id', 'pub_date'
+    )[:settings.TIMELINE_BACKFILL_LIMIT]
+    _bulk_insert(
+        TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+        for post_id, pub_date in posts
+    )
+
+
+def prune(user_id, author_id):
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+def feed(user):
+    popular = popular_authors_followed(user)
+    if not popular:
+        # Ключ ленты — (pub_date, post) записи: и страницы, и курсор
+        # (CursorPaginator берёт ключ из order_by) идут по индексу
+        # timeline_user_date_idx.
+        return Post.objects.filter(timeline_entries__user=user).annotate(
+            feed_pub_date=F('timeline_entries__pub_date'),
+            feed_post=F('timeline_entries__post'),
+        ).order_by('-feed_pub_date', '-feed_post')
+    return Post.objects.filter(
+        Q(id__in=TimelineEntry.objects.filter(user=user).values('post_id'))
+        | Q(author_id__in=popular)
+    )
+
+
+def rebuild(batch_size=BATCH_SIZE):
+    # Подписчики группируются по автору: посты каждого автора читаются
+    # один раз, а не для каждой подписки.
+    TimelineEntry.objects.all().delete()
+    follows = Follow.objects.order_by('pk').values_list('user_id', 'author_id')
+    followers = defaultdict(list)
+    for user_id, author_id in follows.iterator(chunk_size=batch_size):
+        followers[author_id].append(user_id)
+    rebuilt = 0
+    for author_id, user_ids in followers.items():
+        rebuilt += len(user_ids)
+        if len(user_ids) > settings.TIMELINE_FANOUT_MAX_FOLLOWERS:
+            continue
+        posts = list(Post.objects.filter(author_id=author_id).values_list(
+            'id', 'pub_date'
+        )[:settings.TIMELINE_BACKFILL_LIMIT])
+        _bulk_insert(
+            (
+                TimelineEntry(
+                    user_id=user_id, post_id=post_id, pub_date=pub_date
+                )
+                for user_id in user_ids
+                for post_id, pub_date in posts
+            ),
+            batch_size,
+        )
+    return rebuilt
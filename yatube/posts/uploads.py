@@ -0,0 +1,134 @@
+"""Обработка загружаемых картинок постов.
+
+Заголовок проверяется до декодирования: формат, размер файла и число
+пикселей (защита от «бомб»). Большие JPEG декодируются сразу в
+уменьшенном масштабе (Image.draft), остальные уменьшаются через
+reduce; сторона результата не превышает POST_IMAGE_MAX_SIDE. EXIF и
+прочие метаданные не сохраняются, ориентация из EXIF применяется к
+пикселям.
+
+Файл называется по SHA-256 содержимого: повторная загрузка той же
+картинки ссылается на уже сохранённый файл и места не занимает.
+"""
+import hashlib
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from .models import Post
+
+FORMATS = {
+    'JPEG': 'jpg',
+    'PNG': 'png',
+    'GIF': 'gif',
+    'WEBP': 'webp',
+}
+# Из метаданных сохраняется только прозрачность палитры.
+KEPT_INFO = ('transparency',)
+EXIF_ORIENTATION = 0x0112
+
+
+def _open(file):
+    if file.size > settings.POST_IMAGE_MAX_UPLOAD_SIZE:
+        raise ValidationError(
+            'Файл больше %(limit)d МБ.',
+            code='file_too_large',
+            params={'limit': settings.POST_IMAGE_MAX_UPLOAD_SIZE // 2 ** 20},
+        )
+    file.seek(0)
+    try:
+        # Читает только заголовок: пиксели декодируются позже.
+        image = Image.open(file)
+    except (OSError, Image.DecompressionBombError):
+        raise ValidationError(
+            'Загрузите картинку в формате JPEG, PNG, GIF или WebP.',
+            code='invalid_image',
+        )
+    if image.format not in FORMATS:
+        raise ValidationError(
+            'Загрузите картинку в формате JPEG, PNG, GIF или WebP.',
+            code='invalid_image',
+        )
+    if image.width * image.height > settings.POST_IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            'Слишком большое разрешение картинки.', code='too_many_pixels',
+        )
+    return image
+
+
+def _encode(image, fmt):
+    output = BytesIO()
+    options = {}
+    if fmt == 'JPEG':
+        options = {
+            'quality': settings.POST_IMAGE_QUALITY,
+            'optimize': True,
+            'progressive': True,
+        }
+    elif fmt == 'WEBP':
+        options = {'quality': settings.POST_IMAGE_QUALITY, 'method': 4}
+    elif fmt == 'PNG':
+        # optimize перебирает фильтры и на больших PNG в разы медленнее.
+        options = {'compress_level': 6}
+    icc_profile = image.info.get('icc_profile')
+    if icc_profile:
+        options['icc_profile'] = icc_profile
+    # PNG-кодировщик дописывает EXIF и текстовые блоки из info.
+    image.info = {
+        key: value for key, value in image.info.items()
+        if key in KEPT_INFO
+    }
+    image.save(output, fmt, **options)
+    return output.getvalue()
+
+
+def prepare(file):
+    """Байты обработанной картинки и расширение файла."""
+    image = _open(file)
+    fmt = image.format
+    if getattr(image, 'is_animated', False):
+        # Анимацию не пережимаем, чтобы не потерять кадры.
+        file.seek(0)
+        return file.read(), FORMATS[fmt]
+    limit = settings.POST_IMAGE_MAX_SIDE
+    if fmt == 'JPEG':
+        # Декодер JPEG сразу уменьшает в 2, 4 или 8 раз: полноразмерный
+        # растр в памяти не появляется.
+        image.draft('RGB', (limit, limit))
+    if image.getexif().get(EXIF_ORIENTATION, 1) != 1:
+        image = ImageOps.exif_transpose(image)
+    if fmt == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+        # Профиль ICC описывает исходное (CMYK) пространство: с ним
+        # браузеры с управлением цветом исказили бы RGB-пиксели.
+        image.info.pop('icc_profile', None)
+    image.thumbnail((limit, limit), Image.LANCZOS, reducing_gap=3.0)
+    return _encode(image, fmt), FORMATS[fmt]
+
+
+def process(file):
+    """Значение для Post.image: имя уже сохранённого файла или новый файл.
+
+    Вызывается из PostForm.clean_image; при ошибке — ValidationError.
+    """
+    data, extension = prepare(file)
+    digest = hashlib.sha256(data).hexdigest()
+    field = Post._meta.get_field('image')
+    name = field.generate_filename(None, f'{digest}.{extension}')
+    if field.storage.exists(name):
+        return name
+    return ContentFile(data, name=f'{digest}.{extension}')
+
+
+def store(file):
+    """Обрабатывает и сохраняет картинку, возвращает имя в хранилище."""
+    result = process(file)
+    if isinstance(result, str):
+        return result
+    field = Post._meta.get_field('image')
+    return field.storage.save(
+        field.generate_filename(None, result.name), result
+    )
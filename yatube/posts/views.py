@@ -1,14 +1,30 @@
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 
+from core import ratelimit
+from core.db import serialized_writes
+from core.views import too_many_requests
+
+from . import (comment_buffer, counters, export, follow_graph, page_cache,
+               search, timeline)
 from .forms import PostForm, CommentForm
 from .models import Comment, Group, Follow, Post, User
+from .pagination import CursorPaginator, comments_page
 
 NUM_OF_POSTS: int = 10
+EXPORT_CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
 
 
-def paginator(posts, page, num_of_posts=NUM_OF_POSTS):
+def paginator(posts, page, num_of_posts=NUM_OF_POSTS, cursor=None):
+    if cursor is not None or settings.POSTS_CURSOR_PAGINATION:
+        return CursorPaginator(posts, num_of_posts).get_page(cursor)
     paginator = Paginator(posts, num_of_posts)
     page_obj = paginator.get_page(page)
     return page_obj
@@ -16,8 +32,11 @@ def paginator(posts, page, num_of_posts=NUM_OF_POSTS):
 
 def index(request):
     template = 'posts/index.html'
+    page_cache.tag(request, 'index')
     post_list = Post.objects.select_related('author', 'group')
-    page_obj = paginator(post_list, request.GET.get('page'))
+    page_obj = paginator(
+        post_list, request.GET.get('page'), cursor=request.GET.get('cursor')
+    )
     context = {
         'page_obj': page_obj,
     }
@@ -27,8 +46,11 @@ def index(request):
 def group_posts(request, slug):
     template = 'posts/group_list.html'
     group = get_object_or_404(Group, slug=slug)
+    page_cache.tag(request, f'group:{group.pk}')
     posts = group.group_posts.select_related('author', 'group')
-    page_obj = paginator(posts, request.GET.get('page'))
+    page_obj = paginator(
+        posts, request.GET.get('page'), cursor=request.GET.get('cursor')
+    )
     context = {
         'group': group,
         'page_obj': page_obj
@@ -39,17 +61,18 @@ def group_posts(request, slug):
 def profile(request, username):
     template = 'posts/profile.html'
     user = get_object_or_404(User, username=username)
+    page_cache.tag(request, f'profile:{user.pk}')
     posts = user.posts.select_related('author', 'group').all()
-    posts_count = posts.count()
-    page_obj = paginator(posts, request.GET.get('page'))
-    following = (
-        request.user.is_authenticated
-        and Follow.objects.filter(user=request.user, author=user).exists()
+    stats = counters.user_stats(user)
+    page_obj = paginator(
+        posts, request.GET.get('page'), cursor=request.GET.get('cursor')
     )
+    following = follow_graph.is_following(request.user, user.pk)
     context = {
         'author': user,
         'page_obj': page_obj,
-        'posts_count': posts_count,
+        'posts_count': stats.posts_count,
+        'stats': stats,
         'following': following,
     }
     return render(request, template, context)
@@ -57,20 +80,86 @@ def profile(request, username):
 
 def post_detail(request, post_id):
     template = 'posts/post_detail.html'
-    post = get_object_or_404(Post, pk=post_id)
+    page_cache.tag(request, f'post:{post_id}')
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group', 'author__stats'),
+        pk=post_id
+    )
+    page_cache.tag(
+        request, f'profile:{post.author_id}',
+        *([f'group:{post.group_id}'] if post.group_id else []),
+    )
     form = CommentForm(request.POST or None)
-    comments = Comment.objects.filter(post=post)
-    author_post = post.author.posts.count()
+    comments, comments_next = comments_page(
+        Comment.objects.filter(post=post).select_related('author'),
+        request.GET.get('comments')
+    )
+    author_post = counters.user_stats(post.author).posts_count
     context = {
         'post': post,
         'author_post': author_post,
         'form': form,
-        'comments': comments
+        'comments': comments,
+        'comments_next': comments_next,
+    }
+    return render(request, template, context)
+
+
+def post_comments(request, post_id):
+    post = get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    comments, comments_next = comments_page(
+        Comment.objects.filter(post=post).select_related('author'),
+        request.GET.get('cursor')
+    )
+    return JsonResponse({
+        'comments': [
+            {
+                'id': comment.pk,
+                'author': comment.author.username,
+                'text': comment.text,
+                'created': comment.created.isoformat(),
+            }
+            for comment in comments
+        ],
+        'next': comments_next,
+    })
+
+
+def post_search(request):
+    template = 'posts/search.html'
+    query = request.GET.get('q', '').strip()
+    # Выдача упорядочена по релевантности, курсор по дате к ней неприменим.
+    page_obj = Paginator(search.search(query), NUM_OF_POSTS).get_page(
+        request.GET.get('page'))
+    context = {
+        'query': query,
+        'page_obj': page_obj,
     }
     return render(request, template, context)
 
 
+@staff_member_required
+def export_table(request, name):
+    if name not in export.EXPORTS:
+        raise Http404
+    fmt = request.GET.get('format')
+    if fmt not in export.FORMATS:
+        fmt = 'ndjson'
+    compress = request.GET.get('gzip') == '1'
+    response = StreamingHttpResponse(
+        export.stream(name, fmt, compress),
+        content_type=(
+            'application/gzip' if compress else EXPORT_CONTENT_TYPES[fmt]
+        ),
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{export.filename(name, fmt, compress)}"'
+    )
+    return response
+
+
 @login_required
+@serialized_writes
 def post_create(request):
     template = 'posts/create_post.html'
     form = PostForm(request.POST or None,
@@ -107,6 +196,31 @@ def post_edit(request, post_id):
 
 @login_required
 def add_comment(request, post_id):
+    if request.method == 'POST' and settings.COMMENT_RATE:
+        retry_after = ratelimit.take(
+            f'comment:{request.user.pk}',
+            settings.COMMENT_RATE, settings.COMMENT_BURST,
+        )
+        if retry_after:
+            return too_many_requests(request, retry_after)
+    if settings.COMMENT_BATCH_WINDOW:
+        return _add_comment_batched(request, post_id)
+    return _add_comment(request, post_id)
+
+
+def _add_comment_batched(request, post_id):
+    form = CommentForm(request.POST or None)
+    if form.is_valid():
+        comment = form.save(commit=False)
+        comment.author = request.user
+        comment.post_id = post_id
+        if not comment_buffer.submit(comment):
+            raise Http404
+    return redirect('posts:post_detail', post_id=post_id)
+
+
+@serialized_writes
+def _add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST or None)
     if form.is_valid():
@@ -120,8 +234,10 @@ def add_comment(request, post_id):
 @login_required
 def follow_index(request):
     template = 'posts/follow.html'
-    posts = Post.objects.filter(author__following__user=request.user)
-    page_obj = paginator(posts, request.GET.get('page'))
+    posts = timeline.feed(request.user).select_related('author', 'group')
+    page_obj = paginator(
+        posts, request.GET.get('page'), cursor=request.GET.get('cursor')
+    )
     context = {
         'page_obj': page_obj,
         'following': True
@@ -140,6 +256,5 @@ def profile_follow(request, username):
 @login_required
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
-    if Follow.objects.filter(user=request.user, author=author).exists():
-        Follow.objects.filter(user=request.user, author=author).delete()
+    Follow.objects.filter(user=request.user, author=author).delete()
     return redirect('posts:follow_index')
@@ -0,0 +1,12 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Очищает все кэши из settings.CACHES, включая общие.'
+
+    def handle(self, *args, **kwargs):
+        for alias in settings.CACHES:
+            caches[alias].clear()
+        self.stdout.write('Cleared cache\n')
@@ -0,0 +1,95 @@
+import signal
+import subprocess
+import sys
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+
+from utils import tasks
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет фоновые задачи из очереди utils.Job в пуле потоков '
+        '(и процессов). Нужен при YATUBE_TASKS_SYNC=0.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads', type=int, default=settings.TASKS_WORKER_THREADS
+        )
+        parser.add_argument(
+            '--processes', type=int, default=1,
+            help='Запустить столько процессов-воркеров по --threads потоков.',
+        )
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Выйти, когда готовых задач не останется.',
+        )
+
+    def handle(self, *args, **options):
+        if options['processes'] > 1:
+            return self.spawn(options)
+        threads = options['threads']
+        if connection.vendor == 'sqlite':
+            # Задача держит блокировку записи SQLite до коммита: потоки
+            # процесса всё равно выполняли бы задачи по одному.
+            threads = 1
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: stop.set())
+        tasks.recover_stale()
+        workers = [
+            threading.Thread(
+                target=self.work, args=(stop, options['burst']),
+                name=f'worker-{number}',
+            )
+            for number in range(threads)
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            while any(worker.is_alive() for worker in workers):
+                for worker in workers:
+                    worker.join(settings.TASKS_POLL_INTERVAL)
+        except KeyboardInterrupt:
+            stop.set()
+            for worker in workers:
+                worker.join()
+
+    @staticmethod
+    def work(stop, burst):
+        try:
+            while not stop.is_set():
+                job = tasks.claim()
+                if job is not None:
+                    tasks.execute(job)
+                    continue
+                if burst:
+                    return
+                tasks.recover_stale()
+                stop.wait(settings.TASKS_POLL_INTERVAL)
+        finally:
+            connections.close_all()
+
+    @staticmethod
+    def spawn(options):
+        command = [
+            sys.executable, sys.argv[0], 'runworker',
+            '--threads', str(options['threads']),
+        ] + (['--burst'] if options['burst'] else [])
+        children = [
+            subprocess.Popen(command) for _ in range(options['processes'])
+        ]
+        signal.signal(
+            signal.SIGTERM,
+            lambda *_: [child.terminate() for child in children],
+        )
+        try:
+            for child in children:
+                child.wait()
+        except KeyboardInterrupt:
+            for child in children:
+                child.terminate()
+                child.wait()
@@ -0,0 +1,81 @@
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """Отложенная задача utils.tasks, ожидающая воркера.
+
+    Успешно выполненные задачи удаляются, упавшие после всех попыток
+    остаются со статусом failed и текстом ошибки.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField(
+        max_length=200,
+        verbose_name='Задача'
+    )
+    args = models.TextField(
+        default='[]',
+        verbose_name='Аргументы (JSON)'
+    )
+    key = models.CharField(
+        max_length=200,
+        blank=True,
+        null=True,
+        verbose_name='Ключ идемпотентности'
+    )
+    status = models.CharField(
+        max_length=7,
+        choices=STATUS_CHOICES,
+        default=QUEUED,
+        verbose_name='Статус'
+    )
+    attempts = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Попыток'
+    )
+    max_attempts = models.PositiveIntegerField(
+        verbose_name='Максимум попыток'
+    )
+    run_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Выполнить после'
+    )
+    locked_until = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Занята воркером до'
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка'
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Создана'
+    )
+
+    class Meta:
+        constraints = [
+            # Пока задача ждёт в очереди, такая же не добавляется.
+            models.UniqueConstraint(fields=('key',),
+                                    condition=Q(status='queued'),
+                                    name='unique_queued_job_key'),
+        ]
+        indexes = [
+            models.Index(fields=('status', 'run_at'),
+                         name='job_status_run_at_idx'),
+        ]
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Задачи'
+
+    def __str__(self) -> str:
+        return f'{self.name} [{self.status}]'
@@ -0,0 +1,173 @@
+"""Очередь фоновых задач в базе данных, без внешних зависимостей.
+
+Функция, обёрнутая в @task, получает метод enqueue(*args, key=None).
+При TASKS_SYNC (по умолчанию и в тестах) задача выполняется сразу.
+Иначе в таблицу utils.Job добавляется запись в той же транзакции, что
+и изменения вызывающего кода: задача не теряется при откате и не
+запускается до коммита. manage.py runworker забирает готовые задачи,
+повторяет упавшие с экспоненциальной задержкой и удаляет выполненные.
+
+Ключ идемпотентности не даёт поставить вторую такую же задачу, пока
+первая ждёт в очереди. Аргументы должны сериализоваться в JSON.
+"""
+import json
+import logging
+import traceback
+from datetime import timedelta
+from functools import update_wrapper
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger('yatube.tasks')
+
+
+class Task:
+    def __init__(self, func, max_attempts=None):
+        update_wrapper(self, func)
+        self.func = func
+        self.name = f'{func.__module__}.{func.__name__}'
+        self.max_attempts = max_attempts
+
+    def __call__(self, *args):
+        return self.func(*args)
+
+    def enqueue(self, *args, key=None):
+        if settings.TASKS_SYNC:
+            self.func(*args)
+            return
+        Job.objects.bulk_create([Job(
+            name=self.name,
+            args=json.dumps(args),
+            key=key,
+            max_attempts=self.max_attempts or settings.TASKS_MAX_ATTEMPTS,
+        )], ignore_conflicts=True)
+
+
+def task(func=None, *, max_attempts=None):
+    if func is None:
+        return lambda func: Task(func, max_attempts)
+    return Task(func, max_attempts)
+
+
+def backoff(attempt):
+    """Задержка в секундах перед попыткой attempt + 1."""
+    return min(
+        settings.TASKS_RETRY_DELAY * 2 ** (attempt - 1),
+        settings.TASKS_RETRY_MAX_DELAY,
+    )
+
+
+def _requeue(job, **fields):
+    try:
+        with transaction.atomic():
+            Job.objects.filter(pk=job.pk).update(
+                status=Job.QUEUED, locked_until=None, **fields
+            )
+    except IntegrityError:
+        # В очереди уже ждёт задача с тем же ключом: выполнится она.
+        job.delete()
+
+
+def _locked_until():
+    return timezone.now() + timedelta(seconds=settings.TASKS_LOCK_TIMEOUT)
+
+
+def recover_stale():
+    """Возвращает в очередь задачи воркеров, которые не дожили до конца.
+
+    Задача, исчерпавшая попытки (например, каждый раз роняющая воркер),
+    в очередь не возвращается, а помечается failed.
+    """
+    stale = Job.objects.filter(
+        status=Job.RUNNING, locked_until__lt=timezone.now()
+    )
+    for job in stale:
+        if job.attempts < job.max_attempts:
+            _requeue(job)
+            continue
+        Job.objects.filter(pk=job.pk, status=Job.RUNNING).update(
+            status=Job.FAILED, locked_until=None,
+            last_error='Worker stopped before the job finished',
+        )
+        logger.error('%s (job %s) lost its worker after %s attempts',
+                     job.name, job.pk, job.attempts)
+
+
+def claim():
+    """Следующая готовая задача, занятая этим воркером, или None.
+
+    Захват — UPDATE с условием на статус, поэтому работает без
+    SELECT ... FOR UPDATE и на SQLite.
+    """
+    while True:
+        now = timezone.now()
+        job = Job.objects.filter(
+            status=Job.QUEUED, run_at__lte=now
+        ).order_by('run_at', 'pk').first()
+        if job is None:
+            return None
+        claimed = Job.objects.filter(pk=job.pk, status=Job.QUEUED).update(
+            status=Job.RUNNING,
+            attempts=F('attempts') + 1,
+            locked_until=_locked_until(),
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+
+
+def _failed(job):
+    error = traceback.format_exc()
+    if job.attempts >= job.max_attempts:
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.FAILED, locked_until=None, last_error=error
+        )
+        logger.error('%s (job %s) failed after %s attempts:\n%s',
+                     job.name, job.pk, job.attempts, error)
+        return
+    delay = backoff(job.attempts)
+    _requeue(
+        job, last_error=error,
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+    logger.warning('%s (job %s) failed, retry in %ss',
+                   job.name, job.pk, delay)
+
+
+def execute(job):
+    """Выполняет задачу в транзакции: при ошибке её изменения
+    откатываются и повтор начинается с чистого листа.
+
+    Транзакция начинается с записи — продления захвата задачи. SQLite
+    сразу берёт блокировку записи, дожидаясь её по busy_timeout, и
+    задача не падает с «database is locked», когда от чтения переходит
+    к записи.
+    """
+    try:
+        func = import_string(job.name).func
+        with transaction.atomic():
+            Job.objects.filter(pk=job.pk).update(locked_until=_locked_until())
+            func(*json.loads(job.args))
+    except Exception:
+        _failed(job)
+    else:
+        job.delete()
+
+
+def run_pending(limit=None):
+    """Выполняет готовые задачи, пока они есть; возвращает их число."""
+    recover_stale()
+    done = 0
+    while limit is None or done < limit:
+        job = claim()
+        if job is None:
+            break
+        execute(job)
+        done += 1
+    return done
@@ -0,0 +1,173 @@
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import search
+from posts.models import Follow, Group, Post, TimelineEntry, User
+
+from . import tasks
+from .models import Job
+
+calls = []
+
+
+@tasks.task
+def record(value):
+    calls.append(value)
+
+
+@tasks.task(max_attempts=2)
+def broken(slug):
+    Group.objects.create(title=slug, slug=slug, description='')
+    raise RuntimeError('boom')
+
+
+@tasks.task(max_attempts=1)
+def read_then_write(slug):
+    # Транзакция начинается чтением и затем переходит к записи.
+    list(Group.objects.all())
+    Group.objects.create(title=slug, slug=slug, description='')
+
+
+class TaskTestMixin:
+    def setUp(self):
+        calls.clear()
+
+
+class SyncTaskTests(TaskTestMixin, TestCase):
+    def test_sync_mode_runs_immediately(self):
+        record.enqueue(1, key='record')
+        self.assertEqual(calls, [1])
+        self.assertFalse(Job.objects.exists())
+
+
+@override_settings(TASKS_SYNC=False, TASKS_RETRY_DELAY=10)
+class QueuedTaskTests(TaskTestMixin, TestCase):
+    def test_enqueue_stores_job_until_worker_runs(self):
+        record.enqueue(1)
+        self.assertEqual(calls, [])
+        job = Job.objects.get()
+        self.assertEqual((job.name, job.args), ('utils.tests.record', '[1]'))
+        self.assertEqual(tasks.run_pending(), 1)
+        self.assertEqual(calls, [1])
+        self.assertFalse(Job.objects.exists())
+
+    def test_key_deduplicates_queued_jobs(self):
+        record.enqueue(1, key='record:1')
+        record.enqueue(1, key='record:1')
+        record.enqueue(2, key='record:2')
+        self.assertEqual(Job.objects.count(), 2)
+        tasks.run_pending()
+        record.enqueue(1, key='record:1')
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_failed_job_is_retried_with_backoff(self):
+        broken.enqueue('first')
+        started = timezone.now()
+        with self.assertLogs('yatube.tasks', 'WARNING'):
+            tasks.run_pending()
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertIn('RuntimeError: boom', job.last_error)
+        self.assertGreaterEqual(job.run_at, started + timedelta(seconds=10))
+        # Изменения упавшей задачи откатываются.
+        self.assertFalse(Group.objects.filter(slug='first').exists())
+        self.assertEqual(tasks.run_pending(), 0)
+        Job.objects.update(run_at=timezone.now())
+        with self.assertLogs('yatube.tasks', 'ERROR'):
+            tasks.run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+    def test_backoff_doubles_up_to_limit(self):
+        with override_settings(TASKS_RETRY_MAX_DELAY=50):
+            self.assertEqual(
+                [tasks.backoff(attempt) for attempt in range(1, 5)],
+                [10, 20, 40, 50],
+            )
+
+    def test_stale_running_job_returns_to_queue(self):
+        record.enqueue(1, key='record')
+        Job.objects.update(
+            status=Job.RUNNING,
+            locked_until=timezone.now() - timedelta(seconds=1),
+        )
+        record.enqueue(2, key='other')
+        self.assertEqual(tasks.run_pending(), 2)
+        self.assertEqual(sorted(calls), [1, 2])
+
+    def test_stale_job_without_attempts_left_is_failed(self):
+        """Задача, каждый раз теряющая воркер, не крутится вечно"""
+        broken.enqueue('lost')
+        Job.objects.update(
+            status=Job.RUNNING, attempts=2,
+            locked_until=timezone.now() - timedelta(seconds=1),
+        )
+        with self.assertLogs('yatube.tasks', 'ERROR'):
+            self.assertEqual(tasks.run_pending(), 0)
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+    def test_stale_job_is_dropped_when_same_key_is_queued(self):
+        record.enqueue(1, key='record')
+        Job.objects.update(
+            status=Job.RUNNING,
+            locked_until=timezone.now() - timedelta(seconds=1),
+        )
+        record.enqueue(1, key='record')
+        self.assertEqual(tasks.run_pending(), 1)
+        self.assertEqual(calls, [1])
+
+
+@override_settings(TASKS_SYNC=False)
+class DeferredSideEffectsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.follower = User.objects.create_user(username='follower')
+        Follow.objects.create(user=cls.follower, author=cls.author)
+        tasks.run_pending()
+
+    def test_post_create_defers_timeline_and_search(self):
+        self.client.force_login(self.author)
+        self.client.post(
+            reverse('posts:post_create'), {'text': 'отложенная индексация'}
+        )
+        post = Post.objects.get()
+        self.assertEqual(post.author.stats.posts_count, 1)
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(list(search.search('индексация')), [])
+        self.assertEqual(tasks.run_pending(), 2)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.follower, post=post).exists())
+        self.assertEqual(list(search.search('индексация')), [post])
+
+    def test_backfill_skips_cancelled_follow(self):
+        reader = User.objects.create_user(username='reader')
+        Post.objects.create(author=self.author, text='старый пост')
+        follow = Follow.objects.create(user=reader, author=self.author)
+        follow.delete()
+        tasks.run_pending()
+        self.assertFalse(TimelineEntry.objects.filter(user=reader).exists())
+
+
+@override_settings(TASKS_SYNC=False)
+class RunWorkerTests(TaskTestMixin, TransactionTestCase):
+    def test_burst_worker_drains_queue(self):
+        for value in range(5):
+            record.enqueue(value)
+        call_command('runworker', threads=2, burst=True)
+        self.assertEqual(sorted(calls), list(range(5)))
+        self.assertFalse(Job.objects.exists())
+
+    def test_parallel_jobs_upgrading_to_write_do_not_fail(self):
+        """Задачи, которые читают и затем пишут, не мешают друг другу"""
+        for number in range(80):
+            read_then_write.enqueue(f'group-{number}')
+        call_command('runworker', threads=4, burst=True)
+        self.assertEqual(
+            list(Job.objects.values_list('last_error', flat=True)), [])
+        self.assertEqual(Group.objects.count(), 80)
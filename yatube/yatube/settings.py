@@ -39,7 +39,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.QueryInstrumentationMiddleware',
+    'core.middleware.ReadReplicaMiddleware',
+    'core.middleware.TemplateProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'posts.page_cache.AnonymousPageCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -51,12 +55,22 @@ MIDDLEWARE = [
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+# Скомпилированные шаблоны кэшируются и при DEBUG = True.
+# YATUBE_TEMPLATE_CACHE=0 — перечитывать шаблоны при каждом рендеринге.
+if os.getenv('YATUBE_TEMPLATE_CACHE', '1') != '0':
+    TEMPLATE_LOADERS = [
+        ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+    ]
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -78,8 +92,24 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+    },
+    # Реплика только для чтения. Локально её роль играет копия файла
+    # primary; чтения идут сюда, только если алиас есть в
+    # DATABASE_REPLICAS.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.getenv(
+            'YATUBE_REPLICA_DB', os.path.join(BASE_DIR, 'replica.sqlite3')
+        ),
+    },
 }
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+DATABASE_REPLICAS = [
+    alias for alias in os.getenv('YATUBE_DB_REPLICAS', '').split(',')
+    if alias
+]
+# Сколько секунд после POST клиент читает только из primary.
+READ_YOUR_WRITES_SECONDS = 10
 
 
 # Password validation
@@ -120,7 +150,21 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 
-STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+# Bootstrap лежит среди шаблонов и публикуется как css/bootstrap.min.css;
+# каталога static в репозитории может не быть, а collectstatic без него
+# падает.
+STATICFILES_DIRS = [
+    ('css', os.path.join(TEMPLATES_DIR, 'includes', 'css')),
+]
+if os.path.isdir(os.path.join(BASE_DIR, 'static')):
+    STATICFILES_DIRS.append(os.path.join(BASE_DIR, 'static'))
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+# Имена с хэшем содержимого и .gz/.br копии (core.storage).
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+# Результат manage.py build_critical_css, встраивается в base.html.
+CRITICAL_CSS_PATH = os.path.join(
+    TEMPLATES_DIR, 'includes', 'css', 'critical.css'
+)
 
 LOGIN_URL = 'users:login'
 
@@ -133,9 +177,122 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
-
-CACHES = {
-    'default': {
+# Медиафайлы отдаёт core.media; YATUBE_MEDIA_SERVE=0 отключает, если их
+# раздаёт веб-сервер.
+MEDIA_SERVE = os.getenv('YATUBE_MEDIA_SERVE', '1') != '0'
+# 'X-Accel-Redirect' (nginx) или 'X-Sendfile' (Apache, lighttpd): файл
+# отдаёт прокси, Django только проверяет путь и условные заголовки.
+MEDIA_SENDFILE = os.getenv('YATUBE_MEDIA_SENDFILE') or None
+# internal-location nginx с alias на MEDIA_ROOT.
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+
+# YATUBE_CACHE=sqlite включает общий для всех воркеров кэш в файле
+# (core.cache.SQLiteCache); по умолчанию — кэш в памяти процесса.
+CACHE_BACKENDS = {
+    'locmem': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    },
+    'sqlite': {
+        'BACKEND': 'core.cache.SQLiteCache',
+        'LOCATION': os.getenv(
+            'YATUBE_CACHE_PATH', os.path.join(BASE_DIR, 'cache.sqlite3')
+        ),
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+            'MAX_SIZE': 256 * 1024 * 1024,
+        },
+    },
+}
+CACHES = {
+    'default': CACHE_BACKENDS[os.getenv('YATUBE_CACHE', 'locmem')],
+}
+
+# Постраничный вывод лент по ключу (pub_date, id) вместо OFFSET.
+# Включается для всех лент или точечно параметром ?cursor= в запросе.
+POSTS_CURSOR_PAGINATION = False
+
+# Ленты подписок: посты авторов с большим числом подписчиков
+# подмешиваются при чтении, а не раскладываются по лентам.
+TIMELINE_FANOUT_MAX_FOLLOWERS = 1000
+TIMELINE_BACKFILL_LIMIT = 1000
+
+FEED_CACHE_TIMEOUT = 60 * 60 * 24
+# Кэш целых страниц для анонимов (posts.page_cache); 0 — выключен.
+# Записи сверяются с версиями областей, поэтому могут жить долго;
+# обратный прокси держит страницу не дольше PAGE_CACHE_PROXY_MAX_AGE.
+PAGE_CACHE_TIMEOUT = 60 * 60
+PAGE_CACHE_PROXY_MAX_AGE = 30
+FOLLOW_CACHE_TIMEOUT = 60 * 60 * 24
+
+COMMENTS_PER_PAGE = 20
+# Частота комментариев одного пользователя (core.ratelimit): токенов в
+# секунду и ёмкость корзины; COMMENT_RATE = 0 отключает ограничение.
+COMMENT_RATE = 1
+COMMENT_BURST = 10
+# Групповая запись комментариев (posts.comment_buffer): окно в секундах
+# и размер пачки. При окне 0 каждый комментарий пишется сразу.
+COMMENT_BATCH_WINDOW = float(os.getenv('YATUBE_COMMENT_BATCH_MS', '0')) / 1000
+COMMENT_BATCH_SIZE = 100
+
+# Миниатюры картинок постов генерируются заранее в пуле потоков.
+# При THUMBNAIL_WORKERS = 0 генерация идёт синхронно.
+POST_THUMBNAIL_SIZES = {
+    '960x339': {'crop': 'center', 'upscale': True},
+}
+THUMBNAIL_WORKERS = 2
+
+# Фоновые задачи (utils.tasks). При YATUBE_TASKS_SYNC=0 побочные эффекты
+# записи ставятся в очередь в БД и выполняются manage.py runworker; по
+# умолчанию и в тестах — сразу, в том же запросе.
+TASKS_SYNC = os.getenv('YATUBE_TASKS_SYNC', '1') != '0'
+TASKS_WORKER_THREADS = 2
+TASKS_POLL_INTERVAL = 1
+TASKS_MAX_ATTEMPTS = 5
+# Задержка перед второй попыткой в секундах, дальше она удваивается.
+TASKS_RETRY_DELAY = 2
+TASKS_RETRY_MAX_DELAY = 600
+# Задача воркера, упавшего без ответа, возвращается в очередь.
+TASKS_LOCK_TIMEOUT = 300
+# Варианты картинок для srcset (posts.image_variants): ширины и
+# пропорции кадра, как у миниатюры 960x339.
+POST_IMAGE_VARIANT_WIDTHS = (480, 960, 1440)
+POST_IMAGE_VARIANT_RATIO = (960, 339)
+
+# Загружаемые картинки постов (posts.uploads): оригинал уменьшается до
+# POST_IMAGE_MAX_SIDE по большей стороне и хранится под SHA-256 имени.
+POST_IMAGE_MAX_SIDE = 2048
+POST_IMAGE_MAX_PIXELS = 50_000_000
+POST_IMAGE_MAX_UPLOAD_SIZE = 20 * 1024 * 1024
+POST_IMAGE_QUALITY = 85
+
+# 'auto' — FTS5, если таблица posts_search есть, иначе 'inverted'.
+SEARCH_BACKEND = 'auto'
+
+# Бюджеты SQL-запросов на один запрос к представлению. В manage.py test
+# превышение бюджета роняет тест (core.testing.QueryBudgetTestRunner).
+QUERY_BUDGETS = {
+    'posts:index': 8,
+    'posts:group_list': 8,
+    'posts:profile': 10,
+    'posts:post_detail': 8,
+    'posts:follow_index': 8,
+}
+QUERY_BUDGET_STRICT = False
+
+# Время рендеринга шаблонов, {% include %} и тегов в Server-Timing и
+# логе yatube.templates (core.profiling).
+TEMPLATE_PROFILING = False
+TEST_RUNNER = 'core.testing.QueryBudgetTestRunner'
+
+# Выполняются для каждого нового соединения SQLite (core.db).
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -20000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
 }
+# Пропускать post_create/add_comment по одному на процесс.
+SQLITE_WRITE_QUEUE = False